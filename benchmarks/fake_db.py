@@ -0,0 +1,276 @@
+import datetime
+import random
+import sqlite3
+from typing import Any, List, Optional
+
+import pymysql
+from pymysql.constants import FIELD_TYPE
+
+from dividend_stocks_filterer.db_functions import NOT_FIXED_DECIMALS, MysqlConnection
+from dividend_stocks_filterer.db_pool import ConnectionPool
+from dividend_stocks_filterer.filters import FILTER_COLUMNS, TABLE_COLUMNS
+from dividend_stocks_filterer.index_advisor import create_index_statement
+
+# Sectors along with the industries of each, as named in the radar file
+SECTORS = {
+    "Consumer Staples": ("Beverages", "Food Products", "Household Products", "Tobacco"),
+    "Energy": ("Oil, Gas and Consumable Fuels", "Energy Equipment and Services"),
+    "Financials": ("Banks", "Insurance", "Capital Markets", "Consumer Finance"),
+    "Health Care": ("Pharmaceuticals", "Life Sciences Tools and Services", "Health Care Equipment and Supplies"),
+    "Industrials": ("Machinery", "Aerospace and Defense", "Road and Rail", "Building Products"),
+    "Information Technology": ("Software", "Semiconductors", "IT Services", "Communications Equipment"),
+    "Materials": ("Chemicals", "Containers and Packaging", "Metals and Mining"),
+    "Real Estate": ("Equity Real Estate Investment Trusts (REITs)", "Real Estate Management and Development"),
+    "Utilities": ("Electric Utilities", "Multi-Utilities", "Water Utilities", "Gas Utilities"),
+}
+
+INTEGER_COLUMNS = ("No Years", "Payouts/ Year", "FV %", "Chowder Number")
+TEXT_COLUMNS = ("Symbol", "Company", "FV", "Sector", "Fair Value", "Streak Basis", "New Member", "Industry")
+DATETIME_COLUMNS = ("Ex-Date", "Pay-Date")
+
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.datetime.fromisoformat(value.decode()))
+
+
+def column_type(column: str) -> str:
+    """
+    Picks the SQLite type of a dividend_data_table column
+
+    :param column: the column, one of filters.TABLE_COLUMNS
+
+    :return type: the SQLite column type, TIMESTAMP columns are read back as datetimes like PyMySQL does
+    """
+    if column in INTEGER_COLUMNS:
+        return "INTEGER"
+    if column in TEXT_COLUMNS:
+        return "TEXT"
+    if column in DATETIME_COLUMNS:
+        return "TIMESTAMP"
+    return "REAL"
+
+
+# The (type code, decimals) PyMySQL describes every dividend_data_table column with, by SQLite column type
+MYSQL_TYPES = {column: {
+    "INTEGER": (FIELD_TYPE.LONGLONG, 0), "TEXT": (FIELD_TYPE.VAR_STRING, 0), "TIMESTAMP": (FIELD_TYPE.DATETIME, 0),
+    "REAL": (FIELD_TYPE.DOUBLE, NOT_FIXED_DECIMALS),
+}[column_type(column)] for column in TABLE_COLUMNS}
+
+
+def symbol(position: int) -> str:
+    """
+    Names the synthetic stock at a position, A to Z then AA, AB and so on
+
+    :param position: the 0 based position of the stock
+
+    :return symbol: the stock ticker
+    """
+    letters = ""
+    position += 1
+    while position:
+        position, letter = divmod(position - 1, 26)
+        letters = chr(ord("A") + letter) + letters
+    return letters
+
+
+def synthetic_rows(count: int, seed: int = 0) -> List[tuple]:
+    """
+    Builds dividend_data_table rows shaped like the radar file ones, with the same kind of skew (most stocks have
+    short streaks & low yields) and of missing values as the real data
+
+    :param count: how many rows to build
+    :param seed: the random seed, the same seed always builds the same rows
+
+    :return rows: the row tuples, ordered as filters.TABLE_COLUMNS
+    """
+    generator = random.Random(seed)
+
+    def maybe(value: Any, missing: float) -> Any:
+        return None if generator.random() < missing else value
+
+    rows = []
+    for position in range(count):
+        sector = generator.choice(tuple(SECTORS))
+        price = round(generator.lognormvariate(3.9, 0.9), 2)
+        dividend_yield = round(generator.lognormvariate(0.8, 0.6), 2)
+        payouts = generator.choice((4, 4, 4, 4, 12, 2, 1))
+        annualized = round(price * dividend_yield / 100, 4)
+        dgr_5y = maybe(round(generator.gauss(6.0, 6.0), 2), 0.08)
+        ex_date = datetime.datetime(2024, 1, 1) + datetime.timedelta(days=generator.randrange(366))
+        fv_percent = int(generator.gauss(0, 20))
+        row = {
+            "Symbol": symbol(position),
+            "Company": "{} {} & Co".format(symbol(position).title(), generator.choice(("Holdings", "Group", "Inc."))),
+            "FV": None,
+            "Sector": maybe(sector, 0.02),
+            "No Years": min(70, int(generator.expovariate(1 / 12)) + 1),
+            "Price": price,
+            "Div Yield": maybe(dividend_yield, 0.01),
+            "5Y Avg Yield": maybe(round(dividend_yield * generator.uniform(0.7, 1.3), 2), 0.05),
+            "Current Div": round(annualized / payouts, 4),
+            "Payouts/ Year": payouts,
+            "Annualized": annualized,
+            "Previous Div": round(annualized / payouts * generator.uniform(0.9, 1.0), 4),
+            "Ex-Date": ex_date,
+            "Pay-Date": ex_date + datetime.timedelta(days=generator.randrange(7, 35)),
+            "Low": round(price * generator.uniform(0.6, 0.95), 2),
+            "High": round(price * generator.uniform(1.05, 1.5), 2),
+            "DGR 1Y": maybe(round(generator.gauss(6.0, 10.0), 2), 0.05),
+            "DGR 3Y": maybe(round(generator.gauss(6.0, 7.0), 2), 0.07),
+            "DGR 5Y": dgr_5y,
+            "DGR 10Y": maybe(round(generator.gauss(6.0, 5.0), 2), 0.2),
+            "TTR 1Y": round(generator.gauss(8.0, 20.0), 2),
+            "TTR 3Y": maybe(round(generator.gauss(25.0, 30.0), 2), 0.05),
+            "Fair Value": "Overvalued" if fv_percent > 10 else "Undervalued" if fv_percent < -10 else "At Fair Value",
+            "FV %": maybe(fv_percent, 0.1),
+            "Streak Basis": generator.choice(("Declaration date", "Ex-Date")),
+            "Chowder Number": None if dgr_5y is None else int(dividend_yield + dgr_5y),
+            "EPS 1Y": maybe(round(generator.gauss(10.0, 40.0), 2), 0.1),
+            "Revenue 1Y": maybe(round(generator.gauss(7.0, 15.0), 2), 0.05),
+            "NPM": maybe(round(generator.gauss(12.0, 10.0), 2), 0.05),
+            "CF/Share": maybe(round(generator.lognormvariate(1.0, 1.0), 2), 0.05),
+            "ROE": maybe(round(generator.gauss(15.0, 15.0), 2), 0.05),
+            "Current R": maybe(round(generator.lognormvariate(0.3, 0.5), 2), 0.1),
+            "Debt/Capital": maybe(round(generator.uniform(0.0, 1.2), 2), 0.05),
+            "ROTC": maybe(round(generator.gauss(10.0, 8.0), 2), 0.1),
+            "P/E": maybe(round(generator.gauss(20.0, 15.0), 2), 0.05),
+            "P/BV": maybe(round(generator.lognormvariate(0.8, 0.8), 2), 0.05),
+            "PEG": maybe(round(generator.lognormvariate(0.5, 0.7), 2), 0.3),
+            "New Member": maybe("Yes", 0.97),
+            "Industry": maybe(generator.choice(SECTORS[sector]), 0.02),
+            "Payout Ratio": maybe(round(generator.uniform(0.0, 150.0), 2), 0.08),
+        }
+        rows.append(tuple(row[column] for column in TABLE_COLUMNS))
+    return rows
+
+
+def seed_database(path: str, row_count: int, seed: int = 0) -> None:
+    """
+    Creates a SQLite stand in of the dividends DB holding synthetic rows, with the single column indexes the index
+    advisor recommends so the "sql" engine gets range scans like on a tuned MySQL server
+
+    :param path: the SQLite database file, replaced if it exists
+    :param row_count: how many rows dividend_data_table gets
+    :param seed: the random seed of the rows
+    """
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("DROP TABLE IF EXISTS dividend_data_table")
+        connection.execute("DROP TABLE IF EXISTS dividend_update_times")
+        # text compares case insensitively, like under the default collations of MySQL
+        connection.execute("CREATE TABLE dividend_data_table ({})".format(", ".join(
+            "`{}` {}{}".format(column, column_type(column), " COLLATE NOCASE" if column in TEXT_COLUMNS else "")
+            for column in TABLE_COLUMNS)))
+        connection.executemany("INSERT INTO dividend_data_table VALUES ({})".format(
+            ", ".join(["?"] * len(TABLE_COLUMNS))), synthetic_rows(row_count, seed))
+        for column in FILTER_COLUMNS:
+            connection.execute(create_index_statement(column))
+        connection.execute("CREATE TABLE dividend_update_times (`name` TEXT, `time` TEXT)")
+        connection.executemany("INSERT INTO dividend_update_times VALUES (?, ?)", [
+            ("radar_file", "{} rows, seed {}".format(row_count, seed)), ("yahoo_finance", "2024-12-31 00:00:00"),
+        ])
+        connection.commit()
+    finally:
+        connection.close()
+
+
+class SqliteCursor:
+
+    def __init__(self, cursor: sqlite3.Cursor, as_dict: bool):
+        """
+            Makes a sqlite3 cursor look like a PyMySQL one, binding %s placeholders & returning dict rows if asked to.
+
+            Args:
+                cursor (sqlite3.Cursor): The cursor to wrap.
+                as_dict (bool): If to return every row as a dict of column name to value, like a DictCursor does.
+
+            Returns:
+                None
+            """
+        self._cursor = cursor
+        self._as_dict = as_dict
+
+    @property
+    def description(self) -> tuple:
+        # sqlite3 only names the columns, the dividend_data_table ones get the type codes a MySQL server would send
+        if self._cursor.description is None:
+            return None
+        descriptions = []
+        for name, *_ in self._cursor.description:
+            type_code, decimals = MYSQL_TYPES.get(name, (None, None))
+            descriptions.append((name, type_code, None, None, None, decimals, True))
+        return tuple(descriptions)
+
+    def execute(self, query: str, params: Optional[list] = None) -> None:
+        self._cursor.execute(query.replace("%s", "?"), params or ())
+
+    def _rows(self, rows: list) -> list:
+        if not self._as_dict:
+            return rows
+        columns = [description[0] for description in self._cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def fetchall(self) -> list:
+        return self._rows(self._cursor.fetchall())
+
+    def fetchmany(self, size: int) -> list:
+        return self._rows(self._cursor.fetchmany(size))
+
+    def close(self) -> None:
+        self._cursor.close()
+
+
+class SqliteConnection:
+
+    def __init__(self, path: str):
+        """
+            A connection to a SQLite database file with the parts of the PyMySQL connection API the pool & the
+            MysqlConnection queries use.
+
+            Args:
+                path (str): The SQLite database file.
+
+            Returns:
+                None
+            """
+        self._connection = sqlite3.connect(path, check_same_thread=False, detect_types=sqlite3.PARSE_DECLTYPES)
+
+    def cursor(self, cursor_class: type = pymysql.cursors.Cursor) -> SqliteCursor:
+        return SqliteCursor(self._connection.cursor(), issubclass(cursor_class, pymysql.cursors.DictCursorMixin))
+
+    def ping(self, reconnect: bool = True) -> None:
+        pass
+
+    def rollback(self) -> None:
+        self._connection.rollback()
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class SqliteMysqlConnection(MysqlConnection):
+
+    def __init__(self, db_host: str, db_port: int = 0, db_user: str = "", db_password: str = "", db_schema: str = "",
+                 pool_size: int = 3, pool_ping_interval: float = 30, pool_checkout_timeout: float = 30,
+                 pool_idle_timeout: float = 300):
+        """
+            A MysqlConnection running its (unchanged) queries on a SQLite database file through the same connection
+            pool, takes the same arguments so app.py can be pointed at it without a MySQL server.
+
+            Args:
+                db_host (str): The SQLite database file, as built by seed_database.
+                db_port (int): Ignored.
+                db_user (str): Ignored.
+                db_password (str): Ignored.
+                db_schema (str): Ignored.
+                pool_size (int): The most connections open at once.
+                pool_ping_interval (float): Seconds a connection may sit idle before it's pinged on checkout.
+                pool_checkout_timeout (float): The most seconds to wait for a connection when all of them are in use.
+                pool_idle_timeout (float): Seconds after which an idle connection is closed instead of reused.
+
+            Returns:
+                None
+            """
+        self._pool = ConnectionPool(
+            lambda: SqliteConnection(db_host), size=pool_size, ping_interval=pool_ping_interval,
+            checkout_timeout=pool_checkout_timeout, idle_timeout=pool_idle_timeout,
+        )
@@ -0,0 +1,322 @@
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import httpx
+
+from benchmarks.fake_db import SqliteMysqlConnection, seed_database, SECTORS
+from dividend_stocks_filterer.filters import DEFAULT_DISPLAY_COLUMNS, FILTER_ARGUMENT_NAMES, FILTER_PREDICATES
+
+# The /filter form values app.filter_stocks falls back to, which is what the page posts before any slider is moved
+DEFAULT_FORM = {
+    "min_streak_years": 5, "yield_range_min": 0.0, "yield_range_max": 10.0, "min_dgr": 0.0, "chowder_number": 0,
+    "price_range_min": 1.0, "price_range_max": 500.0, "fair_value": 0, "min_revenue": 0.0, "min_npm": 0.0,
+    "min_cf_per_share": 0.0, "min_roe": 0.0, "pe_range_min": -50.0, "pe_range_max": 100.0,
+    "max_price_per_book_value": 10.0, "max_debt_per_capital_value": 1.0, "max_payout_ratio": 100.0,
+}
+
+# The form fields posted as integers
+INTEGER_ARGUMENTS = ("min_streak_years", "chowder_number", "fair_value")
+
+# The column every slider moves the bound of
+SLIDER_COLUMNS = {name: column for column, _, name in reversed(FILTER_PREDICATES)}
+
+# The configuration every scenario runs with, on top of which the scenario & the --env values are set
+BASE_ENVIRONMENT = {
+    "DB_PASS": "benchmark", "DB_DRIVER": "pymysql", "DATA_POLL_INTERVAL": "3600", "SHARED_SNAPSHOT_PATH": "",
+    "PERSISTENT_SNAPSHOT_PATH": "",
+}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """
+    Picks the nearest rank percentile of some values
+
+    :param sorted_values: the values, sorted
+    :param fraction: the percentile as a fraction, e.g. 0.95 for p95
+
+    :return value: the percentile value, None if there are no values
+    """
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values), max(1, math.ceil(fraction * len(sorted_values)))) - 1]
+
+
+def slider_drag_sessions(column_bounds: dict, session_count: int, drags: int = 3, steps: int = 10,
+                         seed: int = 0) -> List[list]:
+    """
+    Builds the requests of users dragging the sliders of the page, every user loads the page then drags a few sliders
+    one after the other, posting the form at every step of every drag (like the page does while a slider moves),
+    sometimes excluding a sector or moving to another page or sort order of the results on the way
+
+    :param column_bounds: the (min, max) of every filtered column, as returned from MysqlConnection.column_bounds
+    :param session_count: how many users to build the requests of
+    :param drags: how many sliders every user drags
+    :param steps: how many requests every drag posts
+    :param seed: the random seed, the same seed always builds the same requests
+
+    :return sessions: a list of the requests of every user, as (method, path, form) tuples
+    """
+    generator = random.Random(seed)
+    sliders = [name for name in FILTER_ARGUMENT_NAMES
+               if name in SLIDER_COLUMNS and column_bounds.get(SLIDER_COLUMNS[name], (None, None))[0] is not None]
+    sessions = []
+    for _ in range(session_count):
+        form = dict(DEFAULT_FORM)
+        requests = [("GET", "/", None)]
+        for _ in range(drags):
+            name = generator.choice(sliders)
+            low, high = column_bounds[SLIDER_COLUMNS[name]]
+            start, target = form[name], low + (high - low) * generator.random()
+            for step in range(1, steps + 1):
+                value = start + (target - start) * step / steps
+                form[name] = int(round(value)) if name in INTEGER_ARGUMENTS else round(value, 2)
+                requests.append(("POST", "/filter", dict(form)))
+            if generator.random() < 0.2:
+                form["excluded_sectors"] = [generator.choice(tuple(SECTORS))]
+                requests.append(("POST", "/filter", dict(form)))
+        if generator.random() < 0.3:
+            requests.append(("POST", "/filter", dict(form, page=2)))
+        if generator.random() < 0.3:
+            sort_by = generator.choice(DEFAULT_DISPLAY_COLUMNS)
+            requests.append(("POST", "/filter", dict(form, sort_by=sort_by, sort_dir=generator.choice(("asc", "desc")))))
+        sessions.append(requests)
+    return sessions
+
+
+def resident_mb() -> float:
+    """
+    Reads how much memory the process currently has resident, falling back to its peak on systems without /proc
+
+    :return resident_mb: the resident set size in MiB
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return peak_resident_mb()
+
+
+def peak_resident_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+
+
+async def drive(app, sessions: List[list], concurrency: int, warmup: int) -> dict:
+    """
+    Plays sessions against the app in process, concurrency users at a time, each user with its own cookies
+
+    :param app: the ASGI app, its lifespan is run around the sessions
+    :param sessions: the requests of every user, as returned from slider_drag_sessions
+    :param concurrency: how many users send requests at once
+    :param warmup: how many of the first sessions are played (one at a time) without being measured
+
+    :return measurements: the latency of every request by path, the error count & the measured wall clock seconds
+    """
+    latencies = {}
+    errors = 0
+    queue = asyncio.Queue()
+    for session in sessions[warmup:]:
+        queue.put_nowait(session)
+
+    async def play(session: list, record: bool) -> None:
+        nonlocal errors
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+            for method, path, form in session:
+                started = time.perf_counter()
+                response = await client.request(method, path, data=form)
+                elapsed = time.perf_counter() - started
+                if record:
+                    latencies.setdefault(path, []).append(elapsed)
+                    errors += response.status_code != 200
+
+    async def user() -> None:
+        while not queue.empty():
+            await play(queue.get_nowait(), True)
+
+    for session in sessions[:warmup]:
+        await play(session, False)
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return {"latencies": latencies, "errors": errors, "seconds": time.perf_counter() - started}
+
+
+def run_scenario(scenario: dict) -> dict:
+    """
+    Boots app.py on the SQLite stand in of the DB & plays a scenario against it, meant to run in a fresh process as it
+    configures the app through the environment & swaps the MysqlConnection it uses
+
+    :param scenario: the "engine", "rows", "database", "environment", "sessions", "concurrency" & "warmup" of the run
+
+    :return result: the scenario along with its latency percentiles, throughput & memory use
+    """
+    os.environ.update(BASE_ENVIRONMENT)
+    os.environ.update({"DB_HOST": scenario["database"], "FILTER_ENGINE": scenario["engine"]})
+    os.environ.update(scenario["environment"])
+    from dividend_stocks_filterer import db_functions
+    db_functions.MysqlConnection = SqliteMysqlConnection
+    from dividend_stocks_filterer import app as app_module
+
+    async def boot_and_drive() -> dict:
+        started = time.perf_counter()
+        async with app_module.app.router.lifespan_context(app_module.app):
+            startup_seconds = time.perf_counter() - started
+            rss_mb = resident_mb()
+            measurements = await drive(app_module.app, scenario["sessions"], scenario["concurrency"],
+                                       scenario["warmup"])
+        return dict(measurements, startup_seconds=startup_seconds, rss_mb=rss_mb)
+
+    measurements = asyncio.run(boot_and_drive())
+    requests = sum(len(latencies) for latencies in measurements["latencies"].values())
+    latency_ms = {}
+    for path, latencies in sorted(measurements["latencies"].items()):
+        latencies.sort()
+        latency_ms[path] = {name: round(percentile(latencies, fraction) * 1000, 3)
+                            for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))}
+    return {
+        "engine": scenario["engine"], "rows": scenario["rows"], "environment": scenario["environment"],
+        "requests": requests, "errors": measurements["errors"],
+        "rps": round(requests / measurements["seconds"], 1) if measurements["seconds"] else None,
+        "latency_ms": latency_ms, "startup_seconds": round(measurements["startup_seconds"], 3),
+        "rss_mb": round(measurements["rss_mb"], 1), "peak_rss_mb": round(peak_resident_mb(), 1),
+    }
+
+
+def seeded_database(data_dir: str, rows: int, seed: int) -> str:
+    """
+    Returns the SQLite stand in of the DB holding a number of synthetic rows, seeding it only if it wasn't before
+
+    :param data_dir: the folder the seeded databases are kept in
+    :param rows: how many rows dividend_data_table holds
+    :param seed: the random seed of the rows
+
+    :return path: the SQLite database file
+    """
+    path = os.path.join(data_dir, "dividend_data_{}_{}.sqlite".format(rows, seed))
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        print("seeding {} rows into {}".format(rows, path))
+        temporary_path = "{}.{}.tmp".format(path, os.getpid())
+        seed_database(temporary_path, rows, seed)
+        os.replace(temporary_path, path)
+    return path
+
+
+def run_scenarios(scenarios: List[dict]) -> List[dict]:
+    """
+    Runs every scenario in a process of its own so it starts from a cold app & its memory use is its own
+
+    :param scenarios: the scenarios, see run_scenario
+
+    :return results: the result of every scenario, in order
+    """
+    results = []
+    for scenario in scenarios:
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results.append(executor.submit(run_scenario, scenario).result())
+    return results
+
+
+def scenario_name(result: dict) -> str:
+    name = "{}/{}".format(result["engine"], result["rows"])
+    if result.get("environment"):
+        name += " " + ",".join("{}={}".format(key, value) for key, value in sorted(result["environment"].items()))
+    return name
+
+
+def compare_results(results: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    """
+    Compares results with a saved baseline, flagging the scenarios whose /filter p95 latency grew or whose throughput
+    dropped by more than the tolerance
+
+    :param results: the results of this run
+    :param baseline: the results of the baseline run
+    :param tolerance: the allowed relative change, e.g. 0.2 for 20%
+
+    :return regressions: a line describing every regression, empty if there are none
+    """
+    baseline_by_name = {scenario_name(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        before = baseline_by_name.get(scenario_name(result))
+        if before is None:
+            continue
+        p95 = result["latency_ms"].get("/filter", {}).get("p95")
+        p95_before = before["latency_ms"].get("/filter", {}).get("p95")
+        if p95 is not None and p95_before and p95 > p95_before * (1 + tolerance):
+            regressions.append("{}: /filter p95 {} ms -> {} ms".format(scenario_name(result), p95_before, p95))
+        if result["rps"] is not None and before["rps"] and result["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append("{}: {} -> {} requests/s".format(scenario_name(result), before["rps"], result["rps"]))
+    return regressions
+
+
+def report_line(result: dict) -> str:
+    latencies = " ".join("{} p50/p95/p99 {}/{}/{} ms".format(path, values["p50"], values["p95"], values["p99"])
+                         for path, values in result["latency_ms"].items())
+    return "{}: {} requests, {} errors, {} requests/s, {}, startup {} s, rss {} MiB (peak {} MiB)".format(
+        scenario_name(result), result["requests"], result["errors"], result["rps"], latencies,
+        result["startup_seconds"], result["rss_mb"], result["peak_rss_mb"])
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Drives app.py, on a SQLite stand in of the DB seeded with synthetic "
+                                                 "rows, with slider dragging traffic & reports the latency, "
+                                                 "throughput & memory use of every scenario")
+    parser.add_argument("--rows", default="5000,50000,500000", help="comma separated dividend_data_table sizes")
+    parser.add_argument("--engines", default="memory,sql", help="comma separated FILTER_ENGINE values")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                        help="extra configuration every scenario runs with, e.g. RESULT_CACHE_MAX_ROWS=0")
+    parser.add_argument("--users", type=int, default=100, help="how many users drag sliders in every scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="how many users send requests at once")
+    parser.add_argument("--drags", type=int, default=3, help="how many sliders every user drags")
+    parser.add_argument("--steps", type=int, default=10, help="how many requests every drag posts")
+    parser.add_argument("--warmup", type=int, default=5, help="how many users play before measuring starts")
+    parser.add_argument("--seed", type=int, default=0, help="the random seed of the rows & the traffic")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "divifilter-benchmarks"),
+                        help="where the seeded SQLite databases are kept between runs")
+    parser.add_argument("--save", help="write the results as JSON to this file, e.g. to keep them as a baseline")
+    parser.add_argument("--compare", help="compare the results with a baseline saved by --save")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="relative /filter p95 growth or throughput drop flagged as a regression")
+    args = parser.parse_args(argv)
+
+    environment = dict(value.split("=", 1) for value in args.env)
+    scenarios = []
+    for rows in (int(rows) for rows in args.rows.split(",")):
+        database = seeded_database(args.data_dir, rows, args.seed)
+        sessions = slider_drag_sessions(SqliteMysqlConnection(database).column_bounds(), args.users + args.warmup,
+                                        args.drags, args.steps, args.seed)
+        for engine in args.engines.split(","):
+            scenarios.append({"engine": engine, "rows": rows, "database": database, "environment": environment,
+                              "sessions": sessions, "concurrency": args.concurrency, "warmup": args.warmup})
+
+    results = []
+    for scenario in scenarios:
+        results.extend(run_scenarios([scenario]))
+        print(report_line(results[-1]))
+
+    if args.save:
+        with open(args.save, "w") as results_file:
+            json.dump(results, results_file, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare_results(results, json.load(baseline_file), args.tolerance)
+        for line in regressions:
+            print("regression: " + line)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
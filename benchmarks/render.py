@@ -0,0 +1,216 @@
+import argparse
+import json
+import statistics
+import sys
+import timeit
+import tracemalloc
+from typing import Callable, List, Optional
+
+from benchmarks.fake_db import synthetic_rows
+from dividend_stocks_filterer.filters import DEFAULT_DISPLAY_COLUMNS, TABLE_COLUMNS, ResultRows
+from dividend_stocks_filterer.helper_functions import radar_dict_to_table
+from dividend_stocks_filterer.table_renderer import render_table
+
+# The column sets the results are rendered with, by name
+COLUMN_SETS = {
+    "narrow": ("Symbol", "Price", "Div Yield", "No Years"),
+    "default": DEFAULT_DISPLAY_COLUMNS,
+    "all": TABLE_COLUMNS,
+}
+
+
+def pandas_renderer(results: ResultRows) -> str:
+    """
+    Renders results the way the app used to, building a DataFrame out of the rows keyed by Symbol & calling to_html
+    on it, the reference every other renderer has to match byte for byte
+    """
+    table = radar_dict_to_table(results.as_dict())
+    return table.to_html(classes="table table-striped table-hover table-sm", border=0, index=True)
+
+
+def table_renderer(results: ResultRows) -> str:
+    return "".join(render_table(results))
+
+
+# Every renderer benchmarked, by name, the first one is the reference the others are checked against
+RENDERERS = {
+    "pandas": pandas_renderer,
+    "render_table": table_renderer,
+}
+
+
+def benchmark_results(row_count: int, columns: tuple, seed: int = 0) -> ResultRows:
+    """
+    Builds filter results out of synthetic rows, as the filter engines return them
+
+    :param row_count: how many rows the results hold
+    :param columns: the columns of the results, must include Symbol
+    :param seed: the random seed of the rows
+
+    :return results: the results
+    """
+    positions = [TABLE_COLUMNS.index(column) for column in columns]
+    return ResultRows(columns, [tuple(row[position] for position in positions)
+                                for row in synthetic_rows(row_count, seed)])
+
+
+def first_difference(expected: str, actual: str) -> Optional[int]:
+    """
+    Finds where two renders of the same results stop matching
+
+    :param expected: the reference render
+    :param actual: the render checked against it
+
+    :return position: the offset of the first differing character, None if the renders are the same
+    """
+    if expected == actual:
+        return None
+    for position, (expected_character, actual_character) in enumerate(zip(expected, actual)):
+        if expected_character != actual_character:
+            return position
+    return min(len(expected), len(actual))
+
+
+def time_renderer(renderer: Callable, results: ResultRows, repeat: int) -> List[float]:
+    """
+    Times a renderer the way timeit does, running it enough times in a row for every measurement to take at least
+    0.2 seconds
+
+    :param renderer: the renderer
+    :param results: the results to render
+    :param repeat: how many measurements to take
+
+    :return seconds: the seconds a single render took in every measurement
+    """
+    timer = timeit.Timer(lambda: renderer(results))
+    number, _ = timer.autorange()
+    return [seconds / number for seconds in timer.repeat(repeat, number)]
+
+
+def peak_allocation(renderer: Callable, results: ResultRows) -> int:
+    """
+    Measures the most memory a single render has allocated at once, with tracemalloc
+
+    :param renderer: the renderer
+    :param results: the results to render
+
+    :return peak_bytes: the peak of the memory allocated while rendering, over what was allocated before it started
+    """
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        renderer(results)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - baseline
+
+
+def run_benchmarks(row_counts: List[int], column_sets: List[str], renderers: List[str], repeat: int = 5,
+                   seed: int = 0) -> List[dict]:
+    """
+    Renders results of every size & column set with every renderer, checking every render against the one of the
+    reference renderer (the first one of RENDERERS)
+
+    :param row_counts: the result sizes
+    :param column_sets: the names of the column sets, keys of COLUMN_SETS
+    :param renderers: the names of the renderers, keys of RENDERERS
+    :param repeat: how many timing measurements to take of every render
+    :param seed: the random seed of the rows
+
+    :return benchmarks: the renderer, rows & columns of every render along with its median & best milliseconds, peak
+        allocated KiB, output KiB & the first character it differs from the reference render at (None if it doesn't)
+    """
+    reference_name = next(iter(RENDERERS))
+    benchmarks = []
+    for row_count in row_counts:
+        for column_set in column_sets:
+            results = benchmark_results(row_count, COLUMN_SETS[column_set], seed)
+            reference = RENDERERS[reference_name](results)
+            for name in renderers:
+                output = RENDERERS[name](results)
+                seconds = time_renderer(RENDERERS[name], results, repeat)
+                benchmarks.append({
+                    "renderer": name, "rows": row_count, "columns": column_set,
+                    "median_ms": round(statistics.median(seconds) * 1000, 3), "best_ms": round(min(seconds) * 1000, 3),
+                    "peak_kib": round(peak_allocation(RENDERERS[name], results) / 2 ** 10, 1),
+                    "output_kib": round(len(output.encode("utf-8")) / 2 ** 10, 1),
+                    "first_difference": first_difference(reference, output),
+                })
+    return benchmarks
+
+
+def benchmark_name(benchmark: dict) -> str:
+    return "{} {} rows x {} columns".format(benchmark["renderer"], benchmark["rows"], benchmark["columns"])
+
+
+def compare_benchmarks(benchmarks: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    """
+    Compares benchmarks with a saved baseline, flagging the renders whose median time or peak allocation grew by more
+    than the tolerance
+
+    :param benchmarks: the benchmarks of this run
+    :param baseline: the benchmarks of the baseline run
+    :param tolerance: the allowed relative growth, e.g. 0.2 for 20%
+
+    :return regressions: a line describing every regression, empty if there are none
+    """
+    baseline_by_name = {benchmark_name(benchmark): benchmark for benchmark in baseline}
+    regressions = []
+    for benchmark in benchmarks:
+        before = baseline_by_name.get(benchmark_name(benchmark))
+        if before is None:
+            continue
+        for key, unit in (("median_ms", "ms"), ("peak_kib", "KiB")):
+            if before[key] and benchmark[key] > before[key] * (1 + tolerance):
+                regressions.append("{}: {} {} {} -> {} {}".format(
+                    benchmark_name(benchmark), key, before[key], unit, benchmark[key], unit))
+    return regressions
+
+
+def report_line(benchmark: dict) -> str:
+    line = "{}: median {} ms, best {} ms, peak {} KiB allocated, {} KiB of HTML".format(
+        benchmark_name(benchmark), benchmark["median_ms"], benchmark["best_ms"], benchmark["peak_kib"],
+        benchmark["output_kib"])
+    if benchmark["first_difference"] is not None:
+        line += ", DIFFERS from the reference at character {}".format(benchmark["first_difference"])
+    return line
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Times the results table renderers & tracks their allocations on "
+                                                 "synthetic rows, checking every renderer matches the pandas one byte "
+                                                 "for byte")
+    parser.add_argument("--rows", default="25,100,500,5000", help="comma separated result sizes")
+    parser.add_argument("--columns", default=",".join(COLUMN_SETS),
+                        help="comma separated column sets, any of " + ", ".join(COLUMN_SETS))
+    parser.add_argument("--renderers", default=",".join(RENDERERS),
+                        help="comma separated renderers, any of " + ", ".join(RENDERERS))
+    parser.add_argument("--repeat", type=int, default=5, help="how many timing measurements to take of every render")
+    parser.add_argument("--seed", type=int, default=0, help="the random seed of the rows")
+    parser.add_argument("--save", help="write the results as JSON to this file, e.g. to keep them as a baseline")
+    parser.add_argument("--compare", help="compare the results with a baseline saved by --save")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="relative median time or peak allocation growth flagged as a regression")
+    args = parser.parse_args(argv)
+
+    benchmarks = run_benchmarks([int(rows) for rows in args.rows.split(",")], args.columns.split(","),
+                                args.renderers.split(","), args.repeat, args.seed)
+    for benchmark in benchmarks:
+        print(report_line(benchmark))
+
+    if args.save:
+        with open(args.save, "w") as results_file:
+            json.dump(benchmarks, results_file, indent=2)
+    failed = any(benchmark["first_difference"] is not None for benchmark in benchmarks)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare_benchmarks(benchmarks, json.load(baseline_file), args.tolerance)
+        for line in regressions:
+            print("regression: " + line)
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
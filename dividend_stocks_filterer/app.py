@@ -1,79 +1,425 @@
 import os
-import sys
-sys.path.insert(0, os.path.dirname(__file__))
+import asyncio
+import secrets
+import weakref
+import numpy as np
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Form
 from fastapi.concurrency import run_in_threadpool
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from typing import List
+from typing import Iterator, List, Optional
 
-from configure import read_configurations
-from db_functions import MysqlConnection
-from helper_functions import radar_dict_to_table
+from .async_db_functions import AsyncMysqlConnection
+from .caches import LRUCache, RenderedFragment, SingleFlight
+from .configure import read_configurations
+from .data_watcher import DataVersionWatcher, VersionedValue
+from .db_functions import MysqlConnection
+from .filters import FILTER_EXCLUSIONS, PAGE_SIZES, TABLE_COLUMNS, PageRequest, ResultPage, canonical_filter_args, \
+    column_list, narrows, page_request, projection, prune_filter_args
+from .snapshot import TableSnapshot
+from .snapshot_store import SnapshotStore
+from .table_renderer import render_batches, render_table
+from .timing import ServerTimingMiddleware, span, timed
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if await warm_start():
+        # serve the stored snapshot right away and catch up with the DB in the background
+        watcher_task = asyncio.create_task(watcher.run(check_first=True))
+    else:
+        try:
+            await watcher.check()
+        except Exception as error:
+            print("failed loading the initial data version, will retry in the background: {}".format(error))
+        watcher_task = asyncio.create_task(watcher.run())
+    yield
+    watcher_task.cancel()
+    if async_db is not None:
+        await async_db.close()
+
+
+app = FastAPI(lifespan=lifespan)
 templates = Jinja2Templates(
     directory=os.path.join(os.path.dirname(__file__), "templates")
 )
 
 # --- One-time startup (mirrors ui.py) ---
 configuration = read_configurations()
+if configuration["server_timing"] or configuration["server_timing_log"]:
+    app.add_middleware(ServerTimingMiddleware, header=configuration["server_timing"],
+                       log=configuration["server_timing_log"])
 db = MysqlConnection(
     db_host=configuration["db_host"], db_schema=configuration["db_schema"],
     db_password=configuration["db_pass"], db_port=configuration["db_port"],
-    db_user=configuration["db_user"]
+    db_user=configuration["db_user"], pool_size=configuration["db_pool_size"],
+    pool_ping_interval=configuration["db_pool_ping_interval"],
+    pool_checkout_timeout=configuration["db_pool_checkout_timeout"],
+    pool_idle_timeout=configuration["db_pool_idle_timeout"]
+)
+# Only set with the "aiomysql" DB driver, runs the request path queries on the event loop instead of in threads
+async_db = AsyncMysqlConnection(
+    db_host=configuration["db_host"], db_schema=configuration["db_schema"],
+    db_password=configuration["db_pass"], db_port=configuration["db_port"],
+    db_user=configuration["db_user"], pool_size=configuration["db_async_pool_size"]
+) if configuration["db_driver"] == "aiomysql" else None
+
+
+async def db_call(method: str, *args, **kwargs):
+    """
+    Runs a MysqlConnection query method without blocking the event loop, on the async connection when the aiomysql DB
+    driver is configured and it has the method, otherwise on the PyMySQL connection in the thread pool
+
+    :param method: the name of the query method
+    :param args: the positional arguments of the query method
+    :param kwargs: the keyword arguments of the query method
+
+    :return result: what the query method returned
+    """
+    if async_db is not None and hasattr(async_db, method):
+        return await getattr(async_db, method)(*args, **kwargs)
+    return await run_in_threadpool(getattr(db, method), *args, **kwargs)
+
+
+def load_ranges(table: TableSnapshot) -> dict:
+    """
+    Derives the slider bounds and the symbol/sector/industry exclusion options from a snapshot of the table, so a
+    worker boots off a single table scan instead of an aggregate query plus one DISTINCT query per exclusion list
+
+    :param table: a snapshot of the current dividend_data_table
+
+    :return ranges: a dict of everything index.html needs to build the filter form
+    """
+    _raw = table.min_max_all_values()
+    return {
+        # Dividend section
+        "streak_default": 5,
+        "yield_max": min(max(_raw['yield_max_raw'], _raw['5y_yield_max']), 25.0),
+        "dgr_min": max(min(_raw['dgr1y_min'], _raw['dgr3y_min'], _raw['dgr5y_min'], _raw['dgr10y_min']), -25.0),
+        "dgr_max": min(max(_raw['dgr1y_max'], _raw['dgr3y_max'], _raw['dgr5y_max'], _raw['dgr10y_max']), 25.0),
+        "chowder_max": int(min(_raw['chowder_max_raw'], 25.0)),
+        # Financial section
+        "price_max": _raw['price_max_raw'],
+        "fv_min": int(max(_raw['fv_min_raw'], -25.0)),
+        "fv_max": int(max(_raw['fv_max_raw'], 0.0)),
+        "revenue_min": _raw['revenue_min'],
+        "revenue_max": _raw['revenue_max'],
+        "npm_min": _raw['npm_min'],
+        "npm_max": _raw['npm_max'],
+        "cf_min": _raw['cf_min'],
+        "cf_max": _raw['cf_max'],
+        "roe_min": _raw['roe_min'],
+        "roe_max": _raw['roe_max'],
+        "pe_min": max(_raw['pe_min_raw'], -50.0),
+        "pe_max": min(_raw['pe_max_raw'], 100.0),
+        "pbv_min": _raw['pbv_min'],
+        "pbv_max": _raw['pbv_max'],
+        "debt_max": _raw['debt_max_raw'],
+        "payout_max": float(_raw['payout_ratio_max_raw']) if _raw['payout_ratio_max_raw'] is not None else 100.0,
+        # Exclusion options
+        "symbols": table.distinct_values("Symbol"),
+        "sectors": table.distinct_values("Sector"),
+        "industries": table.distinct_values("Industry"),
+        # True bounds of every filtered column, used by the "memory" engine to drop predicates that can't exclude any row
+        "column_bounds": table.column_bounds(),
+        # Every value of the exclusion columns, used by the "memory" engine to drop excluded values no row has
+        "exclusion_values": {column: frozenset(table.distinct_values(column)) for column, _ in FILTER_EXCLUSIONS},
+    }
+
+
+# Slider bounds of the current data version, swapped as a whole whenever the data changes
+ranges = None
+
+# The columns the results table shows when the request didn't pick any
+display_columns = projection(column_list(configuration["display_columns"]))
+
+# Results of recent filter requests keyed on (data version, canonical filter arguments, page request, projection),
+# weighted by their row count
+result_cache = LRUCache(configuration["result_cache_max_rows"], weigh=lambda results: len(results.rows) + 1)
+# Rendered /filter responses keyed the same way as result_cache, weighted by their size in bytes
+fragment_cache = LRUCache(configuration["fragment_cache_max_bytes"], weigh=lambda fragment: fragment.size)
+# Filter requests being run keyed the same way as result_cache, identical concurrent requests share one run
+filter_flights = SingleFlight()
+
+# The last (snapshot, filter arguments, matching row positions) the "memory" engine computed for every session, so a
+# request narrowing the previous one (a slider being dragged inwards) only has to check the rows that matched it, the
+# positions only index the snapshot they were taken on, held by a weak reference so a memo doesn't keep it alive
+session_results = LRUCache(configuration["session_memo_max_rows"], weigh=lambda memo: len(memo[2]) + 1)
+SESSION_COOKIE = "divifilter_session"
+
+# In memory copy of dividend_data_table used by the "memory" filter engine tagged with its data version, swapped as a
+# whole whenever the data changes
+snapshot = None
+
+# Snapshot file shared by the workers of this host so only one of them reads the table per data version, with a copy
+# on disk a restarted container boots from
+snapshot_store = SnapshotStore(
+    configuration["shared_snapshot_path"] or configuration["persistent_snapshot_path"],
+    configuration["persistent_snapshot_path"] or None
+) if configuration["shared_snapshot_path"] or configuration["persistent_snapshot_path"] else None
+
+
+def read_snapshot(db_update_dates: dict) -> TableSnapshot:
+    """
+    Reads the whole dividend_data_table from the DB into a new in memory snapshot
+
+    :param db_update_dates: the dividend_update_times the snapshot is taken at
+
+    :return snapshot: the new snapshot
+    """
+    columns, rows = db.fetch_dividend_table()
+    return TableSnapshot(columns, rows, db_update_dates)
+
+
+def load_snapshot(db_update_dates: dict) -> TableSnapshot:
+    """
+    Returns the snapshot of the given data version, from the shared snapshot file when one is configured
+
+    :param db_update_dates: the dividend_update_times the snapshot is taken at
+
+    :return snapshot: the snapshot
+    """
+    if snapshot_store is None:
+        return read_snapshot(db_update_dates)
+    return snapshot_store.load_or_build(db_update_dates, lambda: read_snapshot(db_update_dates))
+
+
+async def on_data_change(version: int, db_update_dates: dict) -> None:
+    """
+    Refreshes everything derived from the DB data once the watcher sees a new version of it
+
+    :param version: the new data version
+    :param db_update_dates: the new dividend_update_times
+    """
+    global ranges, snapshot
+    table = await run_in_threadpool(load_snapshot, db_update_dates)
+    ranges = VersionedValue(version, await run_in_threadpool(load_ranges, table))
+    # the scan the ranges came from doubles as the snapshot of the "memory" engine, the "sql" engine lets it go
+    snapshot = VersionedValue(version, table) if configuration["filter_engine"] == "memory" else None
+    result_cache.clear()
+    fragment_cache.clear()
+
+
+watcher = DataVersionWatcher(
+    lambda: db_call("check_db_update_dates"), poll_interval=configuration["data_poll_interval"]
 )
+watcher.subscribe(on_data_change)
+
+
+async def warm_start() -> bool:
+    """
+    Publishes the data version of the stored snapshot, if there is one, without waiting on the DB
+
+    :return started: True if a stored snapshot is now served, False if the DB has to be checked first
+    """
+    if snapshot_store is None:
+        return False
+    try:
+        update_dates = await run_in_threadpool(snapshot_store.latest_update_dates)
+        if update_dates is None:
+            return False
+        await watcher.publish(update_dates)
+        return True
+    except Exception as error:
+        print("failed starting from the stored snapshot, checking the DB instead: {}".format(error))
+        return False
+
+
+async def current_update_dates() -> dict:
+    """
+    Returns the dividend_update_times of the current data version, checking the DB if no version was loaded yet
+    """
+    if watcher.update_dates is None:
+        await watcher.check()
+    return watcher.update_dates
+
+
+async def current_ranges() -> dict:
+    """
+    Returns the slider bounds of the current data version, loading them from the DB if no version was loaded yet
+    """
+    await current_update_dates()
+    return ranges.value
 
-_raw = db.min_max_all_values()
-ranges = {
-    # Dividend section
-    "streak_default": 5,
-    "yield_max": min(max(_raw['yield_max_raw'], _raw['5y_yield_max']), 25.0),
-    "dgr_min": max(min(_raw['dgr1y_min'], _raw['dgr3y_min'], _raw['dgr5y_min'], _raw['dgr10y_min']), -25.0),
-    "dgr_max": min(max(_raw['dgr1y_max'], _raw['dgr3y_max'], _raw['dgr5y_max'], _raw['dgr10y_max']), 25.0),
-    "chowder_max": int(min(_raw['chowder_max_raw'], 25.0)),
-    # Financial section
-    "price_max": _raw['price_max_raw'],
-    "fv_min": int(max(_raw['fv_min_raw'], -25.0)),
-    "fv_max": int(max(_raw['fv_max_raw'], 0.0)),
-    "revenue_min": _raw['revenue_min'],
-    "revenue_max": _raw['revenue_max'],
-    "npm_min": _raw['npm_min'],
-    "npm_max": _raw['npm_max'],
-    "cf_min": _raw['cf_min'],
-    "cf_max": _raw['cf_max'],
-    "roe_min": _raw['roe_min'],
-    "roe_max": _raw['roe_max'],
-    "pe_min": max(_raw['pe_min_raw'], -50.0),
-    "pe_max": min(_raw['pe_max_raw'], 100.0),
-    "pbv_min": _raw['pbv_min'],
-    "pbv_max": _raw['pbv_max'],
-    "debt_max": _raw['debt_max_raw'],
-    "payout_max": float(_raw['payout_ratio_max_raw']) if _raw['payout_ratio_max_raw'] is not None else 100.0,
-    # Exclusion options
-    "symbols": db.list_values_of_key_in_db("Symbol"),
-    "sectors": db.list_values_of_key_in_db("Sector"),
-    "industries": db.list_values_of_key_in_db("Industry"),
-}
+
+async def current_snapshot() -> VersionedValue:
+    """
+    Returns the in memory snapshot of the current data version along with that version, loading it from the DB if it's
+    missing
+    """
+    global snapshot
+    db_update_dates = await current_update_dates()
+    if snapshot is None:
+        version = watcher.version
+        snapshot = VersionedValue(version, await run_in_threadpool(load_snapshot, db_update_dates))
+    return snapshot
+
+
+def narrowed_rows(session_id: Optional[str], table: TableSnapshot, filter_args: tuple):
+    """
+    Looks up the rows a filter request can be narrowed down from
+
+    :param session_id: the session the request came from, None if it has none
+    :param table: the snapshot the request runs on
+    :param filter_args: the canonical filter arguments of the request
+
+    :return rows: the positions of the rows the previous request of the session matched, None if the request doesn't
+        narrow it (or there's no previous request on the same snapshot)
+    """
+    memo = session_results.get(session_id) if session_id is not None else None
+    if memo is None:
+        return None
+    memo_table, memo_args, rows = memo
+    # positions taken on another snapshot (e.g. one the data changed from mid request) don't index this one
+    if memo_table() is not table or not narrows(filter_args, memo_args):
+        return None
+    return rows
+
+
+async def filter_results(cache_key: tuple, session_id: Optional[str] = None,
+                         table: Optional[VersionedValue] = None) -> ResultPage:
+    """
+    Runs a filter request on the configured filter engine, going through the result cache
+
+    :param cache_key: the (data version, canonical filter arguments, page request, projection) of the request
+    :param session_id: the session the request came from, lets the "memory" engine refilter its previous results
+    :param table: the versioned snapshot the "memory" engine runs the request on, captured when the request started so
+        it matches the data version of cache_key, None uses the current one
+
+    :return results: the requested page of matching rows along with the total number of matching rows
+    """
+    results = result_cache.get(cache_key)
+    if results is None:
+        results = await filter_flights.do(cache_key, lambda: run_filter(cache_key, session_id, table))
+    return results
+
+
+async def run_filter(cache_key: tuple, session_id: Optional[str] = None,
+                     table: Optional[VersionedValue] = None) -> ResultPage:
+    """
+    Runs a filter request on the configured filter engine and caches its results, see filter_results
+    """
+    version, filter_args, requested_page, columns = cache_key
+    if configuration["filter_engine"] == "memory":
+        table = (table or await current_snapshot()).value
+        with span("filter"):
+            mask = table.filter_mask(*filter_args, within=narrowed_rows(session_id, table, filter_args))
+        if session_id is not None:
+            session_results.set(session_id, (weakref.ref(table), filter_args, np.flatnonzero(mask)))
+        with span("rows"):
+            results = table.page(mask, requested_page, columns)
+    else:
+        total = await db_call("count_filter_query", *filter_args)
+        requested_page = requested_page.clamp(total)
+        rows = await db_call(
+            "run_filter_query", *filter_args, sort_by=requested_page.sort_by,
+            descending=requested_page.descending, limit=requested_page.page_size, offset=requested_page.offset,
+            columns=columns
+        )
+        results = ResultPage(rows, total, requested_page)
+    result_cache.set(cache_key, results)
+    return results
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Tells if a client takes a gzip encoded response, going by the q-value its Accept-Encoding header gives gzip (or
+    x-gzip, or * when neither is listed), a q-value of 0 refusing it
+
+    :param accept_encoding: the Accept-Encoding header of the request, e.g. "gzip;q=1.0, br, *;q=0"
+
+    :return accepted: True if gzip gets a q-value above 0
+    """
+    qualities = {}
+    for coding in accept_encoding.split(","):
+        name, *parameters = coding.split(";")
+        quality = 1.0
+        for parameter in parameters:
+            key, _, value = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    for name in ("gzip", "x-gzip", "*"):
+        if name in qualities:
+            return qualities[name] > 0
+    return False
+
+
+def fragment_response(request: Request, fragment: RenderedFragment) -> Response:
+    """
+    Sends a rendered fragment, using its pre compressed copy when the client accepts gzip
+
+    :param request: the request being answered
+    :param fragment: the rendered fragment to send
+
+    :return response: the HTML response
+    """
+    if fragment.gzipped is not None and accepts_gzip(request.headers.get("accept-encoding", "")):
+        return HTMLResponse(fragment.gzipped, headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+    return HTMLResponse(fragment.body, headers={"Vary": "Accept-Encoding"})
+
+
+def stream_and_cache(cache_key: tuple, chunks: Iterator[str]) -> Iterator[bytes]:
+    """
+    Streams rendered chunks to the client while collecting them, once the whole body was sent it goes into the fragment
+    cache (unless it's too big to fit in it or the client went away mid stream)
+
+    :param cache_key: the (data version, canonical filter arguments) the body is cached under
+    :param chunks: the rendered body
+
+    :return encoded_chunks: the body, encoded
+    """
+    body = []
+    size = 0
+    for chunk in chunks:
+        encoded_chunk = chunk.encode("utf-8")
+        if body is not None:
+            size += len(encoded_chunk)
+            if size <= fragment_cache.max_weight:
+                body.append(encoded_chunk)
+            else:
+                body = None
+        yield encoded_chunk
+    if body is not None:
+        fragment_cache.set(cache_key, RenderedFragment.from_body(b"".join(body), configuration["fragment_cache_gzip"]))
 
 
 @app.get("/health")
 async def health():
     try:
-        await run_in_threadpool(db.run_sql_query, "SELECT 1")
+        await db_call("run_sql_query", "SELECT 1")
         return JSONResponse({"status": "ok"})
     except Exception:
         return JSONResponse({"status": "error"}, status_code=503)
 
 
+@app.get("/stats")
+async def stats():
+    return JSONResponse({
+        "data_version": watcher.version,
+        "result_cache": result_cache.stats(),
+        "fragment_cache": fragment_cache.stats(),
+        "filter_flights": filter_flights.stats(),
+        "db_pool": db.pool_stats(),
+        "async_db_pool": async_db.pool_stats() if async_db is not None else None,
+    })
+
+
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
-    db_update_dates = await run_in_threadpool(db.check_db_update_dates)
+    db_update_dates = await current_update_dates()
     return templates.TemplateResponse(request, "index.html", {
-        "ranges": ranges,
+        "ranges": await current_ranges(),
         "db_update_dates": db_update_dates,
         "ga_measurement_id": configuration.get("ga_measurement_id", ""),
+        "page_size": configuration["page_size"],
+        "table_columns": TABLE_COLUMNS,
+        "display_columns": display_columns,
     })
 
 
@@ -100,20 +446,111 @@ async def filter_stocks(
     excluded_symbols: List[str] = Form(default=[]),
     excluded_sectors: List[str] = Form(default=[]),
     excluded_industries: List[str] = Form(default=[]),
+    sort_by: str = Form(""),
+    sort_dir: str = Form(""),
+    page: int = Form(1),
+    page_size: int = Form(0),
+    columns: List[str] = Form(default=[]),
 ):
-    results = await run_in_threadpool(
-        db.run_filter_query,
+    await current_update_dates()
+    filter_args = canonical_filter_args((
         min_streak_years, yield_range_min, yield_range_max,
         min_dgr, chowder_number, price_range_min, price_range_max,
         fair_value, min_revenue, min_npm, min_cf_per_share, min_roe,
         pe_range_min, pe_range_max, max_price_per_book_value,
         max_debt_per_capital_value, max_payout_ratio,
         excluded_symbols, excluded_sectors, excluded_industries
+    ))
+    requested_page = page_request(sort_by, sort_dir, page, page_size, configuration["page_size"])
+    # the "memory" engine runs on the snapshot of the request start even if the data changes before its run does
+    table = await current_snapshot() if configuration["filter_engine"] == "memory" else None
+    # only the snapshot the ranges were derived from is sure to have no row a pruned predicate would filter out, the
+    # live table the "sql" engine queries can change before the watcher sees it
+    if table is not None and ranges is not None and ranges.version == table.version:
+        filter_args = prune_filter_args(filter_args, ranges.value["column_bounds"], ranges.value["exclusion_values"])
+    version = watcher.version if table is None else table.version
+    cache_key = (version, filter_args, requested_page, projection(columns, display_columns))
+    session_id = request.cookies.get(SESSION_COOKIE)
+    new_session = session_id is None and configuration["filter_engine"] == "memory" and session_results.max_weight > 0
+    if new_session:
+        session_id = secrets.token_urlsafe(16)
+    response = await filter_response(request, cache_key, session_id, table)
+    if new_session:
+        response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="lax")
+    return response
+
+
+async def filter_response(request: Request, cache_key: tuple, session_id: Optional[str],
+                          table: Optional[VersionedValue] = None) -> Response:
+    """
+    Answers a filter request from the fragment cache or by rendering its results
+
+    :param request: the request being answered
+    :param cache_key: the (data version, canonical filter arguments, page request, projection) of the request
+    :param session_id: the session the request came from, None if it has none
+    :param table: the versioned snapshot the "memory" engine runs the request on, see filter_results
+
+    :return response: the HTML response
+    """
+    fragment = fragment_cache.get(cache_key)
+    if fragment is not None:
+        return fragment_response(request, fragment)
+    if configuration["filter_engine"] != "memory" and configuration["db_stream_rows"]:
+        return await stream_filter_response(request, cache_key)
+    results = await filter_results(cache_key, session_id, table)
+    chunks = timed("template", table_fragment(timed("render", render_table(results.rows)), results.total,
+                                              len(results.rows), results.page_request))
+    return StreamingResponse(stream_and_cache(cache_key, chunks), media_type="text/html")
+
+
+async def stream_filter_response(request: Request, cache_key: tuple) -> Response:
+    """
+    Answers a filter request of the "sql" engine by rendering its page straight off an unbuffered DB cursor, batch by
+    batch, so no more than a batch of the page rows is ever held in memory, which also means they skip the result
+    cache (the rendered table still goes into the fragment cache). The whole page is read & rendered before the
+    response starts, so a DB error on any batch gets the same error response as on a buffered page instead of a cut
+    off one, and the DB connection is back in the pool before the client reads a byte of it
+
+    :param request: the request being answered
+    :param cache_key: the (data version, canonical filter arguments, page request, projection) of the request
+
+    :return response: the HTML response
+    """
+    _, filter_args, requested_page, columns = cache_key
+    total = await db_call("count_filter_query", *filter_args)
+    requested_page = requested_page.clamp(total)
+    page_rows = max(0, min(requested_page.page_size, total - requested_page.offset))
+
+    def render() -> str:
+        batches = db.stream_filter_query(
+            *filter_args, sort_by=requested_page.sort_by, descending=requested_page.descending,
+            limit=requested_page.page_size, offset=requested_page.offset, columns=columns,
+            batch_size=configuration["db_stream_batch_size"]
+        )
+        chunks = timed("template", table_fragment(timed("render", render_batches(batches)), total, page_rows,
+                                                  requested_page))
+        return "".join(chunks)
+
+    fragment = RenderedFragment.from_html(await run_in_threadpool(render), configuration["fragment_cache_gzip"])
+    fragment_cache.set(cache_key, fragment)
+    return fragment_response(request, fragment)
+
+
+def table_fragment(table_chunks: Iterator[str], row_count: int, page_rows: int,
+                   requested_page: PageRequest) -> Iterator[str]:
+    """
+    Renders the results fragment around a rendered results table
+
+    :param table_chunks: the table markup, in chunks
+    :param row_count: the total number of matching rows
+    :param page_rows: the number of rows in the table
+    :param requested_page: the page the table holds
+
+    :return chunks: the fragment markup, yielded in chunks
+    """
+    return templates.get_template("_table.html").generate(
+        table_chunks=table_chunks, row_count=row_count, page_rows=page_rows,
+        page=requested_page.page, page_count=requested_page.page_count(row_count),
+        first_row=requested_page.offset + 1, page_size=requested_page.page_size, page_sizes=PAGE_SIZES,
+        sort_by=requested_page.sort_by, sort_dir="desc" if requested_page.descending else "asc",
     )
-    df = radar_dict_to_table(results)
-    return templates.TemplateResponse(request, "_table.html", {
-        "table_html": df.to_html(
-            classes="table table-striped table-hover table-sm", border=0, index=True
-        ),
-        "row_count": len(df),
-    })
@@ -0,0 +1,153 @@
+import asyncio
+import time
+import aiomysql
+from typing import Optional
+
+from .filter_queries import build_count_query, build_filter_query
+from .filters import ResultRows
+from .timing import record, span
+
+
+class AsyncMysqlConnection:
+
+    def __init__(self, db_host: str, db_port: int, db_user: str, db_password: str, db_schema: str,
+                 pool_size: int = 10):
+        """
+            An asyncio flavour of MysqlConnection for the queries on the request path, the event loop multiplexes the
+            queries over an aiomysql pool instead of blocking a thread per query.
+
+            Args:
+                db_host (str): The hostname of the MySQL server.
+                db_port (int): The port number of the MySQL server.
+                db_user (str): The username for connecting to the MySQL server.
+                db_password (str): The password for connecting to the MySQL server.
+                db_schema (str): The name of the MySQL schema (database).
+                pool_size (int): The most connections the pool keeps open at once.
+
+            Returns:
+                None
+            """
+        # autocommit as every query is a read, aiomysql closes a connection released inside a transaction instead of
+        # returning it to the pool, which without it is every connection that ran a SELECT
+        self._pool_kwargs = dict(
+            host=db_host, port=db_port, user=db_user, password=db_password, db=db_schema,
+            connect_timeout=10, minsize=0, maxsize=pool_size, pool_recycle=3600, autocommit=True,
+        )
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+
+    async def _get_pool(self) -> aiomysql.Pool:
+        """
+        Returns the connection pool, creating it on first use as it has to be created inside the running event loop.
+
+        Returns:
+            aiomysql.Pool: The connection pool.
+        """
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    self._pool = await aiomysql.create_pool(**self._pool_kwargs)
+        return self._pool
+
+    async def close(self) -> None:
+        """
+        Closes every connection of the pool, the pool is created again if the connection is used after that.
+        """
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            pool.close()
+            await pool.wait_closed()
+
+    def pool_stats(self) -> dict:
+        """
+        Returns the connection pool counters.
+
+        Returns:
+            dict: The pool size and its checked out & idle connection counts, all 0 until the pool is created.
+        """
+        pool = self._pool
+        if pool is None:
+            return {"size": self._pool_kwargs["maxsize"], "active": 0, "idle": 0}
+        return {"size": pool.maxsize, "active": pool.size - pool.freesize, "idle": pool.freesize}
+
+    async def run_sql_query(self, sql_query: str, tuple_or_dict: str = "tuple", params: Optional[list] = None) -> list:
+        """
+        Executes a SQL query on the database.
+
+        Args:
+            sql_query (str): The SQL query to execute.
+            tuple_or_dict: a string of either "tuple" or "dict" to tell what format you want the response returned at.
+            params (Optional[list]): The values bound to the %s placeholders of the query, None if it has none.
+
+        Returns:
+            list: A list of tuples containing the query response.
+        """
+        if tuple_or_dict == "tuple":
+            cursor_class = aiomysql.Cursor
+        elif tuple_or_dict == "dict":
+            cursor_class = aiomysql.DictCursor
+        else:
+            raise ValueError
+        pool = await self._get_pool()
+        started = time.perf_counter()
+        async with pool.acquire() as conn:
+            record("db_pool", time.perf_counter() - started)
+            async with conn.cursor(cursor_class) as cur:
+                with span("db_query"):
+                    await cur.execute(sql_query, params)
+                    return list(await cur.fetchall())
+
+    async def run_rows_query(self, sql_query: str, params: Optional[list] = None) -> ResultRows:
+        """
+        Executes a SQL query on the database and returns its rows as tuples along with a single header naming them.
+
+        Args:
+            sql_query (str): The SQL query to execute.
+            params (Optional[list]): The values bound to the %s placeholders of the query, None if it has none.
+
+        Returns:
+            ResultRows: The column names of the response and its rows as tuples.
+        """
+        pool = await self._get_pool()
+        started = time.perf_counter()
+        async with pool.acquire() as conn:
+            record("db_pool", time.perf_counter() - started)
+            async with conn.cursor() as cur:
+                with span("db_query"):
+                    await cur.execute(sql_query, params)
+                    columns = [description[0] for description in cur.description]
+                    return ResultRows(columns, list(await cur.fetchall()))
+
+    async def check_db_update_dates(self) -> dict:
+        """
+            Checks the database for update dates.
+
+            Returns:
+                dict: A dictionary containing the query response.
+            """
+        return dict(await self.run_sql_query("SELECT * FROM dividend_update_times"))
+
+    async def run_filter_query(self, *filter_args, sort_by: str = "Symbol", descending: bool = False,
+                               limit: Optional[int] = None, offset: int = 0,
+                               columns: Optional[tuple] = None) -> ResultRows:
+        """
+        Run a filter query on the database, same arguments & results as MysqlConnection.run_filter_query.
+
+        Returns:
+            ResultRows: The matching rows, as tuples ordered like their column header.
+
+        Raises:
+            ValueError: If sort_by or any of the columns isn't a known column of the table.
+        """
+        filter_query, params = build_filter_query(filter_args, sort_by, descending, limit, offset, columns)
+        return await self.run_rows_query(filter_query, params)
+
+    async def count_filter_query(self, *filter_args) -> int:
+        """
+        Counts the rows a filter query matches, takes the same filter arguments as run_filter_query.
+
+        Returns:
+            int: The number of matching rows.
+        """
+        count_query, params = build_count_query(filter_args)
+        return (await self.run_sql_query(count_query, "tuple", params))[0][0]
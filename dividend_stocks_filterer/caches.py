@@ -0,0 +1,180 @@
+import asyncio
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple, Optional
+
+
+class RenderedFragment(NamedTuple):
+    """
+    A rendered HTML response body, optionally along with a pre compressed gzip copy of it
+    """
+    body: bytes
+    gzipped: Optional[bytes] = None
+
+    @classmethod
+    def from_html(cls, html: str, compress: bool = True) -> "RenderedFragment":
+        """
+        Encodes rendered HTML into a fragment ready to be sent as is.
+
+        Args:
+            html (str): The rendered HTML.
+            compress (bool): If to also keep a gzip compressed copy of the body.
+
+        Returns:
+            RenderedFragment: The encoded fragment.
+        """
+        return cls.from_body(html.encode("utf-8"), compress)
+
+    @classmethod
+    def from_body(cls, body: bytes, compress: bool = True) -> "RenderedFragment":
+        """
+        Wraps an already encoded response body into a fragment ready to be sent as is.
+
+        Args:
+            body (bytes): The UTF-8 encoded HTML.
+            compress (bool): If to also keep a gzip compressed copy of the body.
+
+        Returns:
+            RenderedFragment: The fragment.
+        """
+        return cls(body, gzip.compress(body, compresslevel=6) if compress else None)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.gzipped or b"")
+
+
+class LRUCache:
+
+    def __init__(self, max_weight: int, weigh: Callable[[Any], int] = lambda value: 1):
+        """
+            A thread safe least recently used cache bounded by the total weight of the values it holds.
+
+            Args:
+                max_weight (int): The total weight the cache may hold before evicting, 0 disables the cache.
+                weigh (Callable): Returns the weight of a value, defaults to every value weighing 1.
+
+            Returns:
+                None
+            """
+        self.max_weight = max_weight
+        self._weigh = weigh
+        self._entries = OrderedDict()
+        self._weight = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the cached value of a key and marks it as the most recently used one.
+
+        Args:
+            key (Hashable): The key to look up.
+            default (Any): What to return when the key isn't cached.
+
+        Returns:
+            Any: The cached value or default.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Caches a value, evicting the least recently used values until the cache is back under its max weight.
+
+        Args:
+            key (Hashable): The key to cache the value under.
+            value (Any): The value to cache, values heavier than the whole cache are not cached.
+        """
+        weight = self._weigh(value)
+        if weight > self.max_weight:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._weight -= self._entries.pop(key)[1]
+            self._entries[key] = (value, weight)
+            self._weight += weight
+            while self._weight > self.max_weight:
+                self._weight -= self._entries.popitem(last=False)[1][1]
+
+    def clear(self) -> None:
+        """
+        Drops every cached value, the hit & miss counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._weight = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: The number of entries, their total weight, the max weight and the hit & miss counts.
+        """
+        return {
+            "entries": len(self._entries), "weight": self._weight, "max_weight": self.max_weight,
+            "hits": self.hits, "misses": self.misses,
+        }
+
+
+class SingleFlight:
+
+    def __init__(self):
+        """
+            Coalesces concurrent identical calls, while a call of a key is in flight every other call of the same key
+            waits for it and gets its result (or exception) instead of running again.
+
+            Returns:
+                None
+            """
+        self._flights = {}
+        self.calls = 0
+        self.shared = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs a call unless a call of the same key is already in flight, in which case its outcome is shared.
+
+        Args:
+            key (Hashable): What makes two calls identical.
+            call (Callable): An async callable running the call, only invoked if no call of the key is in flight.
+
+        Returns:
+            Any: The result of the call.
+
+        Raises:
+            Exception: Whatever the call raised, raised to every caller that shared it.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            self.calls += 1
+            # a task of its own so a caller going away doesn't cancel the call for the callers sharing it
+            flight = asyncio.ensure_future(call())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda _: self._flights.pop(key, None))
+        else:
+            self.shared += 1
+        return await asyncio.shield(flight)
+
+    def stats(self) -> dict:
+        """
+        Returns the coalescing counters.
+
+        Returns:
+            dict: The number of calls in flight, the number of calls run and the number of calls that shared one.
+        """
+        return {"in_flight": len(self._flights), "calls": self.calls, "shared": self.shared}
@@ -21,5 +21,30 @@ def read_configurations(config_folder: str = "config") -> dict:
     config["db_user"] = parser.read_configuration_variable("db_user", default_value="root")
     config["db_pass"] = parser.read_configuration_variable("db_pass")
     config["db_schema"] = parser.read_configuration_variable("db_schema", default_value="defaultdb")
+    config["db_pool_size"] = parser.read_configuration_variable("db_pool_size", default_value=3)
+    config["db_pool_ping_interval"] = parser.read_configuration_variable("db_pool_ping_interval", default_value=30)
+    config["db_pool_checkout_timeout"] = parser.read_configuration_variable("db_pool_checkout_timeout",
+                                                                            default_value=30)
+    config["db_pool_idle_timeout"] = parser.read_configuration_variable("db_pool_idle_timeout", default_value=300)
+    config["db_driver"] = parser.read_configuration_variable("db_driver", default_value="pymysql")
+    config["db_async_pool_size"] = parser.read_configuration_variable("db_async_pool_size", default_value=10)
+    config["db_stream_rows"] = parser.read_configuration_variable("db_stream_rows", default_value=False)
+    config["db_stream_batch_size"] = parser.read_configuration_variable("db_stream_batch_size", default_value=50)
+    config["filter_engine"] = parser.read_configuration_variable("filter_engine", default_value="memory")
+    config["shared_snapshot_path"] = parser.read_configuration_variable("shared_snapshot_path", default_value="")
+    config["persistent_snapshot_path"] = parser.read_configuration_variable("persistent_snapshot_path",
+                                                                            default_value="")
+    config["data_poll_interval"] = parser.read_configuration_variable("data_poll_interval", default_value=60)
+    config["result_cache_max_rows"] = parser.read_configuration_variable("result_cache_max_rows",
+                                                                         default_value=100000)
+    config["session_memo_max_rows"] = parser.read_configuration_variable("session_memo_max_rows",
+                                                                         default_value=100000)
+    config["fragment_cache_max_bytes"] = parser.read_configuration_variable("fragment_cache_max_bytes",
+                                                                            default_value=33554432)
+    config["fragment_cache_gzip"] = parser.read_configuration_variable("fragment_cache_gzip", default_value=True)
+    config["page_size"] = parser.read_configuration_variable("page_size", default_value=100)
+    config["display_columns"] = parser.read_configuration_variable("display_columns", default_value="")
+    config["server_timing"] = parser.read_configuration_variable("server_timing", default_value=False)
+    config["server_timing_log"] = parser.read_configuration_variable("server_timing_log", default_value=False)
     config["ga_measurement_id"] = parser.read_configuration_variable("ga_measurement_id", default_value="")
     return config
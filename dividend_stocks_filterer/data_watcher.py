@@ -0,0 +1,98 @@
+import asyncio
+from typing import Any, Awaitable, Callable, NamedTuple
+
+
+class VersionedValue(NamedTuple):
+    """
+    A value derived from the DB data tagged with the data version it was built from, replaced as a whole on new data
+    """
+    version: int
+    value: Any
+
+
+class DataVersionWatcher:
+
+    def __init__(self, fetch_update_dates: Callable[[], Awaitable[dict]], poll_interval: float = 60):
+        """
+            Watches the dividend_update_times table and publishes a data version which goes up every time it changes.
+
+            Args:
+                fetch_update_dates (Callable): An async callable returning the current dividend_update_times as a dict.
+                poll_interval (float): How many seconds to wait between checks when running in the background.
+
+            Returns:
+                None
+            """
+        self._fetch_update_dates = fetch_update_dates
+        self.poll_interval = poll_interval
+        self.version = 0
+        self.update_dates = None
+        self._listeners = []
+        self._lock = asyncio.Lock()
+
+    def subscribe(self, listener: Callable[[int, dict], Awaitable[None]]) -> None:
+        """
+        Registers an async callable that is awaited with (new version, new update dates) whenever the data changes, the
+        new version is only published after every listener finished successfully
+
+        Args:
+            listener (Callable): The async callable to register.
+        """
+        self._listeners.append(listener)
+
+    async def check(self) -> bool:
+        """
+        Checks the DB once for new data and publishes a new version if dividend_update_times changed.
+
+        Returns:
+            bool: True if a new version was published, False otherwise.
+
+        Raises:
+            Exception: Whatever the DB or a listener raised, the version is left unchanged so the next check retries.
+        """
+        async with self._lock:
+            return await self._publish(await self._fetch_update_dates())
+
+    async def publish(self, update_dates: dict) -> bool:
+        """
+        Publishes a new version for dividend_update_times known without asking the DB, such as those of a snapshot
+        stored by a previous run, the next check() publishes again only if the DB has different ones.
+
+        Args:
+            update_dates (dict): The dividend_update_times to publish.
+
+        Returns:
+            bool: True if a new version was published, False if update_dates are those of the current version.
+
+        Raises:
+            Exception: Whatever a listener raised, the version is left unchanged.
+        """
+        async with self._lock:
+            return await self._publish(update_dates)
+
+    async def _publish(self, update_dates: dict) -> bool:
+        if update_dates == self.update_dates:
+            return False
+        version = self.version + 1
+        for listener in self._listeners:
+            await listener(version, update_dates)
+        self.update_dates = update_dates
+        self.version = version
+        return True
+
+    async def run(self, check_first: bool = False) -> None:
+        """
+        Checks for new data every poll_interval seconds until cancelled, errors are printed and retried on the next poll.
+
+        Args:
+            check_first (bool): If to check right away instead of waiting poll_interval seconds first.
+        """
+        while True:
+            if check_first:
+                check_first = False
+            else:
+                await asyncio.sleep(self.poll_interval)
+            try:
+                await self.check()
+            except Exception as error:
+                print("failed checking dividend_update_times for new data: {}".format(error))
@@ -1,11 +1,53 @@
 import pymysql
-from dbutils.pooled_db import PooledDB
-from typing import List
+from pymysql.constants import FIELD_TYPE
+from typing import Iterator, List, Optional
+
+from .filters import FILTER_COLUMNS, RANGE_AGGREGATES, ResultRows
+from .filter_queries import build_count_query, build_filter_query
+from .db_pool import ConnectionPool
+from .timing import span
+
+# The kind of cells of every MySQL field type, see column_types
+FIELD_KINDS = {
+    **dict.fromkeys((FIELD_TYPE.TINY, FIELD_TYPE.SHORT, FIELD_TYPE.LONG, FIELD_TYPE.LONGLONG, FIELD_TYPE.INT24,
+                     FIELD_TYPE.YEAR), "int"),
+    **dict.fromkeys((FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE), "float"),
+    **dict.fromkeys((FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL), "decimal"),
+    **dict.fromkeys((FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP), "datetime"),
+    **dict.fromkeys((FIELD_TYPE.DATE, FIELD_TYPE.NEWDATE), "date"),
+    **dict.fromkeys((FIELD_TYPE.VARCHAR, FIELD_TYPE.VAR_STRING, FIELD_TYPE.STRING, FIELD_TYPE.TINY_BLOB,
+                     FIELD_TYPE.MEDIUM_BLOB, FIELD_TYPE.LONG_BLOB, FIELD_TYPE.BLOB), "text"),
+}
+# The decimals MySQL (31) & MariaDB (39) report for a FLOAT or DOUBLE column declared without a scale
+NOT_FIXED_DECIMALS = 31
+
+
+def column_types(description: tuple) -> tuple:
+    """
+    Tells the type of every column of a query response from its cursor description, which is what
+    table_renderer.type_formatter formats the cells of a column by.
+
+    Args:
+        description (tuple): The cursor description, a (name, type_code, display_size, internal_size, precision,
+            scale, null_ok) tuple per column.
+
+    Returns:
+        tuple: A (kind, decimals) tuple per column, kind is int, float, decimal, datetime, date or text (None for any
+        other type) & decimals the fixed number of decimals of a float or decimal column (None if it has none).
+    """
+    types = []
+    for _, type_code, _, _, _, scale, _ in description:
+        kind = FIELD_KINDS.get(type_code)
+        fixed = kind in ("float", "decimal") and scale is not None and scale < NOT_FIXED_DECIMALS
+        types.append((kind, scale if fixed else None))
+    return tuple(types)
 
 
 class MysqlConnection:
 
-    def __init__(self, db_host: str, db_port: int, db_user: str, db_password: str, db_schema: str):
+    def __init__(self, db_host: str, db_port: int, db_user: str, db_password: str, db_schema: str,
+                 pool_size: int = 3, pool_ping_interval: float = 30, pool_checkout_timeout: float = 30,
+                 pool_idle_timeout: float = 300):
         """
             Initializes a new instance of the MysqlConnection class.
 
@@ -15,46 +57,61 @@ class MysqlConnection:
                 db_user (str): The username for connecting to the MySQL server.
                 db_password (str): The password for connecting to the MySQL server.
                 db_schema (str): The name of the MySQL schema (database).
+                pool_size (int): The most connections open at once.
+                pool_ping_interval (float): Seconds a connection may sit idle before it's pinged on checkout.
+                pool_checkout_timeout (float): The most seconds to wait for a connection when all of them are in use.
+                pool_idle_timeout (float): Seconds after which an idle connection is closed instead of reused.
 
             Returns:
                 None
             """
-        pool_kwargs = dict(
-            creator=pymysql, host=db_host, port=db_port, user=db_user,
-            passwd=db_password, db=db_schema,
-            connect_timeout=10, read_timeout=30,
-            mincached=0, maxcached=2, maxconnections=3, blocking=True, ping=1,
+        self._pool = ConnectionPool(
+            lambda: pymysql.connect(
+                host=db_host, port=db_port, user=db_user, passwd=db_password, db=db_schema,
+                connect_timeout=10, read_timeout=30,
+            ),
+            size=pool_size, ping_interval=pool_ping_interval, checkout_timeout=pool_checkout_timeout,
+            idle_timeout=pool_idle_timeout,
         )
-        self._pool = PooledDB(**pool_kwargs)
-        self._dict_pool = PooledDB(**pool_kwargs, cursorclass=pymysql.cursors.DictCursor)
 
-    def run_sql_query(self, sql_query: str, tuple_or_dict: str = "tuple") -> list:
+    def run_sql_query(self, sql_query: str, tuple_or_dict: str = "tuple", params: Optional[list] = None) -> list:
         """
         Executes a SQL query on the database.
 
         Args:
             sql_query (str): The SQL query to execute.
             tuple_or_dict: a string of either "tuple" or "dict" to tell what format you want the response returned at.
+            params (Optional[list]): The values bound to the %s placeholders of the query, None if it has none.
 
         Returns:
             list: A list of tuples containing the query response.
         """
         if tuple_or_dict == "tuple":
-            pool = self._pool
+            cursor_class = pymysql.cursors.Cursor
         elif tuple_or_dict == "dict":
-            pool = self._dict_pool
+            cursor_class = pymysql.cursors.DictCursor
         else:
             raise ValueError
-        conn = pool.connection()
+        conn = self._pool.connection()
         try:
-            cur = conn.cursor()
-            cur.execute(sql_query)
-            query_response = cur.fetchall()
+            cur = conn.cursor(cursor_class)
+            with span("db_query"):
+                cur.execute(sql_query, params)
+                query_response = cur.fetchall()
             cur.close()
             return query_response
         finally:
             conn.close()
 
+    def pool_stats(self) -> dict:
+        """
+        Returns the connection pool counters.
+
+        Returns:
+            dict: The pool size, checked out & idle connections, checkouts, checkout failures and wait times.
+        """
+        return self._pool.stats()
+
     def check_db_update_dates(self) -> dict:
         """
             Checks the database for update dates.
@@ -65,6 +122,77 @@ class MysqlConnection:
         db_update_query = "SELECT * FROM dividend_update_times"
         return dict(self.run_sql_query(db_update_query))
 
+    def run_rows_query(self, sql_query: str, params: Optional[list] = None) -> ResultRows:
+        """
+        Executes a SQL query on the database and returns its rows as tuples along with a single header naming them.
+
+        Args:
+            sql_query (str): The SQL query to execute.
+            params (Optional[list]): The values bound to the %s placeholders of the query, None if it has none.
+
+        Returns:
+            ResultRows: The column names of the response and its rows as tuples.
+        """
+        conn = self._pool.connection()
+        try:
+            cur = conn.cursor()
+            with span("db_query"):
+                cur.execute(sql_query, params)
+                columns = [description[0] for description in cur.description]
+                rows = list(cur.fetchall())
+            cur.close()
+            return ResultRows(columns, rows)
+        finally:
+            conn.close()
+
+    def stream_rows_query(self, sql_query: str, params: Optional[list] = None,
+                          batch_size: int = 50) -> Iterator[ResultRows]:
+        """
+        Executes a SQL query on an unbuffered (server side) cursor and yields its rows in batches as they arrive, so no
+        more than a batch of them is held in memory at once. The pool connection is only checked out once iteration
+        starts and is returned when the batches run out or the iteration is closed.
+
+        Args:
+            sql_query (str): The SQL query to execute.
+            params (Optional[list]): The values bound to the %s placeholders of the query, None if it has none.
+            batch_size (int): The most rows read off the connection & yielded at once.
+
+        Returns:
+            Iterator[ResultRows]: The batches of rows, all sharing the column header & the column types of the
+            response. The first batch is always yielded, even when empty, so the header is known for queries matching
+            no rows.
+        """
+        conn = self._pool.connection()
+        try:
+            cur = conn.cursor(pymysql.cursors.SSCursor)
+            try:
+                with span("db_query"):
+                    cur.execute(sql_query, params)
+                    columns = [description[0] for description in cur.description]
+                    types = column_types(cur.description)
+                    rows = list(cur.fetchmany(batch_size))
+                yield ResultRows(columns, rows, types)
+                while rows:
+                    with span("db_query"):
+                        rows = list(cur.fetchmany(batch_size))
+                    if rows:
+                        yield ResultRows(columns, rows, types)
+            finally:
+                # reads off whatever rows are left unread, the connection can't run another query before that
+                cur.close()
+        finally:
+            conn.close()
+
+    def fetch_dividend_table(self) -> tuple:
+        """
+        Fetches the whole dividend_data_table along with its column names, used to build an in memory snapshot of it.
+
+        Returns:
+            tuple: A tuple of (list of column names, list of row tuples).
+        """
+        results = self.run_rows_query("SELECT * FROM dividend_data_table;")
+        return list(results.columns), results.rows
+
     def min_max_value_of_any_stock_key(self, key_of_stock_name: str, min_or_max: str) -> float:
         """
         Takes a dict of the radar file and returns the highest/lowest price of any stock in it, ignores None values
@@ -95,45 +223,28 @@ class MysqlConnection:
         Returns:
             dict: A dictionary mapping internal keys to their raw min/max DB values.
         """
-        query = """
-            SELECT
-                MAX(`Div Yield`), MAX(`5Y Avg Yield`),
-                MIN(`DGR 1Y`), MAX(`DGR 1Y`),
-                MIN(`DGR 3Y`), MAX(`DGR 3Y`),
-                MIN(`DGR 5Y`), MAX(`DGR 5Y`),
-                MIN(`DGR 10Y`), MAX(`DGR 10Y`),
-                MAX(`Chowder Number`),
-                MAX(`Price`),
-                MIN(`FV %`), MAX(`FV %`),
-                MIN(`Revenue 1Y`), MAX(`Revenue 1Y`),
-                MIN(`NPM`), MAX(`NPM`),
-                MIN(`CF/Share`), MAX(`CF/Share`),
-                MIN(`ROE`), MAX(`ROE`),
-                MIN(`P/E`), MAX(`P/E`),
-                MIN(`P/BV`), MAX(`P/BV`),
-                MAX(`Debt/Capital`),
-                MAX(`Payout Ratio`)
-            FROM dividend_data_table
-            WHERE `Div Yield` IS NOT NULL;
-        """
+        query = "SELECT " + ", ".join(
+            "{}(`{}`)".format(function, column) for _, function, column in RANGE_AGGREGATES
+        ) + " FROM dividend_data_table WHERE `Div Yield` IS NOT NULL;"
         row = self.run_sql_query(query)[0]
-        keys = [
-            'yield_max_raw', '5y_yield_max',
-            'dgr1y_min', 'dgr1y_max', 'dgr3y_min', 'dgr3y_max',
-            'dgr5y_min', 'dgr5y_max', 'dgr10y_min', 'dgr10y_max',
-            'chowder_max_raw', 'price_max_raw',
-            'fv_min_raw', 'fv_max_raw',
-            'revenue_min', 'revenue_max',
-            'npm_min', 'npm_max',
-            'cf_min', 'cf_max',
-            'roe_min', 'roe_max',
-            'pe_min_raw', 'pe_max_raw',
-            'pbv_min', 'pbv_max',
-            'debt_max_raw',
-            'payout_ratio_max_raw',
-        ]
+        keys = [key for key, _, _ in RANGE_AGGREGATES]
         return dict(zip(keys, row))
 
+    def column_bounds(self) -> dict:
+        """
+        Fetches the min & max of every filtered column over the whole table in a single SQL query.
+
+        Returns:
+            dict: A dictionary mapping every column of filters.FILTER_COLUMNS to its (min, max), (None, None) if the
+            column only holds NULLs.
+        """
+        query = "SELECT " + ", ".join(
+            "MIN(`{0}`), MAX(`{0}`)".format(column) for column in FILTER_COLUMNS
+        ) + " FROM dividend_data_table;"
+        row = self.run_sql_query(query)[0]
+        return {column: tuple(None if value is None else float(value) for value in row[position * 2:position * 2 + 2])
+                for position, column in enumerate(FILTER_COLUMNS)}
+
     def list_values_of_key_in_db(self, key_to_list: str) -> list:
         """
         Retrieve a list of tickers from the 'dividend_data_table' in the database.
@@ -161,7 +272,8 @@ class MysqlConnection:
                          min_roe: float, pe_range_min: float, pe_range_max: float, max_price_per_book_value: float,
                          max_debt_per_capital_value: float, max_payout_ratio: float,
                          excluded_symbols: List[str], excluded_sectors: List[str],
-                         excluded_industries: List[str]) -> dict:
+                         excluded_industries: List[str], sort_by: str = "Symbol", descending: bool = False,
+                         limit: Optional[int] = None, offset: int = 0, columns: Optional[tuple] = None) -> ResultRows:
         """
         Run a filter query on the database to fetch records based on specified criteria.
 
@@ -186,61 +298,50 @@ class MysqlConnection:
             excluded_symbols (List[str]): List of symbols to be excluded.
             excluded_sectors (List[str]): List of sectors to be excluded.
             excluded_industries (List[str]): List of industries to be excluded.
+            sort_by (str): The column to order the results by, must be one of filters.TABLE_COLUMNS.
+            descending (bool): If to order the results from the highest value down, missing values always come last.
+            limit (Optional[int]): The most rows to return, None returns every matching row.
+            offset (int): How many of the matching rows to skip before returning any.
+            columns (Optional[tuple]): The columns to select, must include Symbol, None selects every column.
 
         Returns:
-            dict: Dictionary containing the query response.
-        """
-        filter_query = """
-            SELECT *
-            FROM dividend_data_table
-            WHERE
-                (`No Years` >= {} OR `No Years` IS NULL)
-                AND (`Div Yield` BETWEEN {} AND {} OR `Div Yield` IS NULL)
-                AND (`5Y Avg Yield` BETWEEN {} AND {} OR `5Y Avg Yield` IS NULL)
-                AND (`DGR 1Y` >= {} OR `DGR 1Y` IS NULL)
-                AND (`DGR 3Y` >= {} OR `DGR 3Y` IS NULL)
-                AND (`DGR 5Y` >= {} OR `DGR 5Y` IS NULL)
-                AND (`DGR 10Y` >= {} OR `DGR 10Y` IS NULL)
-                AND (`Chowder Number` >= {} OR `Chowder Number` IS NULL)
-                AND (`Price` BETWEEN {} AND {} OR `Price` IS NULL)
-                AND (`FV %` <= {} OR `FV %` IS NULL)
-                AND (`Revenue 1Y` >= {} OR `Revenue 1Y` IS NULL)
-                AND (`NPM` >= {} OR `NPM` IS NULL)
-                AND (`CF/Share` >= {} OR `CF/Share` IS NULL)
-                AND (`ROE` >= {} OR `ROE` IS NULL)
-                AND (`P/E` BETWEEN {} AND {} OR `P/E` IS NULL)
-                AND (`P/BV` <= {} OR `P/BV` IS NULL)
-                AND (`Debt/Capital` <= {} OR `Debt/Capital` IS NULL)
-                AND (`Payout Ratio` <= {} OR `Payout Ratio` IS NULL)
-        """.format(min_streak_years, yield_range_min, yield_range_max, yield_range_min, yield_range_max,
-                   min_dgr, min_dgr, min_dgr, min_dgr, chowder_number, price_range_min, price_range_max,
-                   fair_value, min_revenue, min_npm, min_cf_per_share, min_roe,
-                   pe_range_min, pe_range_max, max_price_per_book_value, max_debt_per_capital_value,
-                   max_payout_ratio)
-
-        # Add NOT IN clauses only if the exclusion lists are not empty
-        if excluded_symbols:
-            filter_query += "AND `Symbol` NOT IN ({}) ".format(
-                ', '.join(["'{}'".format(symbol) for symbol in excluded_symbols]))
-        if excluded_sectors:
-            filter_query += "AND `Sector` NOT IN ({}) ".format(
-                ', '.join(["'{}'".format(sector) for sector in excluded_sectors]))
-        if excluded_industries:
-            filter_query += "AND `Industry` NOT IN ({}) ".format(
-                ', '.join(["'{}'".format(industry) for industry in excluded_industries]))
-
-        # Add semicolon to the end of the query
-        filter_query += ";"
+            ResultRows: The matching rows, as tuples ordered like their column header.
+
+        Raises:
+            ValueError: If sort_by or any of the columns isn't a known column of the table.
+        """
+        filter_query, params = build_filter_query((
+            min_streak_years, yield_range_min, yield_range_max, min_dgr, chowder_number, price_range_min,
+            price_range_max, fair_value, min_revenue, min_npm, min_cf_per_share, min_roe, pe_range_min, pe_range_max,
+            max_price_per_book_value, max_debt_per_capital_value, max_payout_ratio,
+            excluded_symbols, excluded_sectors, excluded_industries
+        ), sort_by, descending, limit, offset, columns)
 
         # Execute the SQL query
-        results = self.run_sql_query(filter_query, "dict")
+        return self.run_rows_query(filter_query, params)
 
-        # Convert results into the desired dictionary format
-        output_dict = {}
-        for row in results:
-            # Extract symbol from the row
-            symbol = row['Symbol']
-            # Update output dictionary
-            output_dict[symbol] = row
+    def stream_filter_query(self, *filter_args, sort_by: str = "Symbol", descending: bool = False,
+                            limit: Optional[int] = None, offset: int = 0, columns: Optional[tuple] = None,
+                            batch_size: int = 50) -> Iterator[ResultRows]:
+        """
+        Streams the rows of a filter query in batches off an unbuffered cursor, takes the same arguments as
+        run_filter_query, see stream_rows_query.
+
+        Returns:
+            Iterator[ResultRows]: The matching rows, in batches of at most batch_size rows.
 
-        return output_dict
+        Raises:
+            ValueError: If sort_by or any of the columns isn't a known column of the table.
+        """
+        filter_query, params = build_filter_query(filter_args, sort_by, descending, limit, offset, columns)
+        return self.stream_rows_query(filter_query, params, batch_size)
+
+    def count_filter_query(self, *filter_args) -> int:
+        """
+        Counts the rows a filter query matches, takes the same filter arguments as run_filter_query.
+
+        Returns:
+            int: The number of matching rows.
+        """
+        count_query, params = build_count_query(filter_args)
+        return self.run_sql_query(count_query, "tuple", params)[0][0]
@@ -0,0 +1,169 @@
+import threading
+import time
+from typing import Any, Callable
+
+from .timing import record
+
+
+class PoolTimeout(Exception):
+    """
+    Raised when no connection was freed up within the checkout timeout of a pool
+    """
+    pass
+
+
+class PooledConnection:
+
+    def __init__(self, pool: "ConnectionPool", connection: Any):
+        """
+            A connection checked out of a ConnectionPool, closing it returns the connection to the pool.
+
+            Args:
+                pool (ConnectionPool): The pool the connection was checked out of.
+                connection (Any): The DB-API connection.
+
+            Returns:
+                None
+            """
+        self._pool = pool
+        self._connection = connection
+
+    def cursor(self, *args, **kwargs) -> Any:
+        return self._connection.cursor(*args, **kwargs)
+
+    def close(self) -> None:
+        """
+        Returns the connection to the pool, closing an already returned connection does nothing.
+        """
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            self._pool._check_in(connection)
+
+
+class ConnectionPool:
+
+    def __init__(self, creator: Callable[[], Any], size: int = 3, ping_interval: float = 30,
+                 checkout_timeout: float = 30, idle_timeout: float = 300):
+        """
+            A thread safe pool of DB-API connections with a bounded size, a checkout timeout & idle connection recycling.
+
+            Args:
+                creator (Callable): Opens a new DB-API connection.
+                size (int): The most connections checked out at once, which is also the most kept open.
+                ping_interval (float): Connections idle for at least this many seconds are pinged (and reconnected if
+                    needed) when checked out, 0 pings on every checkout.
+                checkout_timeout (float): The most seconds to wait for a connection when all of them are checked out.
+                idle_timeout (float): Connections idle for longer than this many seconds are closed instead of reused.
+
+            Returns:
+                None
+            """
+        self._creator = creator
+        self.size = size
+        self.ping_interval = ping_interval
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        # (connection, the time.monotonic() it was checked in at), the most recently used connection last
+        self._idle = []
+        self.active = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def connection(self) -> PooledConnection:
+        """
+        Checks out a connection, reusing the most recently used idle connection when there is one.
+
+        Returns:
+            PooledConnection: The checked out connection, close it to return it to the pool.
+
+        Raises:
+            PoolTimeout: If no connection was freed up within checkout_timeout seconds.
+            Exception: Whatever the creator raised when a new connection had to be opened.
+        """
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            with self._lock:
+                self.checkout_failures += 1
+            raise PoolTimeout("no DB connection was freed up within {} seconds".format(self.checkout_timeout))
+        waited = time.monotonic() - started
+        try:
+            connection = self._reuse_idle()
+            if connection is None:
+                connection = self._creator()
+        except Exception:
+            self._slots.release()
+            with self._lock:
+                self.checkout_failures += 1
+            raise
+        with self._lock:
+            self.active += 1
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        record("db_pool", time.monotonic() - started)
+        return PooledConnection(self, connection)
+
+    def _reuse_idle(self) -> Any:
+        """
+        Pops the most recently used idle connection which is still usable, closing the ones that aren't.
+
+        Returns:
+            Any: The connection or None if there is no usable idle connection.
+        """
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection, checked_in = self._idle.pop()
+            idle_seconds = time.monotonic() - checked_in
+            if idle_seconds > self.idle_timeout:
+                self._close(connection)
+                continue
+            if idle_seconds >= self.ping_interval:
+                try:
+                    connection.ping(reconnect=True)
+                except Exception:
+                    self._close(connection)
+                    continue
+            return connection
+
+    def _check_in(self, connection: Any) -> None:
+        """
+        Takes back a checked out connection, rolling back whatever it left open so the next user starts clean.
+        """
+        try:
+            connection.rollback()
+        except Exception:
+            self._close(connection)
+        else:
+            with self._lock:
+                self._idle.append((connection, time.monotonic()))
+        with self._lock:
+            self.active -= 1
+        self._slots.release()
+
+    @staticmethod
+    def _close(connection: Any) -> None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        """
+        Returns the pool counters.
+
+        Returns:
+            dict: The pool size, the checked out & idle connection counts, the checkout & checkout failure counts and
+            the total & max seconds spent waiting for a connection.
+        """
+        with self._lock:
+            return {
+                "size": self.size, "active": self.active, "idle": len(self._idle), "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures, "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
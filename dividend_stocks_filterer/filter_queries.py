@@ -0,0 +1,110 @@
+from typing import Optional, Tuple
+
+from .filters import TABLE_COLUMNS, filter_exclusions, filter_predicates
+
+
+def build_filter_query(filter_args: tuple, sort_by: str = "Symbol", descending: bool = False,
+                       limit: Optional[int] = None, offset: int = 0, columns: Optional[tuple] = None) -> Tuple[str, list]:
+    """
+    Builds a filter query, see MysqlConnection.run_filter_query for the arguments
+
+    :param filter_args: the filter request arguments, ordered as filters.FILTER_ARGUMENT_NAMES
+
+    :return query: the filter query & the list of values to bind to it
+
+    :raise ValueError: if sort_by or any of the columns isn't a known column of the table
+    """
+    conditions, params = where_clause(filter_args)
+    filter_query = select_clause(columns) + " FROM dividend_data_table" + conditions
+    filter_query += order_clause(sort_by, descending)
+    if limit is not None:
+        filter_query += " LIMIT %s OFFSET %s"
+        params += [int(limit), int(offset)]
+
+    # Add semicolon to the end of the query
+    filter_query += ";"
+    return filter_query, params
+
+
+def build_count_query(filter_args: tuple) -> Tuple[str, list]:
+    """
+    Builds the query counting the rows a filter query matches
+
+    :param filter_args: the filter request arguments, ordered as filters.FILTER_ARGUMENT_NAMES
+
+    :return query: the count query & the list of values to bind to it
+    """
+    conditions, params = where_clause(filter_args)
+    return "SELECT COUNT(*) FROM dividend_data_table" + conditions + ";", params
+
+
+def filter_conditions(predicates: list, exclusions: list) -> Tuple[list, list]:
+    """
+    Builds the conditions of a filter query, every value is bound as a %s parameter
+
+    :param predicates: the (column, operator, value) range predicates, as returned from filters.filter_predicates
+    :param exclusions: the (column, excluded values) exclusions, as returned from filters.filter_exclusions
+
+    :return conditions: the list of SQL conditions to AND together & the list of values to bind to them
+    """
+    conditions = []
+    params = []
+    for column, operator, value in predicates:
+        conditions.append("(`{0}` {1} %s OR `{0}` IS NULL)".format(column, operator))
+        params.append(value)
+    for column, excluded in exclusions:
+        conditions.append("`{}` NOT IN ({})".format(column, ", ".join(["%s"] * len(excluded))))
+        params.extend(excluded)
+    return conditions, params
+
+
+def where_clause(filter_args: tuple) -> Tuple[str, list]:
+    """
+    Builds the WHERE clause of a filter query with every value bound as a %s parameter, so requests with the same
+    exclusion list lengths share the same statement text no matter where the sliders are
+
+    :param filter_args: the filter request arguments, ordered as filters.FILTER_ARGUMENT_NAMES
+
+    :return where_clause: the WHERE clause (empty if there is nothing to filter on) & the list of values to bind to it
+    """
+    conditions, params = filter_conditions(filter_predicates(filter_args), filter_exclusions(filter_args))
+    if not conditions:
+        return "", params
+    return " WHERE " + " AND ".join(conditions), params
+
+
+def select_clause(columns: Optional[tuple]) -> str:
+    """
+    Builds the SELECT clause of a filter query
+
+    :param columns: the columns to select, each must be one of filters.TABLE_COLUMNS, None selects every column
+
+    :return select_clause: the SELECT clause
+
+    :raise ValueError: if any of the columns isn't a known column of the table
+    """
+    if columns is None:
+        return "SELECT *"
+    for column in columns:
+        if column not in TABLE_COLUMNS:
+            raise ValueError("can't select unknown column {}".format(column))
+    return "SELECT " + ", ".join("`{}`".format(column) for column in columns)
+
+
+def order_clause(sort_by: str, descending: bool) -> str:
+    """
+    Builds the ORDER BY clause of a filter query, missing values come last and ties are ordered by Symbol
+
+    :param sort_by: the column to order by, must be one of filters.TABLE_COLUMNS
+    :param descending: if to order from the highest value down
+
+    :return order_clause: the ORDER BY clause
+
+    :raise ValueError: if sort_by isn't a known column of the table
+    """
+    if sort_by not in TABLE_COLUMNS:
+        raise ValueError("can't sort by unknown column {}".format(sort_by))
+    direction = " DESC" if descending else ""
+    if sort_by == "Symbol":
+        return " ORDER BY `Symbol`{}".format(direction)
+    return " ORDER BY `{0}` IS NULL, `{0}`{1}, `Symbol`".format(sort_by, direction)
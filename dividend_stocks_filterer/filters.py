@@ -0,0 +1,384 @@
+from typing import NamedTuple, Optional
+
+# The arguments of a /filter request in the order they are passed around (matches MysqlConnection.run_filter_query)
+FILTER_ARGUMENT_NAMES = (
+    "min_streak_years", "yield_range_min", "yield_range_max", "min_dgr", "chowder_number",
+    "price_range_min", "price_range_max", "fair_value", "min_revenue", "min_npm", "min_cf_per_share",
+    "min_roe", "pe_range_min", "pe_range_max", "max_price_per_book_value", "max_debt_per_capital_value",
+    "max_payout_ratio", "excluded_symbols", "excluded_sectors", "excluded_industries",
+)
+
+# Every range predicate as (column, operator, argument name), a NULL column value always passes the predicate
+FILTER_PREDICATES = (
+    ("No Years", ">=", "min_streak_years"),
+    ("Div Yield", ">=", "yield_range_min"),
+    ("Div Yield", "<=", "yield_range_max"),
+    ("5Y Avg Yield", ">=", "yield_range_min"),
+    ("5Y Avg Yield", "<=", "yield_range_max"),
+    ("DGR 1Y", ">=", "min_dgr"),
+    ("DGR 3Y", ">=", "min_dgr"),
+    ("DGR 5Y", ">=", "min_dgr"),
+    ("DGR 10Y", ">=", "min_dgr"),
+    ("Chowder Number", ">=", "chowder_number"),
+    ("Price", ">=", "price_range_min"),
+    ("Price", "<=", "price_range_max"),
+    ("FV %", "<=", "fair_value"),
+    ("Revenue 1Y", ">=", "min_revenue"),
+    ("NPM", ">=", "min_npm"),
+    ("CF/Share", ">=", "min_cf_per_share"),
+    ("ROE", ">=", "min_roe"),
+    ("P/E", ">=", "pe_range_min"),
+    ("P/E", "<=", "pe_range_max"),
+    ("P/BV", "<=", "max_price_per_book_value"),
+    ("Debt/Capital", "<=", "max_debt_per_capital_value"),
+    ("Payout Ratio", "<=", "max_payout_ratio"),
+)
+
+# Every exclusion list as (column, argument name)
+FILTER_EXCLUSIONS = (
+    ("Symbol", "excluded_symbols"),
+    ("Sector", "excluded_sectors"),
+    ("Industry", "excluded_industries"),
+)
+
+# Every column of dividend_data_table, the only values results may be sorted by
+TABLE_COLUMNS = (
+    "Symbol", "Company", "FV", "Sector", "No Years", "Price", "Div Yield", "5Y Avg Yield", "Current Div",
+    "Payouts/ Year", "Annualized", "Previous Div", "Ex-Date", "Pay-Date", "Low", "High", "DGR 1Y", "DGR 3Y", "DGR 5Y",
+    "DGR 10Y", "TTR 1Y", "TTR 3Y", "Fair Value", "FV %", "Streak Basis", "Chowder Number", "EPS 1Y", "Revenue 1Y",
+    "NPM", "CF/Share", "ROE", "Current R", "Debt/Capital", "ROTC", "P/E", "P/BV", "PEG", "New Member", "Industry",
+    "Payout Ratio",
+)
+
+# The columns the results table shows unless configured or picked otherwise, Symbol is always shown
+DEFAULT_DISPLAY_COLUMNS = (
+    "Symbol", "Company", "Sector", "No Years", "Price", "Div Yield", "5Y Avg Yield", "Ex-Date", "DGR 1Y", "DGR 3Y",
+    "DGR 5Y", "DGR 10Y", "FV %", "Chowder Number", "Revenue 1Y", "NPM", "CF/Share", "ROE", "Debt/Capital", "P/E",
+    "P/BV", "Industry", "Payout Ratio",
+)
+
+# The page sizes the results table offers
+PAGE_SIZES = (25, 50, 100, 250, 500)
+
+# Digits float filter values are rounded to before filtering, finer than any slider step
+FILTER_VALUE_PRECISION = 4
+
+FILTER_COLUMNS = tuple(dict.fromkeys(column for column, _, _ in FILTER_PREDICATES))
+
+# The aggregates the slider ranges are built from as (key, MIN or MAX, column), taken over the rows with a Div Yield
+RANGE_AGGREGATES = (
+    ("yield_max_raw", "MAX", "Div Yield"), ("5y_yield_max", "MAX", "5Y Avg Yield"),
+    ("dgr1y_min", "MIN", "DGR 1Y"), ("dgr1y_max", "MAX", "DGR 1Y"),
+    ("dgr3y_min", "MIN", "DGR 3Y"), ("dgr3y_max", "MAX", "DGR 3Y"),
+    ("dgr5y_min", "MIN", "DGR 5Y"), ("dgr5y_max", "MAX", "DGR 5Y"),
+    ("dgr10y_min", "MIN", "DGR 10Y"), ("dgr10y_max", "MAX", "DGR 10Y"),
+    ("chowder_max_raw", "MAX", "Chowder Number"),
+    ("price_max_raw", "MAX", "Price"),
+    ("fv_min_raw", "MIN", "FV %"), ("fv_max_raw", "MAX", "FV %"),
+    ("revenue_min", "MIN", "Revenue 1Y"), ("revenue_max", "MAX", "Revenue 1Y"),
+    ("npm_min", "MIN", "NPM"), ("npm_max", "MAX", "NPM"),
+    ("cf_min", "MIN", "CF/Share"), ("cf_max", "MAX", "CF/Share"),
+    ("roe_min", "MIN", "ROE"), ("roe_max", "MAX", "ROE"),
+    ("pe_min_raw", "MIN", "P/E"), ("pe_max_raw", "MAX", "P/E"),
+    ("pbv_min", "MIN", "P/BV"), ("pbv_max", "MAX", "P/BV"),
+    ("debt_max_raw", "MAX", "Debt/Capital"),
+    ("payout_ratio_max_raw", "MAX", "Payout Ratio"),
+)
+
+
+def filter_predicates(filter_args: tuple) -> list:
+    """
+    Pairs every range predicate with the value it was given in a filter request, skipping predicates whose argument
+    is None (pruned by prune_filter_args as it can't exclude any row)
+
+    :param filter_args: the filter request arguments, ordered as FILTER_ARGUMENT_NAMES
+
+    :return predicates: a list of (column, operator, value) tuples
+    """
+    predicates = []
+    for column, operator, argument in FILTER_PREDICATES:
+        value = filter_args[FILTER_ARGUMENT_NAMES.index(argument)]
+        if value is not None:
+            predicates.append((column, operator, value))
+    return predicates
+
+
+def filter_exclusions(filter_args: tuple) -> list:
+    """
+    Pairs every exclusion column with the values a filter request excludes from it, skipping empty exclusion lists
+
+    :param filter_args: the filter request arguments, ordered as FILTER_ARGUMENT_NAMES
+
+    :return exclusions: a list of (column, excluded values) tuples
+    """
+    exclusions = []
+    for column, argument in FILTER_EXCLUSIONS:
+        excluded = filter_args[FILTER_ARGUMENT_NAMES.index(argument)]
+        if excluded:
+            exclusions.append((column, excluded))
+    return exclusions
+
+
+def canonical_filter_args(filter_args: tuple) -> tuple:
+    """
+    Normalizes the arguments of a filter request so requests that select the same rows compare (and hash) equal,
+    floats are rounded to FILTER_VALUE_PRECISION digits and exclusion lists are deduplicated and sorted
+
+    :param filter_args: the filter request arguments, ordered as FILTER_ARGUMENT_NAMES
+
+    :return canonical_args: the normalized arguments, usable both as a cache key and to run the filter
+    """
+    canonical_args = []
+    for value in filter_args:
+        if isinstance(value, (list, tuple)):
+            canonical_args.append(tuple(sorted(set(value))))
+        elif isinstance(value, float):
+            canonical_args.append(round(value, FILTER_VALUE_PRECISION))
+        else:
+            canonical_args.append(value)
+    return tuple(canonical_args)
+
+
+def _is_noop_predicate(bounds: Optional[tuple], operator: str, value) -> bool:
+    """
+    Checks if a range predicate passes every row of a column
+
+    :param bounds: the (min, max) of the column values, (None, None) if the column only has NULLs, None if unknown
+    :param operator: the predicate operator, ">=" or "<="
+    :param value: the value the predicate compares the column to
+
+    :return is_noop: True if the predicate can't exclude any row
+    """
+    if value is None:
+        return True
+    if bounds is None:
+        return False
+    low, high = bounds
+    # NULLs always pass a range predicate so a column with no values can't exclude anything
+    if low is None:
+        return True
+    return value <= low if operator == ">=" else value >= high
+
+
+def _prune_exclusion(excluded: tuple, values: Optional[frozenset]) -> tuple:
+    """
+    Drops the excluded values no row has, they can't exclude anything
+
+    :param excluded: the canonical (sorted) excluded values of a column
+    :param values: every value of the column in the table, None included if some rows have no value, None if unknown
+
+    :return pruned: the excluded values some row has, or the first excluded value alone if none of them is in the
+        table but the column has NULLs as any non empty exclusion list filters out the rows with no value
+    """
+    if not excluded or values is None:
+        return excluded
+    pruned = tuple(value for value in excluded if value in values)
+    if not pruned and None in values:
+        return excluded[:1]
+    return pruned
+
+
+def prune_filter_args(filter_args: tuple, column_bounds: dict, exclusion_values: Optional[dict] = None) -> tuple:
+    """
+    Replaces the value of every range argument that can't exclude any row of the current data with None and drops the
+    excluded values no row has, so the filter skips that work and requests that only differ in such no-op values share
+    a cache key. Only valid for a query run on the very data the bounds & values were taken from, i.e. the snapshot of
+    the "memory" engine, as a row added later could be one a pruned argument filters out
+
+    :param filter_args: the filter request arguments, ordered as FILTER_ARGUMENT_NAMES
+    :param column_bounds: the (min, max) of every filtered column over the whole table
+    :param exclusion_values: the set of values of every exclusion column over the whole table, None skips pruning the
+        exclusion lists
+
+    :return pruned_args: the filter arguments with the no-op range values set to None
+    """
+    pruned_args = list(filter_args)
+    for position, argument in enumerate(FILTER_ARGUMENT_NAMES):
+        predicates = [(column, operator) for column, operator, name in FILTER_PREDICATES if name == argument]
+        if predicates and all(_is_noop_predicate(column_bounds.get(column), operator, filter_args[position])
+                              for column, operator in predicates):
+            pruned_args[position] = None
+    for column, argument in FILTER_EXCLUSIONS:
+        position = FILTER_ARGUMENT_NAMES.index(argument)
+        pruned_args[position] = _prune_exclusion(filter_args[position], (exclusion_values or {}).get(column))
+    return tuple(pruned_args)
+
+
+def _is_as_tight(value, previous, operator: str) -> bool:
+    """
+    Checks if a range predicate value passes no row the previous value of the same predicate didn't pass
+
+    :param value: the new value, None if the predicate was pruned
+    :param previous: the previous value, None if the predicate was pruned
+    :param operator: the predicate operator, ">=" or "<="
+
+    :return is_as_tight: True if the new value is at least as strict as the previous one
+    """
+    if previous is None:
+        return True
+    if value is None:
+        return False
+    return value >= previous if operator == ">=" else value <= previous
+
+
+def narrows(filter_args: tuple, previous_args: tuple) -> bool:
+    """
+    Checks if a filter request can only select rows a previous request selected, e.g. while a slider is dragged
+    inwards, so it can be run on the previous results instead of the whole table
+
+    :param filter_args: the canonical filter request arguments, ordered as FILTER_ARGUMENT_NAMES
+    :param previous_args: the canonical arguments of the previous request, ordered the same way
+
+    :return narrows: True if every range is at least as tight and every previous exclusion is still excluded
+    """
+    for _, operator, argument in FILTER_PREDICATES:
+        position = FILTER_ARGUMENT_NAMES.index(argument)
+        if not _is_as_tight(filter_args[position], previous_args[position], operator):
+            return False
+    for _, argument in FILTER_EXCLUSIONS:
+        position = FILTER_ARGUMENT_NAMES.index(argument)
+        if not set(previous_args[position]) <= set(filter_args[position]):
+            return False
+    return True
+
+
+def column_list(columns) -> list:
+    """
+    Reads a list of column names given either as a list or as a comma separated string (as envvars pass them)
+
+    :param columns: the list of column names or the comma separated string, None for no columns
+
+    :return columns: the column names, stripped of surrounding whitespace
+    """
+    if columns is None:
+        return []
+    if isinstance(columns, str):
+        columns = columns.split(",")
+    return [column.strip() for column in columns if column.strip()]
+
+
+def projection(columns, default_columns: tuple = DEFAULT_DISPLAY_COLUMNS) -> tuple:
+    """
+    Turns the columns a request asked for into the whitelisted, canonical list of columns to select, unknown columns
+    are dropped, Symbol is always included and the columns are ordered as they are in the table so the same selection
+    always gives the same projection
+
+    :param columns: the requested column names
+    :param default_columns: the columns to use when none of the requested columns are known
+
+    :return projection: a tuple of column names, ordered as TABLE_COLUMNS
+    """
+    selected = set(columns) & set(TABLE_COLUMNS) or set(default_columns) & set(TABLE_COLUMNS)
+    return tuple(column for column in TABLE_COLUMNS if column in selected or column == "Symbol")
+
+
+class PageRequest(NamedTuple):
+    """
+    Which slice of the filter results to return and in what order
+    """
+    sort_by: str = "Symbol"
+    descending: bool = False
+    page: int = 1
+    page_size: int = 100
+
+    @property
+    def offset(self) -> int:
+        return (self.page - 1) * self.page_size
+
+    def page_count(self, total: int) -> int:
+        """
+        Returns how many pages a number of results spans, there is always at least one (possibly empty) page
+
+        :param total: the number of results
+
+        :return page_count: the number of pages
+        """
+        return max(1, -(-total // self.page_size))
+
+    def clamp(self, total: int) -> "PageRequest":
+        """
+        Moves a request for a page past the end of the results to the last page
+
+        :param total: the number of results
+
+        :return page_request: the request, pointing at an existing page
+        """
+        return self._replace(page=min(self.page, self.page_count(total)))
+
+
+def page_request(sort_by: str, sort_dir: str, page: int, page_size: int, default_page_size: int) -> PageRequest:
+    """
+    Builds a page request out of the values posted by the results table controls, falling back to the defaults for
+    anything that isn't valid
+
+    :param sort_by: the column to sort by, empty or unknown columns sort by Symbol
+    :param sort_dir: "desc" to sort from the highest value down, anything else sorts up
+    :param page: the 1 based page number
+    :param page_size: how many results go in a page, must be one of PAGE_SIZES
+    :param default_page_size: the page size to use when page_size isn't valid
+
+    :return page_request: the validated page request
+    """
+    return PageRequest(
+        sort_by=sort_by if sort_by in TABLE_COLUMNS else "Symbol",
+        descending=sort_dir == "desc",
+        page=max(1, page),
+        page_size=page_size if page_size in PAGE_SIZES else default_page_size,
+    )
+
+
+class ResultRows:
+    """
+    Filter results as plain row tuples sharing a single header, in result order, which is what a tuple cursor returns
+    and all the renderer needs instead of a dict (repeating every column name) per row. Rows streamed off the DB also
+    carry the (kind, decimals) type of every column, see db_functions.column_types, so all their batches are formatted
+    alike
+    """
+    __slots__ = ("columns", "rows", "column_types")
+
+    def __init__(self, columns: tuple, rows: list, column_types: Optional[tuple] = None):
+        self.columns = tuple(columns)
+        self.rows = rows
+        self.column_types = column_types
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ResultRows):
+            return NotImplemented
+        return self.columns == other.columns and list(self.rows) == list(other.rows)
+
+    def __repr__(self) -> str:
+        return "ResultRows(columns={!r}, rows={!r})".format(self.columns, self.rows)
+
+    def as_dict(self) -> dict:
+        """
+        Converts the rows to the dict of rows keyed by their Symbol the filter engines used to return
+
+        :return rows: a dict of Symbol to a dict of column name to value
+        """
+        symbol = self.columns.index("Symbol")
+        return {row[symbol]: dict(zip(self.columns, row)) for row in self.rows}
+
+    @classmethod
+    def from_dict(cls, rows: dict) -> "ResultRows":
+        """
+        Builds results out of a dict of rows keyed by their Symbol, columns missing from some rows are None in them
+
+        :param rows: a dict of Symbol to a dict of column name to value
+
+        :return results: the same rows in the same order
+        """
+        columns = tuple(dict.fromkeys(["Symbol"] + [column for row in rows.values() for column in row]))
+        return cls(columns, [tuple(symbol if column == "Symbol" else row.get(column) for column in columns)
+                             for symbol, row in rows.items()])
+
+
+class ResultPage(NamedTuple):
+    """
+    A page of filter results along with the total number of matching rows
+    """
+    rows: ResultRows
+    total: int
+    page_request: PageRequest
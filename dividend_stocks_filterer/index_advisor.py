@@ -0,0 +1,181 @@
+import argparse
+import re
+from typing import List, Tuple
+
+from .configure import read_configurations
+from .db_functions import MysqlConnection
+from .filter_queries import filter_conditions, where_clause
+from .filters import FILTER_ARGUMENT_NAMES, FILTER_COLUMNS, FILTER_EXCLUSIONS, FILTER_PREDICATES, filter_exclusions, \
+    filter_predicates
+
+TABLE_NAME = "dividend_data_table"
+
+# EXPLAIN access types which read the whole table (or the whole of an index) instead of a range of it
+FULL_SCAN_ACCESS_TYPES = ("ALL", "index")
+
+
+def index_name(column: str) -> str:
+    """
+    Names the single column index the advisor recommends for a filtered column
+
+    :param column: the filtered column
+
+    :return index_name: the index name, e.g. ix_div_yield for `Div Yield`
+    """
+    return "ix_" + re.sub(r"[^0-9a-z]+", "_", column.lower()).strip("_")
+
+
+def existing_indexes(db: MysqlConnection) -> dict:
+    """
+    Reads the indexes of dividend_data_table from information_schema
+
+    :param db: the DB connection
+
+    :return indexes: a dict of index name to the list of its columns, in index order
+    """
+    rows = db.run_sql_query(
+        "SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s ORDER BY INDEX_NAME, SEQ_IN_INDEX;",
+        "tuple", [TABLE_NAME]
+    )
+    indexes = {}
+    for name, column in rows:
+        indexes.setdefault(name, []).append(column)
+    return indexes
+
+
+def missing_indexes(indexes: dict) -> List[str]:
+    """
+    Lists the filtered columns no index can range scan, a column is covered when it leads any index
+
+    :param indexes: the existing indexes, as returned from existing_indexes
+
+    :return columns: the filtered columns without an index they lead, ordered as filters.FILTER_COLUMNS
+    """
+    leading_columns = {columns[0] for columns in indexes.values() if columns}
+    return [column for column in FILTER_COLUMNS if column not in leading_columns]
+
+
+def create_index_statement(column: str) -> str:
+    """
+    Builds the DDL adding the recommended index of a filtered column
+
+    :param column: the filtered column, must be one of filters.FILTER_COLUMNS
+
+    :return statement: the CREATE INDEX statement
+    """
+    if column not in FILTER_COLUMNS:
+        raise ValueError("can't index unknown column {}".format(column))
+    return "CREATE INDEX `{}` ON {} (`{}`);".format(index_name(column), TABLE_NAME, column)
+
+
+def filter_shapes(column_bounds: dict) -> List[Tuple[str, tuple]]:
+    """
+    Builds one filter request per range argument with only that slider moved to the middle of its column values, the
+    shape most real requests (moving 1 to 4 sliders) are made of
+
+    :param column_bounds: the (min, max) of every filtered column, as returned from MysqlConnection.column_bounds
+
+    :return shapes: a list of (argument name, filter arguments) tuples
+    """
+    shapes = []
+    for argument in FILTER_ARGUMENT_NAMES:
+        columns = [column for column, _, name in FILTER_PREDICATES if name == argument]
+        bounds = [column_bounds.get(column) for column in columns]
+        bounds = [bound for bound in bounds if bound and bound[0] is not None]
+        if not bounds:
+            continue
+        filter_args = [None] * len(FILTER_ARGUMENT_NAMES)
+        filter_args[FILTER_ARGUMENT_NAMES.index(argument)] = (bounds[0][0] + bounds[0][1]) / 2
+        for _, name in FILTER_EXCLUSIONS:
+            filter_args[FILTER_ARGUMENT_NAMES.index(name)] = ()
+        shapes.append((argument, tuple(filter_args)))
+    return shapes
+
+
+def union_rewrite(filter_args: tuple) -> Tuple[str, list]:
+    """
+    Rewrites a filter query into the UNION ALL of the rows in range of its first predicate and the rows where that
+    column is NULL, for servers which won't range scan an "x >= %s OR x IS NULL" predicate on their own
+
+    :param filter_args: the filter request arguments, ordered as filters.FILTER_ARGUMENT_NAMES
+
+    :return query: the rewritten query & the values to bind to it
+
+    :raise ValueError: if the request has no range predicate to drive the rewrite
+    """
+    predicates = filter_predicates(filter_args)
+    if not predicates:
+        raise ValueError("can't rewrite a filter query with no range predicates")
+    (column, operator, value), rest = predicates[0], predicates[1:]
+    conditions, params = filter_conditions(rest, filter_exclusions(filter_args))
+    range_query = "SELECT * FROM {} WHERE ".format(TABLE_NAME) + " AND ".join(
+        ["`{}` {} %s".format(column, operator)] + conditions)
+    null_query = "SELECT * FROM {} WHERE ".format(TABLE_NAME) + " AND ".join(["`{}` IS NULL".format(column)] + conditions)
+    return range_query + " UNION ALL " + null_query, [value] + params + params
+
+
+def explain(db: MysqlConnection, query: str, params: list) -> List[str]:
+    """
+    Runs EXPLAIN on a query and returns the access type of every table read in its plan
+
+    :param db: the DB connection
+    :param query: the query to explain
+    :param params: the values bound to the query
+
+    :return access_types: the EXPLAIN "type" of every row of the plan
+    """
+    return [row["type"] for row in db.run_sql_query("EXPLAIN " + query, "dict", params)]
+
+
+def advise(db: MysqlConnection, create: bool = False) -> List[str]:
+    """
+    Reports which filtered columns lack an index, how every single slider filter shape is planned and, when asked to,
+    creates the missing indexes
+
+    :param db: the DB connection
+    :param create: if to create the missing indexes, off by default as it locks the table while building them
+
+    :return report: the report lines
+    """
+    report = []
+    indexes = existing_indexes(db)
+    missing = missing_indexes(indexes)
+    report.append("{} has {} index(es): {}".format(TABLE_NAME, len(indexes), ", ".join(sorted(indexes)) or "none"))
+    for column in missing:
+        statement = create_index_statement(column)
+        if create:
+            db.run_sql_query(statement)
+            report.append("created: " + statement)
+        else:
+            report.append("missing: " + statement)
+
+    for argument, filter_args in filter_shapes(db.column_bounds()):
+        conditions, params = where_clause(filter_args)
+        access_types = explain(db, "SELECT * FROM " + TABLE_NAME + conditions, params)
+        line = "{}: {}".format(argument, ", ".join(access_types))
+        if any(access_type in FULL_SCAN_ACCESS_TYPES for access_type in access_types):
+            union_query, union_params = union_rewrite(filter_args)
+            line += " (full scan, UNION ALL form: {})".format(", ".join(explain(db, union_query, union_params)))
+        report.append(line)
+    return report
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Reports (and optionally creates) the indexes the filter queries of "
+                                                 "dividend_data_table need to range scan instead of full scanning")
+    parser.add_argument("--create", action="store_true", help="create the missing indexes")
+    args = parser.parse_args(argv)
+
+    configuration = read_configurations()
+    db = MysqlConnection(
+        db_host=configuration["db_host"], db_schema=configuration["db_schema"],
+        db_password=configuration["db_pass"], db_port=configuration["db_port"],
+        db_user=configuration["db_user"]
+    )
+    for line in advise(db, args.create):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,752 @@
+import datetime
+import json
+import mmap
+import os
+import struct
+import unicodedata
+import numpy as np
+from decimal import Decimal
+from typing import Optional
+
+from .filters import FILTER_COLUMNS, RANGE_AGGREGATES, PageRequest, ResultPage, ResultRows, \
+    filter_predicates, filter_exclusions
+
+
+# Marks a snapshot file, bump the digit whenever the layout changes so old files are rebuilt instead of misread
+SNAPSHOT_FILE_MAGIC = b"DIVSNAP6"
+# magic, header length & body length, the header & body being UTF-8 JSON
+SNAPSHOT_FILE_PREAMBLE = struct.Struct("<8sQQ")
+# Arrays in a snapshot file start on multiples of this many bytes so they can be mapped without copying
+SNAPSHOT_FILE_ALIGNMENT = 64
+# float64 holds every integer up to this one exactly
+_EXACT_FLOAT_INTEGER = 2 ** 53
+# float64 holds every decimal of up to this many significant digits closely enough to round it back exactly
+_EXACT_FLOAT_DIGITS = 15
+# datetime cells are stored as microseconds since this one
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+# How the cells of a column of mixed types are written as text, per tag stored alongside every cell: its type, how it
+# is written & how it is read back, every one of them exactly
+_TAGGED_TYPES = (
+    (str, str, str),
+    (int, str, int),
+    (float, repr, float),
+    (Decimal, str, Decimal),
+    (datetime.datetime, datetime.datetime.isoformat, datetime.datetime.fromisoformat),
+    (datetime.date, datetime.date.isoformat, datetime.date.fromisoformat),
+    (bytes, bytes.hex, bytes.fromhex),
+)
+_TAGS = {cell_type: tag for tag, (cell_type, _, _) in enumerate(_TAGGED_TYPES)}
+# The kinds of arrays a snapshot file holds, each one a dict of column name to array but symbol_order
+_ARRAY_KINDS = ("numbers", "nulls", "sorted", "sorted_values", "null_indices", "bitmaps", "text_offsets", "text_data",
+                "tags", "symbol_order")
+# The exclusion columns of a few distinct values, each value of which gets a bitmap of the rows holding it, the values of
+# the other ones (Symbol) are found through a dict of value to row position
+BITMAP_EXCLUSIONS = ("Sector", "Industry")
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // SNAPSHOT_FILE_ALIGNMENT) * SNAPSHOT_FILE_ALIGNMENT
+
+
+def _read_preamble(buffer) -> tuple:
+    """
+    Parses the start of a snapshot file
+
+    :param buffer: the file contents, at least the first SNAPSHOT_FILE_PREAMBLE.size bytes of them
+
+    :return lengths: the header & body lengths
+
+    :raise ValueError: if the buffer isn't a snapshot file of the current layout
+    """
+    if len(buffer) < SNAPSHOT_FILE_PREAMBLE.size:
+        raise ValueError("truncated snapshot file")
+    magic, header_length, body_length = SNAPSHOT_FILE_PREAMBLE.unpack_from(buffer)
+    if magic != SNAPSHOT_FILE_MAGIC:
+        raise ValueError("not a snapshot file")
+    return header_length, body_length
+
+
+def _encode_value(value) -> Optional[list]:
+    """
+    Writes a value as JSON, see _TAGGED_TYPES
+
+    :param value: the value, None is kept as is
+
+    :return encoded: the [tag, text] of the value
+
+    :raise ValueError: if no tag holds the type of the value
+    """
+    if value is None:
+        return None
+    if type(value) not in _TAGS:
+        raise ValueError("can't store a {} in a snapshot file".format(type(value).__name__))
+    tag = _TAGS[type(value)]
+    return [tag, _TAGGED_TYPES[tag][1](value)]
+
+
+def _decode_value(encoded: Optional[list]):
+    """
+    Reads back a value written by _encode_value
+    """
+    if encoded is None:
+        return None
+    tag, text = encoded
+    return _TAGGED_TYPES[tag][2](text)
+
+
+def read_update_dates(path: str) -> Optional[dict]:
+    """
+    Reads only the version header of a snapshot file, cheap enough to check on every data change
+
+    :param path: the snapshot file
+
+    :return update_dates: the dividend_update_times the snapshot in the file was taken at
+
+    :raise ValueError: if the file isn't a snapshot file of the current layout
+    """
+    with open(path, "rb") as file:
+        header_length, _ = _read_preamble(file.read(SNAPSHOT_FILE_PREAMBLE.size))
+        return _read_header(file.read(header_length))["update_dates"]
+
+
+def _read_header(header: bytes) -> dict:
+    """
+    Parses the JSON header of a snapshot file, the data version is stored as tagged values, see _encode_value
+    """
+    header = json.loads(header)
+    if header["update_dates"] is not None:
+        header["update_dates"] = {key: _decode_value(value) for key, value in header["update_dates"].items()}
+    return header
+
+
+def _as_float(value) -> float:
+    """
+    Converts a DB value to a float for the numeric column arrays, anything that isn't a number becomes NaN
+
+    :param value: the value as returned from the DB (int, float, Decimal or None)
+
+    :return number: the value as a float
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _int_type(values: list) -> Optional[tuple]:
+    return ("int",) if all(abs(value) <= _EXACT_FLOAT_INTEGER for value in values) else None
+
+
+def _decimal_type(values: list) -> Optional[tuple]:
+    if not all(value.is_finite() and len(value.as_tuple().digits) <= _EXACT_FLOAT_DIGITS for value in values):
+        return None
+    # a DECIMAL(p, s) column returns every value with s decimals, which is how they are rounded back
+    exponents = {value.as_tuple().exponent for value in values}
+    return ("decimal", exponents.pop()) if len(exponents) == 1 else None
+
+
+def _datetime_type(values: list) -> Optional[tuple]:
+    if all(value.tzinfo is None and abs((value - _EPOCH) // _MICROSECOND) <= _EXACT_FLOAT_INTEGER for value in values):
+        return ("datetime",)
+    return None
+
+
+# Per type of the cells of a column, picks the cell type they are stored as out of the (not None) cells
+_CELL_TYPES = {
+    str: lambda values: ("text",),
+    float: lambda values: ("float",),
+    int: _int_type,
+    Decimal: _decimal_type,
+    datetime.datetime: _datetime_type,
+    datetime.date: lambda values: ("date",),
+}
+
+
+def _cell_type(values: list) -> Optional[tuple]:
+    """
+    Picks how the cells of a column are stored so they can be rebuilt exactly without keeping a Python object per
+    cell, from the types of the values the DB returned for it
+
+    :param values: the cells of the column
+
+    :return cell_type: ("text",) for str cells kept as UTF-8 bytes, ("int",), ("float",), ("decimal", exponent),
+        ("datetime",) or ("date",) for cells kept as float64 numbers, ("tagged",) for cells of mixed types or values a
+        float64 can't hold exactly, kept as text along with the tag of their type, None for a column holding values
+        of a type no tag holds, whose cells are kept as objects that aren't stored in a snapshot file
+    """
+    present = [value for value in values if value is not None]
+    types = {type(value) for value in present}
+    if not types:
+        return ("float",)
+    pick = _CELL_TYPES.get(next(iter(types))) if len(types) == 1 else None
+    cell_type = None if pick is None else pick(present)
+    if cell_type is None and types.issubset(_TAGS):
+        return ("tagged",)
+    return cell_type
+
+
+def _as_number(value, cell_type: tuple) -> float:
+    """
+    Converts a cell to the float64 it is stored as, see _cell_type
+
+    :param value: the cell, None becomes NaN
+    :param cell_type: the cell type of its column
+
+    :return number: the stored number
+    """
+    if value is None:
+        return np.nan
+    if cell_type[0] == "datetime":
+        return float((value - _EPOCH) // _MICROSECOND)
+    if cell_type[0] == "date":
+        return float(value.toordinal())
+    return float(value)
+
+
+def _encode_text(values: list) -> tuple:
+    """
+    Packs the cells of a text column into a single UTF-8 buffer
+
+    :param values: the cells, str or None (stored as an empty cell)
+
+    :return text: the offsets (one more than the cells, cell i is data[offsets[i]:offsets[i + 1]]) & the data
+
+    :raise UnicodeEncodeError: if a cell can't be encoded
+    """
+    encoded = [b"" if value is None else value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def collation_key(value):
+    """
+    Sorts text the way MySQL's default utf8mb4 collations (utf8mb4_0900_ai_ci, utf8mb4_general_ci) do, ignoring case
+    & accents, so the memory engine orders Company, Sector & Industry like the sql engine
+
+    :param value: the value to sort, anything but a str is sorted as is
+
+    :return key: the case folded text without its accents
+    """
+    if not isinstance(value, str):
+        return value
+    if not value.isascii():
+        value = "".join(character for character in unicodedata.normalize("NFKD", value)
+                        if not unicodedata.combining(character))
+    return value.casefold()
+
+
+class TableSnapshot:
+
+    def __init__(self, columns: list, rows: list, update_dates: Optional[dict] = None):
+        """
+            An in memory, column oriented copy of the dividend_data_table which can run the /filter query without the DB.
+
+            Args:
+                columns (list): The column names of the table, in order.
+                rows (list): The rows of the table as tuples ordered like columns.
+                update_dates (dict): The dividend_update_times the rows were read at, used to tell if the copy is stale.
+
+            Returns:
+                None
+            """
+        self.columns = list(columns)
+        self.update_dates = update_dates
+        self.row_count = len(rows)
+        # the cells are kept in arrays a snapshot file maps as is: numbers & datetimes in _numbers, text as UTF-8 in
+        # _text_offsets & _text_data, along with the tag of every cell in _tags for the columns of mixed types, rebuilt
+        # by _cell_types, only the columns holding values no tag holds stay in _values
+        self._cell_types = {}
+        self._values = {}
+        self._numbers = {}
+        self._nulls = {}
+        self._text_offsets = {}
+        self._text_data = {}
+        self._tags = {}
+        cells = {}
+        for position, column in enumerate(self.columns):
+            cells[column] = [row[position] for row in rows]
+            self._store_cells(column, cells[column])
+        # row positions ordered by Symbol, the tie breaker of every sort
+        symbols = [str(value) for value in cells.get("Symbol", [None] * self.row_count)]
+        self._symbol_order = np.array(sorted(range(self.row_count), key=lambda index: (collation_key(symbols[index]),
+                                                                                       symbols[index])), dtype=np.intp)
+        # per filtered column, the positions of the rows with a number ordered by it (so every range predicate is a
+        # slice found by binary search), those numbers in the same order & the positions of the rows without a value
+        self._sorted = {}
+        self._sorted_values = {}
+        self._null_indices = {}
+        for column in self.columns:
+            if column not in FILTER_COLUMNS:
+                continue
+            numbers = self._numbers[column]
+            present = np.flatnonzero(~np.isnan(numbers))
+            self._sorted[column] = present[np.argsort(numbers[present], kind="stable")]
+            self._sorted_values[column] = numbers[self._sorted[column]]
+            self._null_indices[column] = np.flatnonzero(self._nulls[column])
+        # per bitmap exclusion column, a packed bitmap of the rows holding each of its values, in the order of
+        # distinct_values, so an exclusion list costs one OR per excluded value whatever the size of the table
+        self._bitmaps = {}
+        for column in BITMAP_EXCLUSIONS:
+            if column not in cells:
+                continue
+            positions = {}
+            for index, value in enumerate(cells[column]):
+                if value is not None:
+                    positions.setdefault(value, []).append(index)
+            bitmaps = np.zeros((len(positions), self.row_count), dtype=bool)
+            for bitmap, indices in zip(bitmaps, positions.values()):
+                bitmap[indices] = True
+            self._bitmaps[column] = np.packbits(bitmaps, axis=1)
+        # per exclusion column, its values to their bitmap (or row positions), built on the first exclusion of the
+        # column as a dict doesn't map out of a snapshot file
+        self._exclusion_indexes = {}
+
+    def _store_cells(self, column: str, values: list) -> None:
+        """
+        Keeps the cells of a column in the arrays of its cell type, see _cell_type
+        """
+        self._nulls[column] = np.fromiter((value is None for value in values), dtype=bool, count=self.row_count)
+        cell_type = _cell_type(values)
+        if cell_type in (("datetime",), ("date",)) and column in FILTER_COLUMNS:
+            # the numbers of a filtered column have to be the values themselves
+            cell_type = ("tagged",)
+        texts = values
+        if cell_type == ("tagged",):
+            self._tags[column] = np.fromiter((0 if value is None else _TAGS[type(value)] for value in values),
+                                             dtype=np.uint8, count=self.row_count)
+            texts = [None if value is None else _TAGGED_TYPES[tag][1](value)
+                     for value, tag in zip(values, self._tags[column].tolist())]
+        if cell_type in (("text",), ("tagged",)):
+            try:
+                self._text_offsets[column], self._text_data[column] = _encode_text(texts)
+            except UnicodeEncodeError:
+                cell_type = None
+                self._tags.pop(column, None)
+        elif cell_type is not None:
+            self._numbers[column] = np.fromiter((_as_number(value, cell_type) for value in values),
+                                                dtype=np.float64, count=self.row_count)
+        if cell_type is None:
+            self._values[column] = np.empty(self.row_count, dtype=object)
+            self._values[column][:] = values
+        else:
+            self._cell_types[column] = cell_type
+        if column in FILTER_COLUMNS and column not in self._numbers:
+            self._numbers[column] = np.fromiter((_as_float(value) for value in values), dtype=np.float64,
+                                                count=self.row_count)
+
+    def column_bounds(self) -> dict:
+        """
+        Returns the min & max of every filtered column, same format as MysqlConnection.column_bounds
+
+        Returns:
+            dict: A dictionary mapping every filtered column to its (min, max), (None, None) if it only holds NULLs.
+        """
+        bounds = {}
+        for column, values in self._sorted_values.items():
+            bounds[column] = (float(values[0]), float(values[-1])) if len(values) else (None, None)
+        return bounds
+
+    def min_max_all_values(self) -> dict:
+        """
+        Computes the slider range aggregates from the snapshot, same format as MysqlConnection.min_max_all_values
+
+        Returns:
+            dict: A dictionary mapping every key of filters.RANGE_AGGREGATES to its value, None if no row has one.
+        """
+        # like the SQL query the aggregates only cover the rows with a Div Yield
+        with_yield = ~self._nulls["Div Yield"] if "Div Yield" in self._nulls else np.zeros(self.row_count, dtype=bool)
+        values = {}
+        for key, function, column in RANGE_AGGREGATES:
+            numbers = self._numbers[column][with_yield] if column in self._numbers else np.empty(0)
+            present = numbers[~np.isnan(numbers)]
+            if not len(present):
+                values[key] = None
+            else:
+                values[key] = float(present.min() if function == "MIN" else present.max())
+        return values
+
+    def distinct_values(self, column: str) -> list:
+        """
+        Lists the distinct values of a column in the order they first appear, same as
+        MysqlConnection.list_values_of_key_in_db
+
+        Args:
+            column (str): The column to list the values of.
+
+        Returns:
+            list: The distinct values of the column, including None if any row has no value.
+        """
+        return list(dict.fromkeys(self._cells(column, np.arange(self.row_count))))
+
+    def filter_mask(self, *filter_args, within: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Evaluates a filter request against the snapshot, same semantics as MysqlConnection.run_filter_query
+
+        Args:
+            filter_args: The filter request arguments, ordered as filters.FILTER_ARGUMENT_NAMES.
+            within (Optional[np.ndarray]): The positions of the only rows which may pass, such as the results of a
+                request this one narrows (see filters.narrows), None evaluates every row.
+
+        Returns:
+            np.ndarray: A boolean array with True for every row that passes the filter.
+        """
+        mask = np.zeros(self.row_count, dtype=bool)
+        mask[self.range_indices(filter_predicates(filter_args), within)] = True
+        for column, excluded in filter_exclusions(filter_args):
+            if column in self._bitmaps:
+                mask &= ~self._bitmap_rows(column, excluded)
+            else:
+                mask[self._rows_of(column, excluded)] = False
+            # NULL NOT IN (...) is never true in SQL so rows with no value get filtered out as well
+            mask &= ~self._nulls[column]
+        return mask
+
+    def _exclusion_index(self, column: str) -> dict:
+        """
+        Maps the values of an exclusion column to the position of their bitmap, or for a column without bitmaps to the
+        position of the row holding them (a list of positions for a value held by several rows), built once per
+        snapshot
+        """
+        index = self._exclusion_indexes.get(column)
+        if index is not None:
+            return index
+        if column in self._bitmaps:
+            index = {value: position for position, value in
+                     enumerate(value for value in self.distinct_values(column) if value is not None)}
+        else:
+            index = {}
+            for position, value in enumerate(self._cells(column, np.arange(self.row_count))):
+                held = index.get(value)
+                if value is None:
+                    continue
+                if held is None:
+                    index[value] = position
+                elif isinstance(held, list):
+                    held.append(position)
+                else:
+                    index[value] = [held, position]
+        self._exclusion_indexes[column] = index
+        return index
+
+    def _bitmap_rows(self, column: str, excluded: list) -> np.ndarray:
+        """
+        ORs the bitmaps of the excluded values of a bitmap exclusion column into a boolean array of the rows they hold
+        """
+        index = self._exclusion_index(column)
+        bitmaps = [index[value] for value in excluded if value in index]
+        if not bitmaps:
+            return np.zeros(self.row_count, dtype=bool)
+        rows = np.bitwise_or.reduce(self._bitmaps[column][bitmaps], axis=0)
+        return np.unpackbits(rows, count=self.row_count).view(bool)
+
+    def _rows_of(self, column: str, excluded: list) -> list:
+        """
+        Looks up the positions of the rows holding the excluded values of an exclusion column without bitmaps
+        """
+        index = self._exclusion_index(column)
+        positions = []
+        for value in excluded:
+            held = index.get(value)
+            if isinstance(held, list):
+                positions.extend(held)
+            elif held is not None:
+                positions.append(held)
+        return positions
+
+    def range_indices(self, predicates: list, within: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Finds the rows passing every range predicate. The most selective column is sliced out of its sorted index with
+        two binary searches and the other columns are only checked on the rows of that slice, so the cost follows the
+        size of the result rather than the size of the table.
+
+        Args:
+            predicates (list): The (column, operator, value) range predicates, as returned from filter_predicates.
+            within (Optional[np.ndarray]): The positions of the only rows to check, used instead of the most selective
+                slice, None checks every row.
+
+        Returns:
+            np.ndarray: The positions of the passing rows, in no particular order.
+        """
+        bounds = {}
+        for column, operator, value in predicates:
+            low, high = bounds.get(column, (-np.inf, np.inf))
+            bounds[column] = (max(low, value), high) if operator == ">=" else (low, min(high, value))
+        if within is not None:
+            indices = np.asarray(within, dtype=np.intp)
+            for column, (low, high) in bounds.items():
+                indices = self._passing(indices, column, low, high)
+            return indices
+        if not bounds:
+            return np.arange(self.row_count)
+
+        slices = []
+        for column, (low, high) in bounds.items():
+            start = np.searchsorted(self._sorted_values[column], low, side="left")
+            end = max(start, np.searchsorted(self._sorted_values[column], high, side="right"))
+            # rows without a value pass every predicate
+            slices.append((end - start + len(self._null_indices[column]), column, start, end))
+        slices.sort()
+
+        _, column, start, end = slices[0]
+        indices = np.concatenate([self._sorted[column][start:end], self._null_indices[column]])
+        for _, column, _, _ in slices[1:]:
+            indices = self._passing(indices, column, *bounds[column])
+        return indices
+
+    def _passing(self, indices: np.ndarray, column: str, low: float, high: float) -> np.ndarray:
+        """
+        Keeps the rows whose value of a column is within [low, high] or missing
+        """
+        numbers = self._numbers[column][indices]
+        return indices[((numbers >= low) & (numbers <= high)) | self._nulls[column][indices]]
+
+    def masked_rows(self, mask: np.ndarray) -> ResultRows:
+        """
+        Builds the rows selected by a mask in the same format MysqlConnection.run_filter_query returns them
+
+        Args:
+            mask (np.ndarray): A boolean array with True for every row to return.
+
+        Returns:
+            ResultRows: The selected rows.
+        """
+        return self.rows_at(np.flatnonzero(mask))
+
+    def rows_at(self, indices: np.ndarray, columns: Optional[tuple] = None) -> ResultRows:
+        """
+        Builds the rows at the given positions, in the given order, in the format MysqlConnection.run_filter_query
+        returns them
+
+        Args:
+            indices (np.ndarray): The positions of the rows to return.
+            columns (Optional[tuple]): The columns to include in every row, None includes all of them.
+
+        Returns:
+            ResultRows: The rows, as tuples ordered like columns.
+        """
+        columns = self.columns if columns is None else [column for column in columns if column in self.columns]
+        indices = np.asarray(indices, dtype=np.intp)
+        return ResultRows(columns, list(zip(*(self._cells(column, indices) for column in columns))))
+
+    def _cells(self, column: str, indices: np.ndarray) -> list:
+        """
+        Rebuilds the cells of a column at the given positions, as the DB returned them
+        """
+        cell_type = self._cell_types.get(column)
+        if cell_type is None:
+            return self._values[column][indices].tolist()
+        nulls = self._nulls[column][indices]
+        if cell_type[0] == "text":
+            cells = self._texts(column, indices)
+        elif cell_type[0] == "tagged":
+            cells = [_TAGGED_TYPES[tag][2](text) if not null else None for tag, text, null in
+                     zip(self._tags[column][indices].tolist(), self._texts(column, indices), nulls.tolist())]
+        else:
+            cells = self._numbers_as_cells(column, indices, nulls)
+        for position in np.flatnonzero(nulls).tolist():
+            cells[position] = None
+        return cells
+
+    def _texts(self, column: str, indices: np.ndarray) -> list:
+        """
+        Decodes the text of a column at the given positions, the missing cells are empty
+        """
+        offsets = self._text_offsets[column]
+        data = memoryview(self._text_data[column])
+        starts, ends = offsets[indices].tolist(), offsets[indices + 1].tolist()
+        # rebuilding most of a column (e.g. listing its distinct values) is faster out of a single decoded str,
+        # which byte offsets only index when every character is a single byte
+        text = str(data, "utf-8") if 4 * len(indices) >= self.row_count else None
+        if text is not None and len(text) == len(data):
+            return [text[start:end] for start, end in zip(starts, ends)]
+        return [str(data[start:end], "utf-8") for start, end in zip(starts, ends)]
+
+    def _numbers_as_cells(self, column: str, indices: np.ndarray, nulls: np.ndarray) -> list:
+        """
+        Rebuilds the cells of a column kept as numbers at the given positions, the missing cells are left to clear
+        """
+        cell_type = self._cell_types[column]
+        if cell_type[0] == "float":
+            return self._numbers[column][indices].tolist()
+        # the missing cells are filled with a number every type can be built from
+        numbers = np.where(nulls, 1, self._numbers[column][indices])
+        if cell_type[0] == "decimal":
+            quantum = Decimal(1).scaleb(cell_type[1])
+            return [Decimal(number).quantize(quantum) for number in numbers.tolist()]
+        integers = numbers.astype(np.int64).tolist()
+        if cell_type[0] == "int":
+            return integers
+        if cell_type[0] == "datetime":
+            return [_EPOCH + integer * _MICROSECOND for integer in integers]
+        return [datetime.date.fromordinal(integer) for integer in integers]
+
+    def filter(self, *filter_args) -> ResultRows:
+        """
+        Runs a filter request against the snapshot, drop in replacement for MysqlConnection.run_filter_query
+
+        Args:
+            filter_args: The filter request arguments, ordered as filters.FILTER_ARGUMENT_NAMES.
+
+        Returns:
+            ResultRows: The matching rows.
+        """
+        return self.masked_rows(self.filter_mask(*filter_args))
+
+    def sorted_indices(self, mask: np.ndarray, sort_by: str = "Symbol", descending: bool = False) -> np.ndarray:
+        """
+        Orders the rows selected by a mask the same way MysqlConnection.run_filter_query orders them, text by
+        collation_key like MySQL's case & accent insensitive collations
+
+        Args:
+            mask (np.ndarray): A boolean array with True for every row to order.
+            sort_by (str): The column to order by, missing values always come last and ties are ordered by Symbol.
+            descending (bool): If to order from the highest value down.
+
+        Returns:
+            np.ndarray: The positions of the selected rows, in order.
+        """
+        indices = self._symbol_order[mask[self._symbol_order]]
+        if sort_by == "Symbol" or sort_by not in self.columns:
+            return indices[::-1] if descending else indices
+        if sort_by in self._numbers:
+            values = self._numbers[sort_by][indices]
+            # NaN (missing values) is sorted last by argsort either way
+            return indices[np.argsort(-values if descending else values, kind="stable")]
+        nulls = self._nulls[sort_by][indices]
+        present = indices[~nulls]
+        values = [collation_key(value) for value in self._cells(sort_by, present)]
+        # a stable sort, so ties stay ordered by Symbol in both directions like the ORDER BY ..., `Symbol` of the query
+        order = sorted(range(len(present)), key=values.__getitem__, reverse=descending)
+        return np.concatenate([present[order], indices[nulls]]).astype(np.intp)
+
+    def filter_page(self, page_request: PageRequest, *filter_args, columns: Optional[tuple] = None) -> ResultPage:
+        """
+        Runs a filter request against the snapshot and returns a single sorted page of its results
+
+        Args:
+            page_request (PageRequest): The page to return and the order of the results.
+            filter_args: The filter request arguments, ordered as filters.FILTER_ARGUMENT_NAMES.
+            columns (Optional[tuple]): The columns to include in every row, None includes all of them.
+
+        Returns:
+            ResultPage: The rows of the page keyed by their Symbol and the total number of matching rows.
+        """
+        return self.page(self.filter_mask(*filter_args), page_request, columns)
+
+    def page(self, mask: np.ndarray, page_request: PageRequest, columns: Optional[tuple] = None) -> ResultPage:
+        """
+        Returns a single sorted page of the rows selected by a mask
+
+        Args:
+            mask (np.ndarray): A boolean array with True for every matching row.
+            page_request (PageRequest): The page to return and the order of the results.
+            columns (Optional[tuple]): The columns to include in every row, None includes all of them.
+
+        Returns:
+            ResultPage: The rows of the page keyed by their Symbol and the total number of matching rows.
+        """
+        total = int(np.count_nonzero(mask))
+        page_request = page_request.clamp(total)
+        indices = self.sorted_indices(mask, page_request.sort_by, page_request.descending)
+        page_indices = indices[page_request.offset:page_request.offset + page_request.page_size]
+        return ResultPage(self.rows_at(page_indices, columns), total, page_request)
+
+    def save(self, path: str) -> None:
+        """
+        Writes the snapshot to a file which TableSnapshot.load maps back without copying its arrays. The file
+        is written next to path and renamed over it so readers only ever see a whole snapshot, processes that mapped
+        the file it replaced keep reading the old one until they load it again.
+
+        Args:
+            path (str): The file to write, e.g. under /dev/shm to share the snapshot between workers.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If a column holds values of a type the file can't store, see _cell_type.
+        """
+        if self._values:
+            raise ValueError("can't store the values of column {} in a snapshot file".format(next(iter(self._values))))
+        arrays = [(kind, column, array) for kind in _ARRAY_KINDS[:-1]
+                  for column, array in getattr(self, "_" + kind).items()]
+        arrays.append(("symbol_order", None, self._symbol_order))
+        layout = []
+        offset = 0
+        for kind, column, array in arrays:
+            offset = _aligned(offset)
+            layout.append((kind, column, array.dtype.str, array.size, offset))
+            offset += array.nbytes
+        update_dates = None if self.update_dates is None else \
+            {key: _encode_value(value) for key, value in self.update_dates.items()}
+        header = json.dumps({"update_dates": update_dates, "row_count": self.row_count}).encode()
+        body = json.dumps({"columns": self.columns, "layout": layout, "cell_types": self._cell_types}).encode()
+        data_start = _aligned(SNAPSHOT_FILE_PREAMBLE.size + len(header) + len(body))
+
+        temporary_path = "{}.{}.tmp".format(path, os.getpid())
+        try:
+            with open(temporary_path, "wb") as file:
+                file.write(SNAPSHOT_FILE_PREAMBLE.pack(SNAPSHOT_FILE_MAGIC, len(header), len(body)))
+                file.write(header)
+                file.write(body)
+                for (_, _, _, _, array_offset), (_, _, array) in zip(layout, arrays):
+                    file.seek(data_start + array_offset)
+                    file.write(array.tobytes())
+                file.truncate(data_start + offset)
+            os.replace(temporary_path, path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "TableSnapshot":
+        """
+        Maps a snapshot file written by TableSnapshot.save, the arrays are read only views of the mapping so every
+        process mapping the same file shares a single copy of them, cells are only rebuilt for the rows returned
+
+        Args:
+            path (str): The snapshot file.
+
+        Returns:
+            TableSnapshot: The snapshot stored in the file.
+
+        Raises:
+            ValueError: If the file isn't a snapshot file of the current layout.
+        """
+        with open(path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        header_length, body_length = _read_preamble(buffer)
+        position = SNAPSHOT_FILE_PREAMBLE.size
+        header = _read_header(buffer[position:position + header_length])
+        body = json.loads(buffer[position + header_length:position + header_length + body_length])
+        data_start = _aligned(position + header_length + body_length)
+
+        snapshot = cls.__new__(cls)
+        snapshot.columns = body["columns"]
+        snapshot.update_dates = header["update_dates"]
+        snapshot.row_count = header["row_count"]
+        snapshot._cell_types = {column: tuple(cell_type) for column, cell_type in body["cell_types"].items()}
+        snapshot._values = {}
+        for kind in _ARRAY_KINDS[:-1]:
+            setattr(snapshot, "_" + kind, {})
+        snapshot._exclusion_indexes = {}
+        for kind, column, dtype, count, offset in body["layout"]:
+            dtype = np.dtype(dtype)
+            if kind not in _ARRAY_KINDS or dtype.hasobject:
+                raise ValueError("unknown {} array in the snapshot file".format(kind))
+            if data_start + offset + dtype.itemsize * count > len(buffer):
+                raise ValueError("truncated snapshot file")
+            array = np.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + offset) if count else \
+                np.empty(0, dtype=dtype)
+            if kind == "symbol_order":
+                snapshot._symbol_order = array
+            elif kind == "bitmaps":
+                # a bitmap per value, each one a bit per row
+                width = -(-snapshot.row_count // 8)
+                snapshot._bitmaps[column] = array.reshape(count // width if width else 0, width)
+            else:
+                getattr(snapshot, "_" + kind)[column] = array
+        return snapshot
@@ -0,0 +1,140 @@
+import fcntl
+import os
+import shutil
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from .snapshot import TableSnapshot, read_update_dates
+
+
+class SnapshotStore:
+
+    def __init__(self, path: str, persistent_path: Optional[str] = None):
+        """
+            A TableSnapshot file shared by every worker of a host, only the worker that finds the file missing or stale
+            reads the table from the DB while the others wait for it & map the file it wrote.
+
+            Args:
+                path (str): The snapshot file, on a tmpfs such as /dev/shm to keep it in memory.
+                persistent_path (Optional[str]): A copy of the snapshot file on a disk that outlives the container, a
+                    restarted container boots from it when path is gone. None (or path itself) keeps no copy.
+
+            Returns:
+                None
+            """
+        self.path = path
+        self.persistent_path = persistent_path if persistent_path != path else None
+        self.lock_path = path + ".lock"
+
+    @contextmanager
+    def _locked(self) -> Iterator[bool]:
+        """
+        Holds an exclusive lock on the store across processes, released if the holder dies.
+
+        Returns:
+            bool: If the lock is held, False if the lock file can't be opened, e.g. as its directory is missing.
+        """
+        try:
+            lock_file = open(self.lock_path, "a")
+        except OSError as error:
+            print("can't lock the snapshot file {}, not sharing the snapshot: {}".format(self.path, error))
+            yield False
+            return
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def latest_update_dates(self) -> Optional[dict]:
+        """
+        Reads the version of the newest stored snapshot whatever version it is, restoring the snapshot file from its
+        persistent copy first if it's missing, so a worker can start serving before it reaches the DB.
+
+        Returns:
+            Optional[dict]: The dividend_update_times of the stored snapshot, None if no readable snapshot is stored.
+        """
+        if self.persistent_path is not None and not os.path.exists(self.path):
+            with self._locked() as locked:
+                if locked and not os.path.exists(self.path):
+                    self._restore()
+        for path in (self.path, self.persistent_path):
+            if path is None:
+                continue
+            try:
+                return read_update_dates(path)
+            except FileNotFoundError:
+                continue
+            except Exception as error:
+                print("ignoring unreadable snapshot file {}: {}".format(path, error))
+        return None
+
+    def _restore(self) -> None:
+        """
+        Copies the persistent snapshot file back to path, renaming the copy over it so readers never see half of it
+        """
+        temporary_path = "{}.{}.tmp".format(self.path, os.getpid())
+        try:
+            shutil.copyfile(self.persistent_path, temporary_path)
+            os.replace(temporary_path, self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as error:
+            print("failed restoring the snapshot file {} from {}: {}".format(self.path, self.persistent_path, error))
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def load(self, update_dates: dict) -> Optional[TableSnapshot]:
+        """
+        Maps the stored snapshot if it was taken at the given data version
+
+        Args:
+            update_dates (dict): The dividend_update_times the snapshot has to be taken at.
+
+        Returns:
+            Optional[TableSnapshot]: The stored snapshot, None if the file is missing, unreadable or of another version.
+        """
+        try:
+            if read_update_dates(self.path) != update_dates:
+                return None
+            return TableSnapshot.load(self.path)
+        except FileNotFoundError:
+            return None
+        except Exception as error:
+            print("ignoring unreadable snapshot file {}: {}".format(self.path, error))
+            return None
+
+    def load_or_build(self, update_dates: dict, build: Callable[[], TableSnapshot]) -> TableSnapshot:
+        """
+        Maps the stored snapshot of the given data version, building & storing it first if no other worker did
+
+        Args:
+            update_dates (dict): The dividend_update_times the snapshot has to be taken at.
+            build (Callable): Reads a new snapshot from the DB, only called while holding the store lock.
+
+        Returns:
+            TableSnapshot: The snapshot, the built one itself if it couldn't be stored.
+        """
+        snapshot = self.load(update_dates)
+        if snapshot is not None:
+            return snapshot
+        with self._locked() as locked:
+            if not locked:
+                return build()
+            snapshot = self.load(update_dates)
+            if snapshot is not None:
+                return snapshot
+            built = build()
+            if self.persistent_path is not None:
+                try:
+                    built.save(self.persistent_path)
+                except (OSError, ValueError) as error:
+                    print("failed writing the snapshot file {}: {}".format(self.persistent_path, error))
+            try:
+                built.save(self.path)
+            except (OSError, ValueError) as error:
+                print("failed writing the snapshot file {}: {}".format(self.path, error))
+                return built
+            return self.load(update_dates) or built
@@ -0,0 +1,203 @@
+import datetime
+from html import escape
+from typing import Callable, Iterable, Iterator, Optional
+
+from .filters import ResultRows
+
+TABLE_CLASSES = "dataframe table table-striped table-hover table-sm"
+
+# How many rows go into every chunk yielded by render_table
+ROWS_PER_CHUNK = 200
+
+# Same as pandas display.precision, the most digits a float cell is shown with
+FLOAT_PRECISION = 6
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _float_formatter(values: list) -> Callable:
+    """
+    Picks the format of a numeric column the same way pandas to_html does, every value is shown with the same number of
+    decimals (the fewest that keep all of them exact up to FLOAT_PRECISION digits) unless the column has values too small
+    or too large for that to be readable in which case they are all shown in scientific notation
+
+    :param values: the column values, None for missing values
+
+    :return formatter: a callable formatting a single value of the column
+    """
+    numbers = [float(value) for value in values if value is not None and value == value]
+    decimals = 1
+    for number in numbers:
+        fraction = "{:.{}f}".format(number, FLOAT_PRECISION).split(".")[1].rstrip("0")
+        decimals = max(decimals, len(fraction))
+    longest = max((len("{: .{}f}".format(number, decimals)) for number in numbers), default=0)
+    has_small_values = any(0 < abs(number) < 10 ** -FLOAT_PRECISION for number in numbers)
+    has_large_values = any(abs(number) > 1e6 for number in numbers)
+    if has_small_values or (longest > FLOAT_PRECISION + 6 and has_large_values):
+        number_format = "{:.%de}" % FLOAT_PRECISION
+    else:
+        number_format = "{:.%df}" % decimals
+
+    def formatter(value) -> str:
+        if value is None or value != value:
+            return "NaN"
+        return number_format.format(float(value))
+    return formatter
+
+
+def _datetime_formatter(values: list) -> Callable:
+    """
+    Picks the format of a datetime column the same way pandas to_html does, the time is only shown if any value has one
+
+    :param values: the column values, None for missing values
+
+    :return formatter: a callable formatting a single value of the column
+    """
+    has_time = any(value is not None and value.time() != datetime.time() for value in values)
+    datetime_format = "%Y-%m-%d %H:%M:%S" if has_time else "%Y-%m-%d"
+
+    def formatter(value) -> str:
+        return "NaT" if value is None else value.strftime(datetime_format)
+    return formatter
+
+
+def column_formatter(values: list) -> Callable:
+    """
+    Picks how the cells of a column are shown based on the types of its values, mirroring the dtype pandas would have
+    inferred for it when building a DataFrame out of them
+
+    :param values: the column values, None for missing values
+
+    :return formatter: a callable formatting a single value of the column
+    """
+    present = [value for value in values if value is not None]
+    if not present:
+        return str
+    if all(isinstance(value, bool) for value in present):
+        return str if len(present) == len(values) else _object_formatter
+    if all(_is_number(value) for value in present):
+        if len(present) == len(values) and all(isinstance(value, int) for value in present):
+            return str
+        return _float_formatter(values)
+    if all(isinstance(value, datetime.datetime) for value in present):
+        return _datetime_formatter(values)
+    if all(isinstance(value, str) for value in present):
+        return lambda value: "NaN" if value is None else value
+    return _object_formatter
+
+
+def _object_formatter(value) -> str:
+    return str(value)
+
+
+def _number_cell(value) -> str:
+    """
+    Formats a cell of a float column of no fixed scale on its own, with as many decimals as it needs up to
+    FLOAT_PRECISION (at least one, like pandas) or in scientific notation if it's too small to show with those
+
+    :param value: the cell, None for a missing value
+
+    :return cell: the formatted cell
+    """
+    if value is None or value != value:
+        return "NaN"
+    number = float(value)
+    if 0 < abs(number) < 10 ** -FLOAT_PRECISION:
+        return "{:.{}e}".format(number, FLOAT_PRECISION)
+    cell = "{:.{}f}".format(number, FLOAT_PRECISION).rstrip("0")
+    return cell + "0" if cell.endswith(".") else cell
+
+
+def _datetime_cell(value) -> str:
+    if value is None:
+        return "NaT"
+    return value.strftime("%Y-%m-%d" if value.time() == datetime.time() else "%Y-%m-%d %H:%M:%S")
+
+
+def type_formatter(kind: Optional[str], decimals: Optional[int] = None) -> Callable:
+    """
+    Picks how the cells of a column are shown from its type in the DB alone, unlike column_formatter which looks at all
+    of its values, so every batch of rows streamed off the DB is formatted the same way. Cells of a column with a fixed
+    scale all get its decimals, the others are formatted one by one (a float with the decimals it needs, a datetime
+    without its time at midnight). That's where streamed pages differ from the ones column_formatter formats like
+    pandas: a float column without a fixed scale doesn't share the most decimals of its values (1.5 & 2.25 rather than
+    1.50 & 2.25), an int column with missing values isn't shown as floats (5 rather than 5.0), a datetime at midnight
+    drops its time even if other rows have one and float columns of a fixed scale always show it
+
+    :param kind: the kind of cells of the column (int, float, decimal, datetime, date or text), see
+        db_functions.column_types, None for any other
+    :param decimals: the fixed number of decimals of a float or decimal column, None if it has none
+
+    :return formatter: a callable formatting a single value of the column
+    """
+    if kind in ("float", "decimal"):
+        if decimals is None:
+            return _number_cell
+        number_format = "{:.%df}" % decimals
+        return lambda value: "NaN" if value is None or value != value else number_format.format(value)
+    if kind in ("int", "text"):
+        return lambda value: "NaN" if value is None else str(value)
+    if kind == "datetime":
+        return _datetime_cell
+    if kind == "date":
+        return lambda value: "NaT" if value is None else value.isoformat()
+    return _object_formatter
+
+
+def render_table(results: ResultRows) -> Iterator[str]:
+    """
+    Renders filter results as an HTML table, the markup matches what radar_dict_to_table(results.as_dict()).to_html(...)
+    returns but rows are written straight from the result tuples in chunks of ROWS_PER_CHUNK instead of building a
+    DataFrame and a single HTML string out of them
+
+    :param results: the rows, as returned from the filter engines
+
+    :return chunks: the table markup, yielded in chunks
+    """
+    return render_batches((results,))
+
+
+def render_batches(batches: Iterable[ResultRows]) -> Iterator[str]:
+    """
+    Renders filter results arriving in batches (e.g. off an unbuffered DB cursor) as a single HTML table, holding no
+    more than a batch of rows at once. Cell formats are picked once, before the first row, from the column types of
+    the first batch (see type_formatter for how that differs from render_table) so every batch is formatted alike,
+    batches without column types get them from the values of the first batch, which only fits a single batch
+    (rendered exactly like render_table)
+
+    :param batches: the rows, at least one batch of them (which may be empty) all sharing the same column header
+
+    :return chunks: the table markup, yielded in chunks
+    """
+    chunk = None
+    for results in batches:
+        if chunk is None:
+            symbol_position = results.columns.index("Symbol")
+            positions = [position for position, column in enumerate(results.columns) if column != "Symbol"]
+            columns = [results.columns[position] for position in positions]
+
+            header = ['<table class="{}">\n  <thead>\n    <tr style="text-align: right;">\n      <th></th>\n'.format(
+                TABLE_CLASSES)]
+            for column in columns:
+                # pandas turns a None column label into NaN
+                header.append("      <th>{}</th>\n".format("nan" if column is None else escape(str(column), quote=False)))
+            header.append("    </tr>\n  </thead>\n  <tbody>\n")
+            yield "".join(header)
+            chunk = []
+            if results.column_types is not None:
+                formatters = [type_formatter(*results.column_types[position]) for position in positions]
+            else:
+                formatters = [column_formatter([row[position] for row in results.rows]) for position in positions]
+
+        for row in results.rows:
+            chunk.append("    <tr>\n      <th>{}</th>\n".format(escape(str(row[symbol_position]), quote=False)))
+            for position, formatter in zip(positions, formatters):
+                chunk.append("      <td>{}</td>\n".format(escape(formatter(row[position]), quote=False)))
+            chunk.append("    </tr>\n")
+            if len(chunk) >= ROWS_PER_CHUNK * (len(columns) + 2):
+                yield "".join(chunk)
+                chunk = []
+    chunk.append("  </tbody>\n</table>")
+    yield "".join(chunk)
@@ -0,0 +1,209 @@
+import json
+import threading
+import time
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Optional
+
+
+class RequestTiming:
+
+    def __init__(self):
+        """
+            The time a request spent in every stage of serving it, stages ran more than once (e.g. two DB queries) add
+            up under their name. Stages don't overlap: the time of a stage timed within another one (e.g. the table
+            render the template pulls its chunks from) only counts under its own name, so the stages add up to the
+            time spent.
+
+            Returns:
+                None
+            """
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def header(self) -> str:
+        """
+        Formats the spans as a Server-Timing header value, in the order they were first recorded
+
+        :return header: e.g. "db_pool;dur=0.120, db_query;dur=4.031"
+        """
+        with self._lock:
+            return ", ".join("{};dur={:.3f}".format(name, seconds * 1000) for name, seconds in self.spans.items())
+
+    def milliseconds(self) -> dict:
+        with self._lock:
+            return {name: round(seconds * 1000, 3) for name, seconds in self.spans.items()}
+
+
+# The timing of the request being served, None when timing is off, copied into the thread pool & the tasks the request
+# starts along with the rest of its context
+_current_timing: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+# The time spent in the stages timed within the innermost stage being timed, as a single item list that stage takes
+# off its own time, None outside of any stage
+_nested_time: ContextVar[Optional[list]] = ContextVar("nested_stage_time", default=None)
+
+
+def current_timing() -> Optional[RequestTiming]:
+    return _current_timing.get()
+
+
+class _Span:
+    __slots__ = ("_timing", "_name", "_started", "_nested", "_token")
+
+    def __init__(self, timing: RequestTiming, name: str):
+        self._timing = timing
+        self._name = name
+
+    def __enter__(self) -> "_Span":
+        self._nested = [0.0]
+        self._token = _nested_time.set(self._nested)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        seconds = time.perf_counter() - self._started
+        _nested_time.reset(self._token)
+        _add_own_time(self._timing, self._name, seconds, self._nested[0])
+
+
+def _add_own_time(timing: RequestTiming, name: str, seconds: float, nested_seconds: float) -> None:
+    """
+    Adds the time of a stage less that of the stages timed within it, and the whole of it to the enclosing stage's
+    nested time
+    """
+    timing.add(name, seconds - nested_seconds)
+    enclosing = _nested_time.get()
+    if enclosing is not None:
+        enclosing[0] += seconds
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str):
+    """
+    Times the block it wraps as a stage of the current request, a shared no-op when timing is off so instrumented code
+    only pays for a context variable lookup
+
+    :param name: the name of the stage, a Server-Timing metric name so no spaces
+
+    :return span: a context manager timing the block
+    """
+    timing = _current_timing.get()
+    if timing is None:
+        return _NO_SPAN
+    return _Span(timing, name)
+
+
+def record(name: str, seconds: float) -> None:
+    """
+    Adds time measured some other way to a stage of the current request, does nothing when timing is off
+
+    :param name: the name of the stage
+    :param seconds: the time spent in it
+    """
+    timing = _current_timing.get()
+    if timing is not None:
+        _add_own_time(timing, name, seconds, 0.0)
+
+
+def timed(name: str, iterable: Iterable) -> Iterator:
+    """
+    Times the time spent producing the items of a lazily consumed iterable (e.g. a streamed response body) as a stage
+    of the current request, the iterable is returned as is when timing is off
+
+    :param name: the name of the stage
+    :param iterable: the iterable
+
+    :return iterator: the items of the iterable
+    """
+    timing = _current_timing.get()
+    if timing is None:
+        return iterable
+    return _timed(timing, name, iter(iterable))
+
+
+def _timed(timing: RequestTiming, name: str, iterator: Iterator) -> Iterator:
+    try:
+        while True:
+            # every item is produced in the context of the consumer asking for it, which may run each one in another
+            # thread, so the stage is only entered around producing it
+            with _Span(timing, name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+    finally:
+        # closes what the iterator holds (e.g. a DB connection) right away when the consumer stops early
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+
+
+class ServerTimingMiddleware:
+
+    def __init__(self, app, header: bool = True, log: bool = False):
+        """
+            An ASGI middleware timing every HTTP request. The stages recorded before the response starts are sent in a
+            Server-Timing header (shown by the browser devtools) along with "app", the time until the response
+            started. Stages of a streamed body (rendering, templating) happen after the headers are sent, so they only
+            show up in the log line written once the body is done, which also has "total", the time until then. Unlike
+            the stages, which never overlap, "app" & "total" cover all of them.
+
+            Args:
+                app: The ASGI app to time.
+                header (bool): If to send the Server-Timing header.
+                log (bool): If to print a JSON line with the spans of every request.
+
+            Returns:
+                None
+            """
+        self.app = app
+        self.header = header
+        self.log = log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+        started = time.perf_counter()
+        status = None
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timing.add("app", time.perf_counter() - started)
+                if self.header:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", timing.header().encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timing.reset(token)
+            if self.log:
+                timing.add("total", time.perf_counter() - started)
+                print(json.dumps({"timing": {
+                    "method": scope["method"], "path": scope["path"], "status": status,
+                    "spans_ms": timing.milliseconds(),
+                }}))
@@ -1,10 +1,75 @@
+import os
 import sys
 import types
+import tempfile
+import asyncio
 import unittest
 import importlib
-from unittest.mock import MagicMock
+import json
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import AsyncMock, MagicMock
 
-import pandas
+from dividend_stocks_filterer.filters import DEFAULT_DISPLAY_COLUMNS, FILTER_COLUMNS, RANGE_AGGREGATES, ResultRows
+
+DEFAULT_FILTER_FORM = {
+    "min_streak_years": 5,
+    "yield_range_min": 0.0,
+    "yield_range_max": 10.0,
+    "min_dgr": 0.0,
+    "chowder_number": 0,
+    "price_range_min": 1.0,
+    "price_range_max": 500.0,
+    "fair_value": 0,
+    "min_revenue": 0.0,
+    "min_npm": 0.0,
+    "min_cf_per_share": 0.0,
+    "min_roe": 0.0,
+    "pe_range_min": -50.0,
+    "pe_range_max": 100.0,
+    "max_price_per_book_value": 10.0,
+    "max_debt_per_capital_value": 1.0,
+    "max_payout_ratio": 100.0,
+}
+
+# The slider range aggregates of the table dividend_table() builds
+RANGE_VALUES = {
+    'yield_max_raw': 10.0, '5y_yield_max': 10.0,
+    'dgr1y_min': 0.0, 'dgr1y_max': 10.0,
+    'dgr3y_min': 0.0, 'dgr3y_max': 10.0,
+    'dgr5y_min': 0.0, 'dgr5y_max': 10.0,
+    'dgr10y_min': 0.0, 'dgr10y_max': 10.0,
+    'chowder_max_raw': 10.0, 'price_max_raw': 500.0,
+    'fv_min_raw': -10.0, 'fv_max_raw': 10.0,
+    'revenue_min': 0.0, 'revenue_max': 10.0,
+    'npm_min': 0.0, 'npm_max': 10.0,
+    'cf_min': 0.0, 'cf_max': 10.0,
+    'roe_min': 0.0, 'roe_max': 10.0,
+    'pe_min_raw': -50.0, 'pe_max_raw': 100.0,
+    'pbv_min': 0.0, 'pbv_max': 10.0,
+    'debt_max_raw': 1.0,
+    'payout_ratio_max_raw': 100.0,
+}
+
+
+def dividend_table(symbols=("AAPL", "MSFT"), streaks=(1, 60), bounds=None) -> tuple:
+    """
+    Builds a fetch_dividend_table result whose first row holds the MIN and every other row the MAX of RANGE_VALUES,
+    bounds overrides the (first row, other rows) values of a column
+    """
+    columns = ["Symbol", "Sector", "Industry", "No Years"] + list(FILTER_COLUMNS[1:])
+    rows = []
+    for position, symbol in enumerate(symbols):
+        row = dict.fromkeys(columns)
+        row.update({"Symbol": symbol, "Sector": "Technology", "Industry": "Software",
+                    "No Years": streaks[min(position, 1)]})
+        for key, function, column in RANGE_AGGREGATES:
+            if function == ("MIN" if position == 0 else "MAX") or row[column] is None:
+                row[column] = RANGE_VALUES[key]
+        for column, (low, high) in (bounds or {}).items():
+            row[column] = low if position == 0 else high
+        rows.append(tuple(row[column] for column in columns))
+    return columns, rows
 
 
 class TestApp(unittest.TestCase):
@@ -16,41 +81,30 @@ class TestApp(unittest.TestCase):
             "yahoo_finance": "2024-01-02"
         }
         mock_mysql.min_max_value_of_any_stock_key.return_value = 10.0
-        mock_mysql.min_max_all_values.return_value = {
-            'yield_max_raw': 10.0, '5y_yield_max': 10.0,
-            'dgr1y_min': 0.0, 'dgr1y_max': 10.0,
-            'dgr3y_min': 0.0, 'dgr3y_max': 10.0,
-            'dgr5y_min': 0.0, 'dgr5y_max': 10.0,
-            'dgr10y_min': 0.0, 'dgr10y_max': 10.0,
-            'chowder_max_raw': 10.0, 'price_max_raw': 500.0,
-            'fv_min_raw': -10.0, 'fv_max_raw': 10.0,
-            'revenue_min': 0.0, 'revenue_max': 10.0,
-            'npm_min': 0.0, 'npm_max': 10.0,
-            'cf_min': 0.0, 'cf_max': 10.0,
-            'roe_min': 0.0, 'roe_max': 10.0,
-            'pe_min_raw': -50.0, 'pe_max_raw': 100.0,
-            'pbv_min': 0.0, 'pbv_max': 10.0,
-            'debt_max_raw': 1.0,
-            'payout_ratio_max_raw': 100.0,
-        }
-        mock_mysql.list_values_of_key_in_db.return_value = ["AAPL", "MSFT"]
-        mock_mysql.run_filter_query.return_value = {}
+        mock_mysql.fetch_dividend_table.return_value = dividend_table()
+        mock_mysql.pool_stats.return_value = {"size": 3, "active": 0, "idle": 1, "checkouts": 4}
+        mock_mysql.run_filter_query.return_value = ResultRows.from_dict({})
+        mock_mysql.count_filter_query.side_effect = lambda *args: len(mock_mysql.run_filter_query.return_value)
         self.mock_mysql = mock_mysql
 
-        mock_configure = types.ModuleType('configure')
+        mock_configure = types.ModuleType('dividend_stocks_filterer.configure')
         mock_configure.read_configurations = MagicMock(return_value={
             "db_host": "h", "db_port": 3306, "db_user": "u",
-            "db_pass": "p", "db_schema": "s", "ga_measurement_id": ""
+            "db_pass": "p", "db_schema": "s", "ga_measurement_id": "",
+            "db_pool_size": 3, "db_pool_ping_interval": 30, "db_pool_checkout_timeout": 30,
+            "db_pool_idle_timeout": 300, "db_driver": "pymysql", "db_async_pool_size": 10,
+            "db_stream_rows": False, "db_stream_batch_size": 50, "server_timing": False, "server_timing_log": False,
+            "filter_engine": "sql", "shared_snapshot_path": "", "persistent_snapshot_path": "",
+            "data_poll_interval": 60, "result_cache_max_rows": 1000, "session_memo_max_rows": 1000,
+            "fragment_cache_max_bytes": 100000, "fragment_cache_gzip": True,
+            "page_size": 100, "display_columns": ""
         })
-        mock_db_mod = types.ModuleType('db_functions')
+        mock_db_mod = types.ModuleType('dividend_stocks_filterer.db_functions')
         mock_db_mod.MysqlConnection = MagicMock(return_value=mock_mysql)
-        mock_helper = types.ModuleType('helper_functions')
-        mock_helper.radar_dict_to_table = MagicMock(return_value=pandas.DataFrame())
 
         self.mocks = {
-            'configure': mock_configure,
-            'helper_functions': mock_helper,
-            'db_functions': mock_db_mod,
+            'dividend_stocks_filterer.configure': mock_configure,
+            'dividend_stocks_filterer.db_functions': mock_db_mod,
         }
         self.saved = {k: sys.modules.get(k) for k in self.mocks}
         for k, v in self.mocks.items():
@@ -62,8 +116,10 @@ class TestApp(unittest.TestCase):
 
         from fastapi.testclient import TestClient
         self.client = TestClient(self.app_module.app)
+        self.client.__enter__()
 
     def tearDown(self):
+        self.client.__exit__(None, None, None)
         for k in self.mocks:
             if self.saved[k] is not None:
                 sys.modules[k] = self.saved[k]
@@ -134,9 +190,7 @@ class TestApp(unittest.TestCase):
         self.mock_mysql.run_filter_query.assert_called_once()
 
     def test_post_filter_returns_table_html(self):
-        self.mocks['helper_functions'].radar_dict_to_table.return_value = pandas.DataFrame(
-            {"Symbol": ["AAPL"], "Price": [150.0]}
-        )
+        self.mock_mysql.run_filter_query.return_value = ResultRows.from_dict({"AAPL": {"Symbol": "AAPL", "Price": 150.0}})
         response = self.client.post("/filter", data={
             "min_streak_years": 5,
             "yield_range_min": 0.0,
@@ -159,8 +213,7 @@ class TestApp(unittest.TestCase):
         self.assertIn("<table", response.text)
 
     def test_post_filter_empty_results(self):
-        self.mock_mysql.run_filter_query.return_value = {}
-        self.mocks['helper_functions'].radar_dict_to_table.return_value = pandas.DataFrame()
+        self.mock_mysql.run_filter_query.return_value = ResultRows.from_dict({})
         response = self.client.post("/filter", data={
             "min_streak_years": 50,
             "yield_range_min": 0.0,
@@ -283,10 +336,10 @@ class TestApp(unittest.TestCase):
             "max_price_per_book_value": 10.0,
             "max_debt_per_capital_value": 1.0,
             "max_payout_ratio": 100.0,
-            "excluded_industries": ["Banking"],
+            "excluded_industries": ["Software"],
         })
         args = self.mock_mysql.run_filter_query.call_args
-        self.assertIn("Banking", args[0][19])
+        self.assertIn("Software", args[0][19])
 
     # ── Structural / Layout ──────────────────────────────────────────────
 
@@ -411,9 +464,9 @@ class TestApp(unittest.TestCase):
         self.assertIn('100.0', response.text)
 
     def test_post_filter_row_count_in_response(self):
-        self.mocks['helper_functions'].radar_dict_to_table.return_value = pandas.DataFrame(
-            {"Symbol": ["AAPL", "MSFT"], "Price": [150.0, 300.0]}
-        )
+        self.mock_mysql.run_filter_query.return_value = ResultRows.from_dict({
+            "AAPL": {"Symbol": "AAPL", "Price": 150.0}, "MSFT": {"Symbol": "MSFT", "Price": 300.0}
+        })
         response = self.client.post("/filter", data={
             "min_streak_years": 5,
             "yield_range_min": 0.0,
@@ -434,3 +487,655 @@ class TestApp(unittest.TestCase):
             "max_payout_ratio": 100.0,
         })
         self.assertIn("2 stock(s) found", response.text)
+
+    # ── Ranges lifecycle ──────────────────────────────────────────────
+
+    def test_import_does_not_query_db(self):
+        self.mock_mysql.fetch_dividend_table.reset_mock()
+        sys.modules.pop('dividend_stocks_filterer.app', None)
+        importlib.import_module('dividend_stocks_filterer.app')
+        self.mock_mysql.fetch_dividend_table.assert_not_called()
+
+    def test_startup_reads_ranges_from_one_table_scan(self):
+        self.mock_mysql.fetch_dividend_table.assert_called_once()
+        self.mock_mysql.min_max_all_values.assert_not_called()
+        self.mock_mysql.list_values_of_key_in_db.assert_not_called()
+        self.mock_mysql.column_bounds.assert_not_called()
+        ranges = self.app_module.ranges.value
+        self.assertEqual(ranges["symbols"], ["AAPL", "MSFT"])
+        self.assertEqual(ranges["sectors"], ["Technology"])
+        self.assertEqual(ranges["price_max"], 500.0)
+        self.assertEqual(ranges["column_bounds"]["P/E"], (-50.0, 100.0))
+
+    def test_startup_survives_db_errors(self):
+        table = self.mock_mysql.fetch_dividend_table.return_value
+        self.mock_mysql.fetch_dividend_table.side_effect = [Exception("db down"), table]
+        sys.modules.pop('dividend_stocks_filterer.app', None)
+        app_module = importlib.import_module('dividend_stocks_filterer.app')
+        from fastapi.testclient import TestClient
+        with TestClient(app_module.app) as client:
+            self.assertIsNone(app_module.ranges)
+            response = client.get("/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(app_module.ranges.version, 1)
+
+    def test_data_change_rebuilds_ranges(self):
+        self.assertEqual(self.app_module.ranges.version, 1)
+        self.mock_mysql.fetch_dividend_table.return_value = dividend_table(("AAPL", "MSFT", "NEWCO"))
+        self.mock_mysql.check_db_update_dates.return_value = {"radar_file": "2024-02-01"}
+        asyncio.run(self.app_module.watcher.check())
+        self.assertEqual(self.app_module.ranges.version, 2)
+        self.assertIn('<option value="NEWCO">NEWCO</option>', self.client.get("/").text)
+
+    # ── In memory filter engine ───────────────────────────────────────
+
+    def _use_memory_engine(self):
+        self.mock_mysql.fetch_dividend_table.return_value = dividend_table(
+            ("AAPL", "KO"), streaks=(11, 61), bounds={"FV %": (-10.0, 0.0)})
+        self.mock_mysql.fetch_dividend_table.reset_mock()
+        self.app_module.configuration["filter_engine"] = "memory"
+        self.app_module.snapshot = None
+
+    def test_post_filter_memory_engine_skips_db_query(self):
+        self._use_memory_engine()
+        self.mock_mysql.run_filter_query.reset_mock()
+        response = self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.assertEqual(response.status_code, 200)
+        self.mock_mysql.run_filter_query.assert_not_called()
+        self.mock_mysql.fetch_dividend_table.assert_called_once()
+
+    def test_post_filter_memory_engine_loads_snapshot_once(self):
+        self._use_memory_engine()
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.mock_mysql.fetch_dividend_table.assert_called_once()
+
+    def test_post_filter_memory_engine_applies_filters(self):
+        self._use_memory_engine()
+        response = self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "min_streak_years": 20})
+        self.assertIn("<th>KO</th>", response.text)
+        self.assertNotIn("<th>AAPL</th>", response.text)
+
+    # ── Data version watcher ──────────────────────────────────────────
+
+    def test_startup_publishes_first_data_version(self):
+        self.assertEqual(self.app_module.watcher.version, 1)
+        self.assertEqual(self.app_module.watcher.update_dates["radar_file"], "2024-01-01")
+
+    def test_index_does_not_query_update_dates(self):
+        self.mock_mysql.check_db_update_dates.reset_mock()
+        response = self.client.get("/")
+        self.assertIn("2024-01-01", response.text)
+        self.mock_mysql.check_db_update_dates.assert_not_called()
+
+    def test_data_change_reloads_snapshot(self):
+        self._use_memory_engine()
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        old_snapshot = self.app_module.snapshot
+        self.mock_mysql.check_db_update_dates.return_value = {"radar_file": "2024-02-01"}
+        self.assertTrue(asyncio.run(self.app_module.watcher.check()))
+        self.assertEqual(self.app_module.watcher.version, 2)
+        self.assertIsNot(self.app_module.snapshot.value, old_snapshot.value)
+        self.assertEqual(self.app_module.snapshot.version, 2)
+        self.assertEqual(self.app_module.snapshot.value.update_dates, {"radar_file": "2024-02-01"})
+        self.assertIn("2024-02-01", self.client.get("/").text)
+
+    def test_shared_snapshot_is_read_from_db_once_per_version(self):
+        from dividend_stocks_filterer.snapshot_store import SnapshotStore
+        with tempfile.TemporaryDirectory() as directory:
+            self.app_module.snapshot_store = SnapshotStore(os.path.join(directory, "snapshot"))
+            self.mock_mysql.fetch_dividend_table.reset_mock()
+            first = self.app_module.load_snapshot({"radar_file": "2024-02-01"})
+            second = self.app_module.load_snapshot({"radar_file": "2024-02-01"})
+            self.mock_mysql.fetch_dividend_table.assert_called_once()
+            self.assertEqual(second.update_dates, {"radar_file": "2024-02-01"})
+            self.assertEqual(second.distinct_values("Symbol"), first.distinct_values("Symbol"))
+            self.app_module.load_snapshot({"radar_file": "2024-03-01"})
+            self.assertEqual(self.mock_mysql.fetch_dividend_table.call_count, 2)
+
+    def test_warm_start_serves_stored_snapshot_without_db(self):
+        from dividend_stocks_filterer.snapshot import TableSnapshot
+        with tempfile.TemporaryDirectory() as directory:
+            persistent_path = os.path.join(directory, "persistent.snapshot")
+            TableSnapshot(*dividend_table(("AAPL", "STORED")), {"radar_file": "2023-12-01"}).save(persistent_path)
+            configuration = self.mocks['dividend_stocks_filterer.configure'].read_configurations.return_value
+            configuration["shared_snapshot_path"] = os.path.join(directory, "shared.snapshot")
+            configuration["persistent_snapshot_path"] = persistent_path
+            self.mock_mysql.check_db_update_dates.side_effect = Exception("db down")
+            self.mock_mysql.fetch_dividend_table.reset_mock()
+            sys.modules.pop('dividend_stocks_filterer.app', None)
+            app_module = importlib.import_module('dividend_stocks_filterer.app')
+            from fastapi.testclient import TestClient
+            with TestClient(app_module.app) as client:
+                self.assertEqual(app_module.ranges.version, 1)
+                self.assertEqual(app_module.watcher.update_dates, {"radar_file": "2023-12-01"})
+                response = client.get("/")
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('<option value="STORED">STORED</option>', response.text)
+            self.mock_mysql.fetch_dividend_table.assert_not_called()
+            self.assertTrue(os.path.exists(configuration["shared_snapshot_path"]))
+
+    def test_data_change_saves_persistent_snapshot(self):
+        from dividend_stocks_filterer.snapshot import read_update_dates
+        from dividend_stocks_filterer.snapshot_store import SnapshotStore
+        with tempfile.TemporaryDirectory() as directory:
+            persistent_path = os.path.join(directory, "persistent.snapshot")
+            self.app_module.snapshot_store = SnapshotStore(os.path.join(directory, "shared.snapshot"), persistent_path)
+            self.mock_mysql.check_db_update_dates.return_value = {"radar_file": "2024-02-01"}
+            asyncio.run(self.app_module.watcher.check())
+            self.assertEqual(read_update_dates(persistent_path), {"radar_file": "2024-02-01"})
+
+    def test_memory_engine_sets_session_cookie(self):
+        self._use_memory_engine()
+        response = self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.assertIn("divifilter_session", response.cookies)
+        self.assertNotIn("divifilter_session", self.client.post("/filter", data=DEFAULT_FILTER_FORM).cookies)
+
+    def test_sql_engine_sets_no_session_cookie(self):
+        response = self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.assertNotIn("divifilter_session", response.cookies)
+
+    def test_narrowing_request_refilters_previous_results(self):
+        self._use_memory_engine()
+        self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "min_streak_years": 10})
+        table = self.app_module.snapshot.value
+        table.filter_mask = MagicMock(wraps=table.filter_mask)
+        response = self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "min_streak_years": 20})
+        self.assertIn("<th>KO</th>", response.text)
+        self.assertNotIn("<th>AAPL</th>", response.text)
+        self.assertEqual(table.filter_mask.call_args[1]["within"].tolist(), [0, 1])
+        self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "min_streak_years": 5})
+        self.assertIsNone(table.filter_mask.call_args[1]["within"])
+
+    def test_session_memo_is_only_reused_on_its_snapshot(self):
+        self._use_memory_engine()
+        self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "min_streak_years": 10})
+        session_id = self.client.cookies["divifilter_session"]
+        filter_args = self.app_module.session_results.get(session_id)[1]
+        old_snapshot = self.app_module.snapshot
+        # the data changes to a smaller table while a request keyed on the old version waits for its run
+        self.mock_mysql.fetch_dividend_table.return_value = dividend_table(
+            ("KO",), streaks=(61,), bounds={"FV %": (-10.0, 0.0)})
+        self.mock_mysql.check_db_update_dates.return_value = {"radar_file": "2024-02-01"}
+        asyncio.run(self.app_module.watcher.check())
+        table = self.app_module.snapshot.value
+        table.filter_mask = MagicMock(wraps=table.filter_mask)
+        requested_page = self.app_module.page_request("", "", 1, 0, 100)
+        results = asyncio.run(self.app_module.run_filter((1, filter_args, requested_page, ("Symbol",)), session_id))
+        self.assertIsNone(table.filter_mask.call_args[1]["within"])
+        self.assertEqual(results.rows.rows, [("KO",)])
+        # a request that captured the old snapshot when it started still runs on it
+        results = asyncio.run(self.app_module.run_filter((1, filter_args, requested_page, ("Symbol",)), session_id,
+                                                         old_snapshot))
+        self.assertEqual(results.rows.rows, [("AAPL",), ("KO",)])
+
+    def test_data_change_memory_engine_scans_table_once(self):
+        self._use_memory_engine()
+        self.mock_mysql.check_db_update_dates.return_value = {"radar_file": "2024-02-01"}
+        asyncio.run(self.app_module.watcher.check())
+        self.mock_mysql.fetch_dividend_table.assert_called_once()
+        self.assertEqual(self.app_module.ranges.value["symbols"], ["AAPL", "KO"])
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.mock_mysql.fetch_dividend_table.assert_called_once()
+
+    # ── Result cache ──────────────────────────────────────────────────
+
+    def test_post_filter_repeated_request_hits_cache(self):
+        self.mock_mysql.run_filter_query.reset_mock()
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.app_module.fragment_cache.clear()
+        self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "yield_range_min": 0.00001})
+        self.mock_mysql.run_filter_query.assert_called_once()
+        self.assertEqual(self.app_module.result_cache.hits, 1)
+
+    def test_post_filter_exclusion_order_hits_cache(self):
+        self.mock_mysql.run_filter_query.reset_mock()
+        self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "excluded_symbols": ["AAPL", "MSFT"]})
+        self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "excluded_symbols": ["MSFT", "AAPL"]})
+        self.mock_mysql.run_filter_query.assert_called_once()
+
+    def test_post_filter_different_request_misses_cache(self):
+        self.mock_mysql.run_filter_query.reset_mock()
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "min_streak_years": 10})
+        self.assertEqual(self.mock_mysql.run_filter_query.call_count, 2)
+
+    def test_data_change_invalidates_result_cache(self):
+        self.mock_mysql.run_filter_query.reset_mock()
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.mock_mysql.check_db_update_dates.return_value = {"radar_file": "2024-02-01"}
+        asyncio.run(self.app_module.watcher.check())
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.assertEqual(self.mock_mysql.run_filter_query.call_count, 2)
+
+    def test_stats_reports_cache_counters(self):
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        response = self.client.get("/stats")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data_version"], 1)
+        self.assertEqual(response.json()["result_cache"]["misses"], 1)
+        self.assertEqual(response.json()["fragment_cache"]["hits"], 1)
+        self.assertEqual(response.json()["fragment_cache"]["misses"], 1)
+        self.assertEqual(response.json()["filter_flights"], {"in_flight": 0, "calls": 1, "shared": 0})
+
+    # ── Request coalescing ────────────────────────────────────────────
+
+    def test_concurrent_identical_filters_share_one_query(self):
+        async_db = self._use_async_db()
+
+        async def slow_query(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            return {"KO": {"Symbol": "KO", "Price": 60.0}}
+        async_db.run_filter_query.side_effect = slow_query
+        cache_key = (1, tuple(DEFAULT_FILTER_FORM.values()) + ((), (), ()),
+                     self.app_module.page_request("", "", 1, 0, 100), DEFAULT_DISPLAY_COLUMNS)
+
+        async def run_concurrently():
+            return await asyncio.gather(*[self.app_module.filter_results(cache_key) for _ in range(5)])
+        results = asyncio.run(run_concurrently())
+        async_db.run_filter_query.assert_awaited_once()
+        self.assertEqual([result.total for result in results], [1] * 5)
+        self.assertEqual(self.app_module.filter_flights.stats(), {"in_flight": 0, "calls": 1, "shared": 4})
+
+    # ── Rendered fragment cache ───────────────────────────────────────
+
+    def test_post_filter_repeated_request_skips_rendering(self):
+        self.mock_mysql.run_filter_query.return_value = ResultRows.from_dict({"AAPL": {"Symbol": "AAPL", "Price": 150.0}})
+        first = self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        second = self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.assertEqual(self.app_module.result_cache.stats()["misses"], 1)
+        self.assertEqual(self.app_module.result_cache.stats()["hits"], 0)
+        self.assertEqual(first.text, second.text)
+        self.assertIn("1 stock(s) found", second.text)
+        self.assertEqual(self.app_module.fragment_cache.hits, 1)
+
+    def test_post_filter_gzip_when_accepted(self):
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        response = self.client.post("/filter", data=DEFAULT_FILTER_FORM, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertIn("No stocks match your filters", response.text)
+
+    def test_post_filter_plain_when_gzip_not_accepted(self):
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        response = self.client.post("/filter", data=DEFAULT_FILTER_FORM, headers={"Accept-Encoding": "identity"})
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertIn("No stocks match your filters", response.text)
+
+    def test_post_filter_plain_when_gzip_refused(self):
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        for accept_encoding in ("gzip;q=0", "br, gzip; q=0.000", "x-gzip-foo", "deflate, *;q=0"):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.client.post("/filter", data=DEFAULT_FILTER_FORM,
+                                            headers={"Accept-Encoding": accept_encoding})
+                self.assertNotIn("content-encoding", response.headers)
+                self.assertIn("No stocks match your filters", response.text)
+
+    def test_accepts_gzip(self):
+        for accept_encoding, accepted in (("gzip", True), ("GZIP;q=0.5", True), ("br;q=1.0, gzip;q=0.8", True),
+                                          ("x-gzip", True), ("*", True), ("gzip;q=0, *", False),
+                                          ("gzip;q=0", False), ("x-gzip-foo", False), ("", False),
+                                          ("deflate, *;q=0", False), ("gzip;q=bad", False)):
+            with self.subTest(accept_encoding=accept_encoding):
+                self.assertEqual(self.app_module.accepts_gzip(accept_encoding), accepted)
+
+    def test_data_change_invalidates_fragment_cache(self):
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.mock_mysql.check_db_update_dates.return_value = {"radar_file": "2024-02-01"}
+        asyncio.run(self.app_module.watcher.check())
+        self.assertEqual(len(self.app_module.fragment_cache), 0)
+
+    def test_post_filter_streamed_table_matches_cached_table(self):
+        self.mock_mysql.run_filter_query.return_value = ResultRows.from_dict({
+            "AAPL": {"Symbol": "AAPL", "Company": "Apple & Co", "Price": 150.0, "No Years": 11},
+            "KO": {"Symbol": "KO", "Company": "Coca-Cola", "Price": None, "No Years": 61},
+        })
+        streamed = self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        cached = self.client.post("/filter", data=DEFAULT_FILTER_FORM, headers={"Accept-Encoding": "identity"})
+        self.assertEqual(streamed.text, cached.text)
+        self.assertIn("<td>Apple &amp; Co</td>", streamed.text)
+        self.assertIn("<td>NaN</td>", streamed.text)
+
+    def test_post_filter_too_big_for_fragment_cache_is_not_cached(self):
+        self.app_module.fragment_cache.max_weight = 10
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.assertEqual(len(self.app_module.fragment_cache), 0)
+
+    def test_app_does_not_import_pandas_helpers(self):
+        self.assertFalse(hasattr(self.app_module, "radar_dict_to_table"))
+
+    # ── Pagination & sorting ──────────────────────────────────────────
+
+    def test_post_filter_forwards_default_page(self):
+        self.mock_mysql.run_filter_query.reset_mock()
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        kwargs = self.mock_mysql.run_filter_query.call_args[1]
+        self.assertEqual(kwargs, {
+            "sort_by": "Symbol", "descending": False, "limit": 100, "offset": 0, "columns": DEFAULT_DISPLAY_COLUMNS
+        })
+
+    def test_post_filter_forwards_sort_and_page(self):
+        self.mock_mysql.run_filter_query.return_value = ResultRows(("Symbol",), [("S{}".format(i),) for i in range(60)])
+        self.mock_mysql.run_filter_query.reset_mock()
+        self.client.post("/filter", data={
+            **DEFAULT_FILTER_FORM, "sort_by": "Price", "sort_dir": "desc", "page": 2, "page_size": 25
+        })
+        kwargs = self.mock_mysql.run_filter_query.call_args[1]
+        self.assertEqual(kwargs["sort_by"], "Price")
+        self.assertTrue(kwargs["descending"])
+        self.assertEqual((kwargs["limit"], kwargs["offset"]), (25, 25))
+
+    def test_post_filter_ignores_unknown_sort_column(self):
+        self.mock_mysql.run_filter_query.reset_mock()
+        self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "sort_by": "Price`; DROP TABLE x", "page_size": 7})
+        kwargs = self.mock_mysql.run_filter_query.call_args[1]
+        self.assertEqual(kwargs["sort_by"], "Symbol")
+        self.assertEqual(kwargs["limit"], 100)
+
+    def test_post_filter_page_past_the_end_is_clamped(self):
+        self.mock_mysql.run_filter_query.return_value = ResultRows.from_dict({"AAPL": {"Symbol": "AAPL", "Price": 150.0}})
+        self.mock_mysql.run_filter_query.reset_mock()
+        response = self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "page": 9})
+        self.assertEqual(self.mock_mysql.run_filter_query.call_args[1]["offset"], 0)
+        self.assertIn("showing 1&ndash;1", response.text)
+
+    def test_post_filter_shows_pagination_controls(self):
+        self.mock_mysql.run_filter_query.return_value = ResultRows(("Symbol",), [("S{}".format(i),) for i in range(30)])
+        response = self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "page_size": 25})
+        self.assertIn("30 stock(s) found", response.text)
+        self.assertIn("1 / 2", response.text)
+        self.assertIn('hx-vals=\'{"page": 2}\'', response.text)
+
+    def test_post_filter_single_page_has_no_pagination_controls(self):
+        self.mock_mysql.run_filter_query.return_value = ResultRows.from_dict({"AAPL": {"Symbol": "AAPL", "Price": 150.0}})
+        response = self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.assertNotIn("pagination", response.text)
+
+    def test_post_filter_pages_are_cached_separately(self):
+        self.mock_mysql.run_filter_query.reset_mock()
+        self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "page": 1})
+        self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "sort_by": "Price"})
+        self.assertEqual(self.mock_mysql.run_filter_query.call_count, 2)
+
+    def test_post_filter_memory_engine_sorts_and_pages(self):
+        self._use_memory_engine()
+        response = self.client.post("/filter", data={
+            **DEFAULT_FILTER_FORM, "sort_by": "No Years", "sort_dir": "desc", "page_size": 25
+        })
+        self.assertLess(response.text.index("<th>KO</th>"), response.text.index("<th>AAPL</th>"))
+        self.assertIn('data-sort-by="No Years" data-sort-dir="desc"', response.text)
+
+    def test_index_contains_sort_and_page_inputs(self):
+        response = self.client.get("/")
+        self.assertIn('name="sort_by"', response.text)
+        self.assertIn('name="sort_dir"', response.text)
+        self.assertIn('name="page_size" value="100"', response.text)
+
+    # ── Column projection ─────────────────────────────────────────────
+
+    def test_post_filter_forwards_picked_columns(self):
+        self.mock_mysql.run_filter_query.reset_mock()
+        self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "columns": ["Price", "Company", "Bogus"]})
+        kwargs = self.mock_mysql.run_filter_query.call_args[1]
+        self.assertEqual(kwargs["columns"], ("Symbol", "Company", "Price"))
+
+    def test_post_filter_column_order_hits_cache(self):
+        self.mock_mysql.run_filter_query.reset_mock()
+        self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "columns": ["Price", "Company"]})
+        self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "columns": ["Company", "Price"]})
+        self.mock_mysql.run_filter_query.assert_called_once()
+
+    def test_post_filter_memory_engine_projects_columns(self):
+        self._use_memory_engine()
+        response = self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "columns": ["No Years"]})
+        self.assertIn("<th>No Years</th>", response.text)
+        self.assertNotIn("<th>Sector</th>", response.text)
+        self.assertNotIn("<th>Price</th>", response.text)
+
+    def test_index_contains_column_picker(self):
+        response = self.client.get("/")
+        self.assertIn('name="columns"', response.text)
+        self.assertIn('<option value="Company" selected>Company</option>', response.text)
+        self.assertIn('<option value="PEG">PEG</option>', response.text)
+        self.assertNotIn('<option value="Symbol"', response.text)
+
+    # ── No-op predicate pruning ───────────────────────────────────────
+
+    def _memory_filter_calls(self, *forms) -> list:
+        table = self.app_module.snapshot.value
+        table.filter_mask = MagicMock(wraps=table.filter_mask)
+        for form in forms:
+            self.client.post("/filter", data=form)
+        return [call[0] for call in table.filter_mask.call_args_list]
+
+    def test_post_filter_prunes_predicates_outside_the_data(self):
+        self._use_memory_engine()
+        self.mock_mysql.fetch_dividend_table.return_value = dividend_table(bounds={"Price": (5.0, 400.0)})
+        self.mock_mysql.check_db_update_dates.return_value = {"radar_file": "2024-02-01"}
+        asyncio.run(self.app_module.watcher.check())
+        args, = self._memory_filter_calls(DEFAULT_FILTER_FORM)
+        self.assertEqual(args[0], 5)
+        self.assertIsNone(args[5])
+        self.assertIsNone(args[6])
+
+    def test_post_filter_pruned_requests_share_cache(self):
+        self._use_memory_engine()
+        self.mock_mysql.fetch_dividend_table.return_value = dividend_table(bounds={"Price": (5.0, 400.0)})
+        self.mock_mysql.check_db_update_dates.return_value = {"radar_file": "2024-02-01"}
+        asyncio.run(self.app_module.watcher.check())
+        calls = self._memory_filter_calls(DEFAULT_FILTER_FORM, {**DEFAULT_FILTER_FORM, "price_range_max": 450.0})
+        self.assertEqual(len(calls), 1)
+
+    def test_post_filter_drops_exclusions_outside_the_data(self):
+        self._use_memory_engine()
+        self.mock_mysql.check_db_update_dates.return_value = {"radar_file": "2024-02-01"}
+        asyncio.run(self.app_module.watcher.check())
+        args, = self._memory_filter_calls({**DEFAULT_FILTER_FORM, "excluded_symbols": ["KO", "GONE"],
+                                           "excluded_industries": ["Banking"]})
+        self.assertEqual(args[17], ("KO",))
+        self.assertEqual(args[19], ())
+
+    def test_post_filter_unknown_exclusions_share_cache(self):
+        self._use_memory_engine()
+        self.mock_mysql.check_db_update_dates.return_value = {"radar_file": "2024-02-01"}
+        asyncio.run(self.app_module.watcher.check())
+        calls = self._memory_filter_calls({**DEFAULT_FILTER_FORM, "excluded_symbols": ["KO"]},
+                                          {**DEFAULT_FILTER_FORM, "excluded_symbols": ["KO", "GONE", "ALSO GONE"]})
+        self.assertEqual(len(calls), 1)
+
+    def test_post_filter_sql_engine_does_not_prune(self):
+        # the live table may already hold rows the snapshot the bounds came from doesn't
+        self.mock_mysql.fetch_dividend_table.return_value = dividend_table(bounds={"Price": (5.0, 400.0)})
+        self.mock_mysql.check_db_update_dates.return_value = {"radar_file": "2024-02-01"}
+        asyncio.run(self.app_module.watcher.check())
+        self.mock_mysql.run_filter_query.reset_mock()
+        self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "excluded_symbols": ["GONE"]})
+        args = self.mock_mysql.run_filter_query.call_args[0]
+        self.assertEqual((args[5], args[6]), (1.0, 500.0))
+        self.assertEqual(args[17], ("GONE",))
+
+    # ── Async DB driver ───────────────────────────────────────────────
+
+    def _use_async_db(self):
+        async_db = MagicMock()
+        async_db.run_filter_query = AsyncMock(return_value=ResultRows.from_dict({"KO": {"Symbol": "KO", "Price": 60.0}}))
+        async_db.count_filter_query = AsyncMock(return_value=1)
+        async_db.run_sql_query = AsyncMock(return_value=[(1,)])
+        async_db.close = AsyncMock()
+        async_db.check_db_update_dates = AsyncMock(return_value=self.mock_mysql.check_db_update_dates.return_value)
+        self.app_module.async_db = async_db
+        return async_db
+
+    def test_pymysql_driver_has_no_async_db(self):
+        self.assertIsNone(self.app_module.async_db)
+
+    def test_post_filter_async_driver_skips_thread_pool_query(self):
+        async_db = self._use_async_db()
+        self.mock_mysql.run_filter_query.reset_mock()
+        response = self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "page_size": 25})
+        self.assertIn("<th>KO</th>", response.text)
+        self.mock_mysql.run_filter_query.assert_not_called()
+        self.assertEqual(async_db.run_filter_query.call_args[1]["limit"], 25)
+        async_db.count_filter_query.assert_awaited_once()
+
+    def test_health_async_driver(self):
+        async_db = self._use_async_db()
+        response = self.client.get("/health")
+        self.assertEqual(response.status_code, 200)
+        async_db.run_sql_query.assert_awaited_once_with("SELECT 1")
+
+    def test_db_call_falls_back_to_thread_pool(self):
+        async_db = self._use_async_db()
+        del async_db.min_max_all_values
+        result = asyncio.run(self.app_module.db_call("min_max_all_values"))
+        self.assertEqual(result, self.mock_mysql.min_max_all_values.return_value)
+
+    # ── Streamed DB rows ──────────────────────────────────────────────
+
+    def _use_streamed_rows(self, rows: ResultRows):
+        self.app_module.configuration["db_stream_rows"] = True
+        self.mock_mysql.count_filter_query.side_effect = None
+        self.mock_mysql.count_filter_query.return_value = len(rows)
+        self.mock_mysql.stream_filter_query.side_effect = lambda *args, **kwargs: iter(
+            [ResultRows(rows.columns, rows.rows[:1]), ResultRows(rows.columns, rows.rows[1:])])
+
+    def test_post_filter_streamed_rows_match_buffered_rows(self):
+        rows = ResultRows.from_dict({
+            "AAPL": {"Symbol": "AAPL", "Company": "Apple & Co", "No Years": 11},
+            "KO": {"Symbol": "KO", "Company": "Coca-Cola", "No Years": 61},
+        })
+        self.mock_mysql.run_filter_query.return_value = rows
+        buffered = self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.app_module.fragment_cache.clear()
+        self._use_streamed_rows(rows)
+        self.mock_mysql.run_filter_query.reset_mock()
+        streamed = self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.assertEqual(streamed.text, buffered.text)
+        self.assertIn("2 stock(s) found", streamed.text)
+        self.mock_mysql.run_filter_query.assert_not_called()
+
+    def test_post_filter_streamed_rows_forward_page_and_batch_size(self):
+        self._use_streamed_rows(ResultRows(("Symbol",), [("S{}".format(i),) for i in range(30)]))
+        response = self.client.post("/filter", data={**DEFAULT_FILTER_FORM, "page_size": 25, "page": 2,
+                                                     "sort_by": "Price", "sort_dir": "desc"})
+        self.assertIn("showing 26&ndash;30", response.text)
+        kwargs = self.mock_mysql.stream_filter_query.call_args[1]
+        self.assertEqual((kwargs["sort_by"], kwargs["descending"]), ("Price", True))
+        self.assertEqual((kwargs["limit"], kwargs["offset"]), (25, 25))
+        self.assertEqual(kwargs["batch_size"], 50)
+
+    def test_post_filter_streamed_rows_skip_result_cache(self):
+        self._use_streamed_rows(ResultRows(("Symbol",), [("AAPL",)]))
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.assertEqual(len(self.app_module.result_cache), 0)
+        self.assertEqual(len(self.app_module.fragment_cache), 1)
+        self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.mock_mysql.stream_filter_query.assert_called_once()
+
+    def _use_failing_stream(self, failing_batch: int) -> list:
+        self._use_streamed_rows(ResultRows(("Symbol",), [("AAPL",), ("KO",)]))
+        released = []
+
+        def batches(*args, **kwargs):
+            try:
+                for batch_number in range(2):
+                    if batch_number == failing_batch:
+                        raise ConnectionError("lost connection to MySQL server")
+                    yield ResultRows(("Symbol",), [("S{}".format(batch_number),)])
+            finally:
+                released.append(True)
+
+        self.mock_mysql.stream_filter_query.side_effect = batches
+        return released
+
+    def test_post_filter_streamed_rows_error_on_first_batch(self):
+        released = self._use_failing_stream(0)
+        from fastapi.testclient import TestClient
+        client = TestClient(self.app_module.app, raise_server_exceptions=False)
+        response = client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn("stock(s) found", response.text)
+        self.assertEqual(released, [True])
+        self.assertEqual(len(self.app_module.fragment_cache), 0)
+
+    def test_post_filter_streamed_rows_error_on_later_batch(self):
+        released = self._use_failing_stream(1)
+        from fastapi.testclient import TestClient
+        client = TestClient(self.app_module.app, raise_server_exceptions=False)
+        response = client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn("S0", response.text)
+        self.assertEqual(released, [True])
+        self.assertEqual(len(self.app_module.fragment_cache), 0)
+
+    def test_post_filter_streamed_rows_release_connection_before_sending(self):
+        released = self._use_failing_stream(2)
+        request = MagicMock(headers={})
+        cache_key = (1, ("args",), self.app_module.PageRequest(), ("Symbol",))
+        response = asyncio.run(self.app_module.stream_filter_response(request, cache_key))
+        self.assertEqual(released, [True])
+        self.assertIn("<th>S1</th>", response.body.decode("utf-8"))
+
+    def test_post_filter_memory_engine_ignores_streamed_rows(self):
+        self._use_memory_engine()
+        self._use_streamed_rows(ResultRows(("Symbol",), []))
+        response = self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.assertIn("<th>KO</th>", response.text)
+        self.mock_mysql.stream_filter_query.assert_not_called()
+
+    # ── DB connection pool ────────────────────────────────────────────
+
+    def test_db_connection_uses_pool_settings(self):
+        kwargs = self.mocks['dividend_stocks_filterer.db_functions'].MysqlConnection.call_args[1]
+        self.assertEqual(kwargs["pool_size"], 3)
+        self.assertEqual(kwargs["pool_ping_interval"], 30)
+        self.assertEqual(kwargs["pool_checkout_timeout"], 30)
+        self.assertEqual(kwargs["pool_idle_timeout"], 300)
+
+    def test_stats_reports_db_pool(self):
+        response = self.client.get("/stats")
+        self.assertEqual(response.json()["db_pool"], {"size": 3, "active": 0, "idle": 1, "checkouts": 4})
+        self.assertIsNone(response.json()["async_db_pool"])
+
+    def test_stats_reports_async_db_pool(self):
+        async_db = self._use_async_db()
+        async_db.pool_stats.return_value = {"size": 10, "active": 2, "idle": 1}
+        response = self.client.get("/stats")
+        self.assertEqual(response.json()["async_db_pool"], {"size": 10, "active": 2, "idle": 1})
+
+    # ── Server-Timing ─────────────────────────────────────────────────
+
+    def _reload_app(self, **configuration):
+        self.client.__exit__(None, None, None)
+        self.mocks['dividend_stocks_filterer.configure'].read_configurations.return_value.update(configuration)
+        sys.modules.pop('dividend_stocks_filterer.app', None)
+        self.app_module = importlib.import_module('dividend_stocks_filterer.app')
+        from fastapi.testclient import TestClient
+        self.client = TestClient(self.app_module.app)
+        self.client.__enter__()
+
+    def test_no_server_timing_header_by_default(self):
+        response = self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.assertNotIn("server-timing", response.headers)
+
+    def test_server_timing_header(self):
+        self._reload_app(server_timing=True)
+        self._use_memory_engine()
+        response = self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        names = [metric.split(";")[0] for metric in response.headers["server-timing"].split(", ")]
+        self.assertEqual(names, ["filter", "rows", "app"])
+        self.assertIn("<th>KO</th>", response.text)
+        response = self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.assertEqual(response.headers["server-timing"].split(";")[0], "app")
+
+    def test_server_timing_log(self):
+        self._reload_app(server_timing_log=True)
+        self.mock_mysql.run_filter_query.return_value = ResultRows.from_dict({"AAPL": {"Symbol": "AAPL", "Price": 150.0}})
+        output = StringIO()
+        with redirect_stdout(output):
+            response = self.client.post("/filter", data=DEFAULT_FILTER_FORM)
+        self.assertNotIn("server-timing", response.headers)
+        lines = [json.loads(line)["timing"] for line in output.getvalue().splitlines() if line.startswith('{"timing"')]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual((lines[0]["path"], lines[0]["status"]), ("/filter", 200))
+        self.assertEqual(set(lines[0]["spans_ms"]), {"render", "template", "app", "total"})
@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import aiomysql
+from dividend_stocks_filterer.async_db_functions import AsyncMysqlConnection
+from dividend_stocks_filterer.filters import ResultRows
+
+
+class TestAsyncMysqlConnection(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.mock_cursor = MagicMock()
+        self.mock_cursor.execute = AsyncMock()
+        self.mock_cursor.fetchall = AsyncMock(return_value=())
+        self.mock_cursor.__aenter__ = AsyncMock(return_value=self.mock_cursor)
+        self.mock_cursor.__aexit__ = AsyncMock(return_value=False)
+
+        self.mock_conn = MagicMock()
+        self.mock_conn.cursor.return_value = self.mock_cursor
+        acquire = MagicMock()
+        acquire.__aenter__ = AsyncMock(return_value=self.mock_conn)
+        acquire.__aexit__ = AsyncMock(return_value=False)
+
+        self.mock_pool = MagicMock()
+        self.mock_pool.acquire.return_value = acquire
+        self.mock_pool.wait_closed = AsyncMock()
+
+        patcher = patch('dividend_stocks_filterer.async_db_functions.aiomysql.create_pool',
+                        new=AsyncMock(return_value=self.mock_pool))
+        self.mock_create_pool = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.db = AsyncMysqlConnection(db_host="h", db_port=3306, db_user="u", db_password="p", db_schema="s",
+                                       pool_size=5)
+
+    async def test_pool_created_lazily_once(self):
+        self.mock_create_pool.assert_not_called()
+        await self.db.run_sql_query("SELECT 1")
+        await self.db.run_sql_query("SELECT 1")
+        self.mock_create_pool.assert_awaited_once()
+        self.assertEqual(self.mock_create_pool.call_args[1]["maxsize"], 5)
+
+    async def test_pool_connections_autocommit(self):
+        # a connection left inside a transaction is closed on release instead of going back to the pool
+        await self.db.run_sql_query("SELECT 1")
+        self.assertIs(self.mock_create_pool.call_args[1]["autocommit"], True)
+
+    async def test_run_sql_query_tuple(self):
+        self.mock_cursor.fetchall.return_value = (("row1",), ("row2",))
+        result = await self.db.run_sql_query("SELECT 1", "tuple")
+        self.assertEqual(result, [("row1",), ("row2",)])
+        self.mock_conn.cursor.assert_called_once_with(aiomysql.Cursor)
+        self.mock_cursor.execute.assert_awaited_once_with("SELECT 1", None)
+
+    async def test_run_sql_query_dict(self):
+        await self.db.run_sql_query("SELECT 1", "dict", [1])
+        self.mock_conn.cursor.assert_called_once_with(aiomysql.DictCursor)
+        self.mock_cursor.execute.assert_awaited_once_with("SELECT 1", [1])
+
+    async def test_run_sql_query_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            await self.db.run_sql_query("SELECT 1", "list")
+
+    async def test_check_db_update_dates(self):
+        self.mock_cursor.fetchall.return_value = (("radar_file", "2024-01-01"),)
+        self.assertEqual(await self.db.check_db_update_dates(), {"radar_file": "2024-01-01"})
+
+    async def test_run_rows_query(self):
+        self.mock_cursor.description = (("Symbol",), ("Price",))
+        self.mock_cursor.fetchall.return_value = (("KO", 60.0), ("PEP", None))
+        result = await self.db.run_rows_query("SELECT `Symbol`, `Price` FROM t", [1])
+        self.assertEqual(result, ResultRows(("Symbol", "Price"), [("KO", 60.0), ("PEP", None)]))
+        self.mock_conn.cursor.assert_called_once_with()
+        self.mock_cursor.execute.assert_awaited_once_with("SELECT `Symbol`, `Price` FROM t", [1])
+
+    async def test_run_filter_query(self):
+        self.mock_cursor.description = (("Symbol",), ("Price",))
+        self.mock_cursor.fetchall.return_value = (("KO", 60.0),)
+        result = await self.db.run_filter_query(10, 0.0, 10.0, 0.0, 0, 1.0, 500.0, 25, 0.0, 0.0, 0.0, 0.0, 0.0, 50.0,
+                                                100.0, 1.0, 100.0, ["AAPL"], [], [], sort_by="Price", limit=25,
+                                                columns=("Symbol", "Price"))
+        self.assertEqual(result.as_dict(), {"KO": {"Symbol": "KO", "Price": 60.0}})
+        executed_query, params = self.mock_cursor.execute.call_args[0]
+        self.assertTrue(executed_query.startswith("SELECT `Symbol`, `Price` FROM dividend_data_table WHERE"))
+        self.assertTrue(executed_query.endswith("LIMIT %s OFFSET %s;"))
+        self.assertEqual(params[-3:], ["AAPL", 25, 0])
+
+    async def test_count_filter_query(self):
+        self.mock_cursor.fetchall.return_value = ((7,),)
+        count = await self.db.count_filter_query(10, 0.0, 10.0, 0.0, 0, 1.0, 500.0, 25, 0.0, 0.0, 0.0, 0.0, 0.0,
+                                                 50.0, 100.0, 1.0, 100.0, [], [], [])
+        self.assertEqual(count, 7)
+        self.assertTrue(self.mock_cursor.execute.call_args[0][0].startswith("SELECT COUNT(*)"))
+
+    async def test_close(self):
+        await self.db.run_sql_query("SELECT 1")
+        await self.db.close()
+        self.mock_pool.close.assert_called_once()
+        self.mock_pool.wait_closed.assert_awaited_once()
+        await self.db.close()
+        self.mock_pool.close.assert_called_once()
+
+    async def test_pool_stats(self):
+        self.assertEqual(self.db.pool_stats(), {"size": 5, "active": 0, "idle": 0})
+        self.mock_pool.maxsize, self.mock_pool.size, self.mock_pool.freesize = 5, 3, 1
+        await self.db.run_sql_query("SELECT 1")
+        self.assertEqual(self.db.pool_stats(), {"size": 5, "active": 2, "idle": 1})
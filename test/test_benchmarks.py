@@ -0,0 +1,172 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from benchmarks.fake_db import SqliteMysqlConnection, seed_database, symbol, synthetic_rows
+from benchmarks.load import DEFAULT_FORM, compare_results, percentile, run_scenarios, slider_drag_sessions
+from benchmarks.render import benchmark_results, compare_benchmarks, first_difference, peak_allocation, run_benchmarks
+from dividend_stocks_filterer.filters import FILTER_ARGUMENT_NAMES, TABLE_COLUMNS
+from dividend_stocks_filterer.snapshot import TableSnapshot
+
+
+def default_filter_args(**overrides) -> tuple:
+    values = dict(DEFAULT_FORM, excluded_symbols=[], excluded_sectors=[], excluded_industries=[])
+    values.update(overrides)
+    return tuple(values[name] for name in FILTER_ARGUMENT_NAMES)
+
+
+class TestFakeDb(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.directory, "dividends.sqlite")
+        seed_database(cls.path, 500)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        self.db = SqliteMysqlConnection(self.path)
+
+    def test_symbols_are_unique(self):
+        self.assertEqual([symbol(position) for position in (0, 25, 26, 27, 702)], ["A", "Z", "AA", "AB", "AAA"])
+        self.assertEqual(len({row[0] for row in synthetic_rows(1000)}), 1000)
+
+    def test_synthetic_rows_are_repeatable(self):
+        self.assertEqual(synthetic_rows(50, seed=3), synthetic_rows(50, seed=3))
+        self.assertNotEqual(synthetic_rows(50, seed=3), synthetic_rows(50, seed=4))
+        self.assertEqual(len(synthetic_rows(1)[0]), len(TABLE_COLUMNS))
+
+    def test_fetch_dividend_table(self):
+        columns, rows = self.db.fetch_dividend_table()
+        self.assertEqual(columns, list(TABLE_COLUMNS))
+        self.assertEqual(rows, synthetic_rows(500))
+
+    def test_filter_query_matches_memory_engine(self):
+        snapshot = TableSnapshot(*self.db.fetch_dividend_table())
+        for filter_args in (default_filter_args(), default_filter_args(min_streak_years=20, excluded_sectors=["Energy"]),
+                            default_filter_args(price_range_min=20.5, pe_range_max=15.0)):
+            with self.subTest(filter_args=filter_args):
+                rows = self.db.run_filter_query(*filter_args)
+                self.assertEqual(rows.as_dict(), snapshot.filter(*filter_args).as_dict())
+                self.assertEqual(self.db.count_filter_query(*filter_args), len(rows))
+
+    def test_text_order_matches_memory_engine(self):
+        path = os.path.join(self.directory, "mixed_case.sqlite")
+        seed_database(path, 60)
+        companies = ["apple", "Apple", "BANANA", "banana split", "Cherry", "cherry pie", "abbvie", "Zeta"]
+        connection = sqlite3.connect(path)
+        connection.executemany("UPDATE dividend_data_table SET Company = ? WHERE Symbol = ?",
+                               [(companies[position % len(companies)], symbol(position)) for position in range(60)])
+        connection.commit()
+        connection.close()
+        db = SqliteMysqlConnection(path)
+        snapshot = TableSnapshot(*db.fetch_dividend_table())
+        filter_args = default_filter_args(min_streak_years=0, yield_range_max=1000.0, min_dgr=-1000.0,
+                                          chowder_number=-1000, price_range_min=0.0, price_range_max=100000.0,
+                                          fair_value=1000, min_revenue=-1000.0, min_npm=-1000.0,
+                                          min_cf_per_share=-1000.0, min_roe=-1000.0, pe_range_min=-10000.0,
+                                          pe_range_max=10000.0, max_price_per_book_value=10000.0,
+                                          max_debt_per_capital_value=10000.0, max_payout_ratio=10000.0)
+        mask = snapshot.filter_mask(*filter_args)
+        self.assertEqual(int(mask.sum()), 60)
+        for sort_by in ("Company", "Sector", "Symbol"):
+            for descending in (False, True):
+                with self.subTest(sort_by=sort_by, descending=descending):
+                    rows = db.run_filter_query(*filter_args, sort_by=sort_by, descending=descending)
+                    indices = snapshot.sorted_indices(mask, sort_by, descending)
+                    self.assertEqual(list(rows.as_dict()), list(snapshot.rows_at(indices).as_dict()))
+
+    def test_stream_filter_query(self):
+        filter_args = default_filter_args()
+        batches = list(self.db.stream_filter_query(*filter_args, limit=25, batch_size=10))
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+        self.assertEqual(dict(zip(batches[0].columns, batches[0].column_types))["Price"], ("float", None))
+        self.assertEqual([row for batch in batches for row in batch.rows],
+                         self.db.run_filter_query(*filter_args, limit=25).rows)
+
+    def test_check_db_update_dates(self):
+        self.assertEqual(set(self.db.check_db_update_dates()), {"radar_file", "yahoo_finance"})
+
+
+class TestLoad(unittest.TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.95), 7)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_slider_drag_sessions(self):
+        bounds = {"No Years": (1.0, 70.0), "Price": (1.0, 900.0), "Div Yield": (0.1, 12.0)}
+        sessions = slider_drag_sessions(bounds, 20, drags=2, steps=5, seed=1)
+        self.assertEqual(sessions, slider_drag_sessions(bounds, 20, drags=2, steps=5, seed=1))
+        self.assertEqual(len(sessions), 20)
+        for session in sessions:
+            self.assertEqual(session[0], ("GET", "/", None))
+            self.assertGreaterEqual(len(session), 11)
+            self.assertTrue(all(path == "/filter" for _, path, _ in session[1:]))
+            self.assertTrue(all(isinstance(form["min_streak_years"], int) for _, _, form in session[1:]))
+
+    def test_compare_results(self):
+        baseline = [{"engine": "sql", "rows": 5000, "rps": 100.0, "latency_ms": {"/filter": {"p95": 10.0}}}]
+        same = [{"engine": "sql", "rows": 5000, "rps": 95.0, "latency_ms": {"/filter": {"p95": 11.0}}}]
+        slower = [{"engine": "sql", "rows": 5000, "rps": 50.0, "latency_ms": {"/filter": {"p95": 30.0}}}]
+        other = [{"engine": "memory", "rows": 5000, "rps": 1.0, "latency_ms": {"/filter": {"p95": 30.0}}}]
+        self.assertEqual(compare_results(same, baseline, 0.2), [])
+        self.assertEqual(len(compare_results(slower, baseline, 0.2)), 2)
+        self.assertEqual(compare_results(other, baseline, 0.2), [])
+
+    def test_run_scenarios(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "dividends.sqlite")
+        seed_database(path, 200)
+        sessions = slider_drag_sessions(SqliteMysqlConnection(path).column_bounds(), 3, drags=1, steps=2)
+        results = run_scenarios([
+            {"engine": engine, "rows": 200, "database": path, "environment": {}, "sessions": sessions,
+             "concurrency": 2, "warmup": 1} for engine in ("memory", "sql")
+        ])
+        for result in results:
+            self.assertEqual(result["errors"], 0)
+            self.assertEqual(result["requests"], sum(len(session) for session in sessions[1:]))
+            self.assertEqual(set(result["latency_ms"]), {"/", "/filter"})
+            self.assertGreater(result["peak_rss_mb"], 0)
+
+
+class TestRender(unittest.TestCase):
+
+    def test_benchmark_results(self):
+        results = benchmark_results(10, ("Symbol", "Price"))
+        self.assertEqual(results.columns, ("Symbol", "Price"))
+        self.assertEqual(results.rows[0], (synthetic_rows(1)[0][0], synthetic_rows(1)[0][TABLE_COLUMNS.index("Price")]))
+        self.assertEqual(len(results), 10)
+
+    def test_first_difference(self):
+        self.assertIsNone(first_difference("<table>", "<table>"))
+        self.assertEqual(first_difference("<table>", "<tabel>"), 4)
+        self.assertEqual(first_difference("<table>", "<table"), 6)
+
+    def test_peak_allocation(self):
+        self.assertGreaterEqual(peak_allocation(lambda results: [0] * 100000, None), 100000 * 8)
+
+    def test_run_benchmarks_renderers_match_pandas(self):
+        benchmarks = run_benchmarks([20], ["narrow", "all"], ["pandas", "render_table"], repeat=1)
+        self.assertEqual([(benchmark["renderer"], benchmark["columns"]) for benchmark in benchmarks], [
+            ("pandas", "narrow"), ("render_table", "narrow"), ("pandas", "all"), ("render_table", "all")])
+        for benchmark in benchmarks:
+            self.assertIsNone(benchmark["first_difference"])
+            self.assertGreater(benchmark["median_ms"], 0)
+            self.assertGreater(benchmark["output_kib"], 0)
+
+    def test_compare_benchmarks(self):
+        baseline = [{"renderer": "render_table", "rows": 100, "columns": "all", "median_ms": 2.0, "peak_kib": 100.0}]
+        same = [dict(baseline[0], median_ms=2.2)]
+        worse = [dict(baseline[0], median_ms=4.0, peak_kib=300.0)]
+        self.assertEqual(compare_benchmarks(same, baseline, 0.2), [])
+        self.assertEqual(len(compare_benchmarks(worse, baseline, 0.2)), 2)
+        self.assertEqual(compare_benchmarks([dict(worse[0], rows=5)], baseline, 0.2), [])
@@ -0,0 +1,130 @@
+import asyncio
+import gzip
+import unittest
+from unittest.mock import AsyncMock
+from dividend_stocks_filterer.caches import LRUCache, RenderedFragment, SingleFlight
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_get_missing_returns_default(self):
+        cache = LRUCache(10)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("a", "default"), "default")
+
+    def test_set_then_get(self):
+        cache = LRUCache(10)
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(len(cache), 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_evicts_by_weight(self):
+        cache = LRUCache(5, weigh=len)
+        cache.set("a", [1, 2, 3])
+        cache.set("b", [1, 2, 3])
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["weight"], 3)
+
+    def test_value_heavier_than_cache_is_not_cached(self):
+        cache = LRUCache(2, weigh=len)
+        cache.set("a", [1, 2, 3])
+        self.assertEqual(len(cache), 0)
+
+    def test_zero_max_weight_disables_cache(self):
+        cache = LRUCache(0)
+        cache.set("a", 1)
+        self.assertIsNone(cache.get("a"))
+
+    def test_replacing_key_updates_weight(self):
+        cache = LRUCache(10, weigh=len)
+        cache.set("a", [1, 2, 3])
+        cache.set("a", [1])
+        self.assertEqual(cache.get("a"), [1])
+        self.assertEqual(cache.stats()["weight"], 1)
+
+    def test_hit_and_miss_counters(self):
+        cache = LRUCache(10)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+        self.assertEqual(cache.stats(), {"entries": 1, "weight": 1, "max_weight": 10, "hits": 2, "misses": 1})
+
+    def test_clear(self):
+        cache = LRUCache(10)
+        cache.set("a", 1)
+        cache.clear()
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["weight"], 0)
+
+
+class TestRenderedFragment(unittest.TestCase):
+
+    def test_from_html_compressed(self):
+        fragment = RenderedFragment.from_html("<p>hi</p>")
+        self.assertEqual(fragment.body, b"<p>hi</p>")
+        self.assertEqual(gzip.decompress(fragment.gzipped), b"<p>hi</p>")
+        self.assertEqual(fragment.size, len(fragment.body) + len(fragment.gzipped))
+
+    def test_from_html_uncompressed(self):
+        fragment = RenderedFragment.from_html("<p>hi</p>", compress=False)
+        self.assertIsNone(fragment.gzipped)
+        self.assertEqual(fragment.size, 9)
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.flights = SingleFlight()
+        self.release = asyncio.Event()
+        self.call = AsyncMock(side_effect=self._slow_call)
+
+    async def _slow_call(self):
+        await self.release.wait()
+        return "result"
+
+    async def test_concurrent_calls_share_one_run(self):
+        callers = [asyncio.create_task(self.flights.do("key", self.call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        self.assertEqual(len(self.flights), 1)
+        self.release.set()
+        self.assertEqual(await asyncio.gather(*callers), ["result"] * 3)
+        self.call.assert_awaited_once()
+        self.assertEqual(self.flights.stats(), {"in_flight": 0, "calls": 1, "shared": 2})
+
+    async def test_different_keys_run_separately(self):
+        self.release.set()
+        await asyncio.gather(self.flights.do("a", self.call), self.flights.do("b", self.call))
+        self.assertEqual(self.call.await_count, 2)
+
+    async def test_finished_calls_run_again(self):
+        self.release.set()
+        await self.flights.do("key", self.call)
+        await self.flights.do("key", self.call)
+        self.assertEqual(self.call.await_count, 2)
+
+    async def test_exception_is_shared_and_cleared(self):
+        call = AsyncMock(side_effect=ValueError("db down"))
+        results = await asyncio.gather(self.flights.do("key", call), self.flights.do("key", call),
+                                       return_exceptions=True)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        call.assert_awaited_once()
+        self.assertEqual(len(self.flights), 0)
+
+    async def test_cancelled_caller_does_not_cancel_shared_call(self):
+        first = asyncio.create_task(self.flights.do("key", self.call))
+        second = asyncio.create_task(self.flights.do("key", self.call))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.release.set()
+        self.assertEqual(await second, "result")
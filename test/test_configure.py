@@ -47,6 +47,59 @@ class TestReadConfigurations(unittest.TestCase):
             else:
                 os.environ["DB_PASS"] = original
 
+    def test_shared_snapshot_disabled_by_default(self):
+        config = read_configurations()
+        self.assertFalse(config["shared_snapshot_path"])
+        self.assertFalse(config["persistent_snapshot_path"])
+
+    def test_filter_engine_defaults_to_memory(self):
+        config = read_configurations()
+        self.assertEqual(config["filter_engine"], "memory")
+
+    def test_data_poll_interval_defaults_to_60(self):
+        config = read_configurations()
+        self.assertEqual(config["data_poll_interval"], 60)
+
+    def test_result_cache_max_rows_default(self):
+        config = read_configurations()
+        self.assertEqual(config["result_cache_max_rows"], 100000)
+
+    def test_fragment_cache_defaults(self):
+        config = read_configurations()
+        self.assertEqual(config["fragment_cache_max_bytes"], 33554432)
+        self.assertTrue(config["fragment_cache_gzip"])
+
+    def test_session_memo_default(self):
+        config = read_configurations()
+        self.assertEqual(config["session_memo_max_rows"], 100000)
+
+    def test_results_table_defaults(self):
+        config = read_configurations()
+        self.assertEqual(config["page_size"], 100)
+        self.assertFalse(config["display_columns"])
+
+    def test_db_driver_defaults(self):
+        config = read_configurations()
+        self.assertEqual(config["db_driver"], "pymysql")
+        self.assertEqual(config["db_async_pool_size"], 10)
+
+    def test_db_stream_defaults(self):
+        config = read_configurations()
+        self.assertFalse(config["db_stream_rows"])
+        self.assertEqual(config["db_stream_batch_size"], 50)
+
+    def test_server_timing_defaults(self):
+        config = read_configurations()
+        self.assertFalse(config["server_timing"])
+        self.assertFalse(config["server_timing_log"])
+
+    def test_db_pool_defaults(self):
+        config = read_configurations()
+        self.assertEqual(config["db_pool_size"], 3)
+        self.assertEqual(config["db_pool_ping_interval"], 30)
+        self.assertEqual(config["db_pool_checkout_timeout"], 30)
+        self.assertEqual(config["db_pool_idle_timeout"], 300)
+
     def test_ga_measurement_id_defaults_to_empty(self):
         config = read_configurations()
         self.assertFalse(config["ga_measurement_id"])
@@ -0,0 +1,77 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock
+from dividend_stocks_filterer.data_watcher import DataVersionWatcher
+
+
+class TestDataVersionWatcher(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.fetch = AsyncMock(return_value={"radar_file": "2024-01-01"})
+        self.watcher = DataVersionWatcher(self.fetch, poll_interval=0)
+
+    def test_starts_without_a_version(self):
+        self.assertEqual(self.watcher.version, 0)
+        self.assertIsNone(self.watcher.update_dates)
+
+    async def test_first_check_publishes_version_one(self):
+        self.assertTrue(await self.watcher.check())
+        self.assertEqual(self.watcher.version, 1)
+        self.assertEqual(self.watcher.update_dates, {"radar_file": "2024-01-01"})
+
+    async def test_unchanged_data_keeps_version(self):
+        await self.watcher.check()
+        self.assertFalse(await self.watcher.check())
+        self.assertEqual(self.watcher.version, 1)
+
+    async def test_changed_data_bumps_version(self):
+        await self.watcher.check()
+        self.fetch.return_value = {"radar_file": "2024-01-02"}
+        self.assertTrue(await self.watcher.check())
+        self.assertEqual(self.watcher.version, 2)
+
+    async def test_listeners_get_new_version(self):
+        listener = AsyncMock()
+        self.watcher.subscribe(listener)
+        await self.watcher.check()
+        await self.watcher.check()
+        listener.assert_awaited_once_with(1, {"radar_file": "2024-01-01"})
+
+    async def test_failed_listener_is_retried(self):
+        listener = AsyncMock(side_effect=[Exception("db down"), None])
+        self.watcher.subscribe(listener)
+        with self.assertRaises(Exception):
+            await self.watcher.check()
+        self.assertEqual(self.watcher.version, 0)
+        self.assertTrue(await self.watcher.check())
+        self.assertEqual(self.watcher.version, 1)
+
+    async def test_run_survives_errors(self):
+        self.fetch.side_effect = [Exception("db down"), {"radar_file": "2024-01-01"}]
+        task = asyncio.create_task(self.watcher.run())
+        for _ in range(10):
+            await asyncio.sleep(0)
+        task.cancel()
+        self.assertEqual(self.watcher.version, 1)
+
+    async def test_publish_without_db(self):
+        listener = AsyncMock()
+        self.watcher.subscribe(listener)
+        self.assertTrue(await self.watcher.publish({"radar_file": "2023-12-01"}))
+        self.fetch.assert_not_awaited()
+        listener.assert_awaited_once_with(1, {"radar_file": "2023-12-01"})
+        self.assertFalse(await self.watcher.publish({"radar_file": "2023-12-01"}))
+
+    async def test_check_after_publish_reconciles_with_db(self):
+        await self.watcher.publish({"radar_file": "2023-12-01"})
+        self.assertTrue(await self.watcher.check())
+        self.assertEqual(self.watcher.version, 2)
+        self.assertEqual(self.watcher.update_dates, {"radar_file": "2024-01-01"})
+
+    async def test_run_check_first(self):
+        self.watcher.poll_interval = 3600
+        task = asyncio.create_task(self.watcher.run(check_first=True))
+        for _ in range(10):
+            await asyncio.sleep(0)
+        task.cancel()
+        self.assertEqual(self.watcher.version, 1)
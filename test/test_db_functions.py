@@ -1,43 +1,76 @@
 import unittest
+import pymysql
+from decimal import Decimal
 from unittest.mock import patch, MagicMock
-from dividend_stocks_filterer.db_functions import MysqlConnection
+from pymysql.constants import FIELD_TYPE
+from dividend_stocks_filterer.db_functions import MysqlConnection, column_types
+from dividend_stocks_filterer.filters import FILTER_COLUMNS, RANGE_AGGREGATES, ResultRows
+
+SYMBOL = ("Symbol", FIELD_TYPE.VAR_STRING, 0)
+PRICE = ("Price", FIELD_TYPE.DOUBLE, 31)
+
+
+def describe(*columns) -> tuple:
+    # a cursor description of (name, type code, decimals) columns
+    return tuple((name, type_code, None, 10, 10, decimals, True) for name, type_code, decimals in columns)
 
 
 class TestMysqlConnection(unittest.TestCase):
 
-    @patch('dividend_stocks_filterer.db_functions.PooledDB')
-    def setUp(self, mock_pooled_db_cls):
-        # Each PooledDB instance is a separate mock
+    @patch('dividend_stocks_filterer.db_functions.ConnectionPool')
+    def setUp(self, mock_pool_cls):
+        self.mock_pool_cls = mock_pool_cls
         self.mock_pool = MagicMock()
-        self.mock_dict_pool = MagicMock()
-        mock_pooled_db_cls.side_effect = [self.mock_pool, self.mock_dict_pool]
+        mock_pool_cls.return_value = self.mock_pool
 
-        # Set up default mock connections and cursors
+        # A single pooled connection hands out either cursor type
         self.mock_conn = MagicMock()
         self.mock_cursor = MagicMock()
-        self.mock_conn.cursor.return_value = self.mock_cursor
-        self.mock_pool.connection.return_value = self.mock_conn
-
-        self.mock_dict_conn = MagicMock()
         self.mock_dict_cursor = MagicMock()
-        self.mock_dict_conn.cursor.return_value = self.mock_dict_cursor
-        self.mock_dict_pool.connection.return_value = self.mock_dict_conn
+        self.mock_conn.cursor.side_effect = lambda cursor_class=pymysql.cursors.Cursor: (
+            self.mock_dict_cursor if cursor_class is pymysql.cursors.DictCursor else self.mock_cursor
+        )
+        self.mock_pool.connection.return_value = self.mock_conn
 
         self.db = MysqlConnection(
             db_host="localhost", db_port=3306, db_user="root",
             db_password="pass", db_schema="testdb"
         )
 
-    def test_init_creates_two_pools(self):
+    def test_init_creates_a_single_pool(self):
         self.assertIs(self.db._pool, self.mock_pool)
-        self.assertIs(self.db._dict_pool, self.mock_dict_pool)
+        self.mock_pool_cls.assert_called_once()
+        self.assertEqual(self.mock_pool_cls.call_args[1], {
+            "size": 3, "ping_interval": 30, "checkout_timeout": 30, "idle_timeout": 300
+        })
+
+    @patch('dividend_stocks_filterer.db_functions.ConnectionPool')
+    def test_init_pool_settings(self, mock_pool_cls):
+        MysqlConnection(db_host="localhost", db_port=3306, db_user="root", db_password="pass", db_schema="testdb",
+                        pool_size=8, pool_ping_interval=0, pool_checkout_timeout=2.5, pool_idle_timeout=60)
+        self.assertEqual(mock_pool_cls.call_args[1], {
+            "size": 8, "ping_interval": 0, "checkout_timeout": 2.5, "idle_timeout": 60
+        })
+
+    @patch('dividend_stocks_filterer.db_functions.pymysql.connect')
+    @patch('dividend_stocks_filterer.db_functions.ConnectionPool')
+    def test_init_pool_creator_connects(self, mock_pool_cls, mock_connect):
+        MysqlConnection(db_host="db", db_port=3307, db_user="u", db_password="p", db_schema="s")
+        creator = mock_pool_cls.call_args[0][0]
+        self.assertIs(creator(), mock_connect.return_value)
+        self.assertEqual(mock_connect.call_args[1]["host"], "db")
+        self.assertEqual(mock_connect.call_args[1]["port"], 3307)
+
+    def test_pool_stats(self):
+        self.mock_pool.stats.return_value = {"size": 3}
+        self.assertEqual(self.db.pool_stats(), {"size": 3})
 
     def test_run_sql_query_tuple(self):
         self.mock_cursor.fetchall.return_value = [("row1",), ("row2",)]
 
         result = self.db.run_sql_query("SELECT 1", "tuple")
 
-        self.mock_cursor.execute.assert_called_once_with("SELECT 1")
+        self.mock_cursor.execute.assert_called_once_with("SELECT 1", None)
         self.assertEqual(result, [("row1",), ("row2",)])
 
     def test_run_sql_query_dict(self):
@@ -45,7 +78,7 @@ class TestMysqlConnection(unittest.TestCase):
 
         result = self.db.run_sql_query("SELECT 1", "dict")
 
-        self.mock_dict_cursor.execute.assert_called_once_with("SELECT 1")
+        self.mock_dict_cursor.execute.assert_called_once_with("SELECT 1", None)
         self.assertEqual(result, [{"col": "val"}])
 
     def test_run_sql_query_invalid_mode_raises(self):
@@ -62,6 +95,88 @@ class TestMysqlConnection(unittest.TestCase):
 
         self.assertEqual(result, {"radar_file": "2024-01-01", "yahoo_finance": "2024-01-02"})
 
+    def test_fetch_dividend_table(self):
+        self.mock_cursor.description = (("Symbol",), ("Price",))
+        self.mock_cursor.fetchall.return_value = [("AAPL", 150.0), ("MSFT", 300.0)]
+
+        columns, rows = self.db.fetch_dividend_table()
+
+        self.assertEqual(columns, ["Symbol", "Price"])
+        self.assertEqual(rows, [("AAPL", 150.0), ("MSFT", 300.0)])
+        self.mock_conn.close.assert_called_once()
+
+    def test_run_rows_query(self):
+        self.mock_cursor.description = (("Symbol",), ("Price",))
+        self.mock_cursor.fetchall.return_value = (("AAPL", 150.0), ("MSFT", None))
+
+        result = self.db.run_rows_query("SELECT `Symbol`, `Price` FROM t WHERE `Price` > %s", [1])
+
+        self.assertEqual(result.columns, ("Symbol", "Price"))
+        self.assertEqual(result.rows, [("AAPL", 150.0), ("MSFT", None)])
+        self.mock_cursor.execute.assert_called_once_with("SELECT `Symbol`, `Price` FROM t WHERE `Price` > %s", [1])
+        self.mock_conn.close.assert_called_once()
+
+    def test_stream_rows_query_yields_batches(self):
+        self.mock_cursor.description = describe(SYMBOL, PRICE)
+        self.mock_cursor.fetchmany.side_effect = [[("AAPL", 150.0), ("KO", 60.0)], [("MSFT", 300.0)], []]
+
+        batches = list(self.db.stream_rows_query("SELECT `Symbol`, `Price` FROM t", [1], batch_size=2))
+        self.assertEqual(batches, [
+            ResultRows(("Symbol", "Price"), [("AAPL", 150.0), ("KO", 60.0)]),
+            ResultRows(("Symbol", "Price"), [("MSFT", 300.0)]),
+        ])
+        for batch in batches:
+            self.assertEqual(batch.column_types, (("text", None), ("float", None)))
+        self.mock_conn.cursor.assert_called_once_with(pymysql.cursors.SSCursor)
+        self.mock_cursor.fetchmany.assert_called_with(2)
+        self.mock_cursor.close.assert_called_once()
+        self.mock_conn.close.assert_called_once()
+
+    def test_stream_rows_query_checks_out_lazily(self):
+        self.mock_cursor.description = describe(SYMBOL)
+        batches = self.db.stream_rows_query("SELECT `Symbol` FROM t")
+        self.mock_pool.connection.assert_not_called()
+        batches.close()
+
+    def test_stream_rows_query_no_rows_yields_the_header(self):
+        self.mock_cursor.description = describe(SYMBOL)
+        self.mock_cursor.fetchmany.return_value = []
+        self.assertEqual(list(self.db.stream_rows_query("SELECT `Symbol` FROM t")), [ResultRows(("Symbol",), [])])
+        self.mock_conn.close.assert_called_once()
+
+    def test_stream_rows_query_closed_early_returns_connection(self):
+        self.mock_cursor.description = describe(SYMBOL)
+        self.mock_cursor.fetchmany.return_value = [("AAPL",)]
+        batches = self.db.stream_rows_query("SELECT `Symbol` FROM t", batch_size=1)
+        next(batches)
+        self.mock_conn.close.assert_not_called()
+        batches.close()
+        self.mock_cursor.close.assert_called_once()
+        self.mock_conn.close.assert_called_once()
+
+    def test_stream_filter_query(self):
+        self.mock_cursor.description = describe(SYMBOL, PRICE)
+        self.mock_cursor.fetchmany.side_effect = [[("KO", 60.0)], []]
+        batches = self.db.stream_filter_query(*[None] * 17, ["AAPL"], [], [], sort_by="Price", limit=25,
+                                              columns=("Symbol", "Price"), batch_size=10)
+        self.assertEqual(list(batches), [ResultRows(("Symbol", "Price"), [("KO", 60.0)])])
+        executed_query, params = self.mock_cursor.execute.call_args[0]
+        self.assertTrue(executed_query.startswith("SELECT `Symbol`, `Price` FROM dividend_data_table"))
+        self.assertEqual(params[-3:], ["AAPL", 25, 0])
+
+    def test_column_types(self):
+        self.assertEqual(column_types(describe(
+            SYMBOL, PRICE, ("Payout", FIELD_TYPE.NEWDECIMAL, 2), ("Yield", FIELD_TYPE.DOUBLE, 3),
+            ("Growth", FIELD_TYPE.DOUBLE, 39), ("No Years", FIELD_TYPE.LONGLONG, 0),
+            ("Ex-Date", FIELD_TYPE.DATETIME, 0), ("Pay-Date", FIELD_TYPE.DATE, 0), ("Raw", FIELD_TYPE.JSON, 0),
+        )), (("text", None), ("float", None), ("decimal", 2), ("float", 3), ("float", None), ("int", None),
+             ("datetime", None), ("date", None), (None, None)))
+
+    def test_stream_filter_query_unknown_column_raises_before_iterating(self):
+        with self.assertRaises(ValueError):
+            self.db.stream_filter_query(*[None] * 17, [], [], [], sort_by="Price`; DROP TABLE x")
+        self.mock_pool.connection.assert_not_called()
+
     def test_min_max_value_max(self):
         self.mock_cursor.fetchall.return_value = [(25.5,)]
 
@@ -86,6 +201,46 @@ class TestMysqlConnection(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.db.min_max_value_of_any_stock_key("Price", "avg")
 
+    def test_column_bounds(self):
+        row = []
+        for position in range(len(FILTER_COLUMNS)):
+            row += [None, None] if position == 1 else [Decimal(position), Decimal(position * 2)]
+        self.mock_cursor.fetchall.return_value = [tuple(row)]
+
+        bounds = self.db.column_bounds()
+
+        self.assertEqual(set(bounds), set(FILTER_COLUMNS))
+        self.assertEqual(bounds[FILTER_COLUMNS[2]], (2.0, 4.0))
+        self.assertEqual(bounds[FILTER_COLUMNS[1]], (None, None))
+        executed_query = self.mock_cursor.execute.call_args[0][0]
+        self.assertIn("MIN(`Payout Ratio`), MAX(`Payout Ratio`)", executed_query)
+
+    def test_min_max_all_values(self):
+        self.mock_cursor.fetchall.return_value = [tuple(range(len(RANGE_AGGREGATES)))]
+
+        values = self.db.min_max_all_values()
+
+        self.assertEqual(list(values), [key for key, _, _ in RANGE_AGGREGATES])
+        self.assertEqual(values["yield_max_raw"], 0)
+        self.assertEqual(values["payout_ratio_max_raw"], len(RANGE_AGGREGATES) - 1)
+        executed_query = self.mock_cursor.execute.call_args[0][0]
+        self.assertTrue(executed_query.startswith("SELECT MAX(`Div Yield`), MAX(`5Y Avg Yield`), MIN(`DGR 1Y`)"))
+        self.assertTrue(executed_query.endswith("FROM dividend_data_table WHERE `Div Yield` IS NOT NULL;"))
+
+    def test_run_filter_query_skips_pruned_predicates(self):
+        self.mock_cursor.fetchall.return_value = []
+        self.db.run_filter_query(None, None, None, None, None, 1.0, None, None, None, None, None, None, None, None,
+                                 None, None, None, [], [], [])
+        executed_query, params = self.mock_cursor.execute.call_args[0]
+        self.assertIn("WHERE (`Price` >= %s OR `Price` IS NULL) ORDER BY", executed_query)
+        self.assertEqual(params, [1.0])
+
+    def test_run_filter_query_everything_pruned_has_no_where(self):
+        self.mock_cursor.fetchall.return_value = []
+        self.db.run_filter_query(*[None] * 17, [], [], [])
+        executed_query = self.mock_cursor.execute.call_args[0][0]
+        self.assertEqual(executed_query, "SELECT * FROM dividend_data_table ORDER BY `Symbol`;")
+
     def test_list_values_of_key_in_db(self):
         self.mock_cursor.fetchall.return_value = [("AAPL",), ("MSFT",), ("GOOG",)]
 
@@ -97,10 +252,8 @@ class TestMysqlConnection(unittest.TestCase):
         self.assertIn("Symbol", executed_query)
 
     def test_run_filter_query_no_exclusions(self):
-        self.mock_dict_cursor.fetchall.return_value = [
-            {"Symbol": "AAPL", "Price": 150.0},
-            {"Symbol": "MSFT", "Price": 300.0}
-        ]
+        self.mock_cursor.description = (("Symbol",), ("Price",))
+        self.mock_cursor.fetchall.return_value = [("AAPL", 150.0), ("MSFT", 300.0)]
 
         result = self.db.run_filter_query(
             min_streak_years=10, yield_range_min=0.0, yield_range_max=10.0,
@@ -112,16 +265,13 @@ class TestMysqlConnection(unittest.TestCase):
             excluded_symbols=[], excluded_sectors=[], excluded_industries=[]
         )
 
-        self.assertEqual(len(result), 2)
-        self.assertIn("AAPL", result)
-        self.assertIn("MSFT", result)
-        executed_query = self.mock_dict_cursor.execute.call_args[0][0]
+        self.assertEqual(result, ResultRows(("Symbol", "Price"), [("AAPL", 150.0), ("MSFT", 300.0)]))
+        executed_query = self.mock_cursor.execute.call_args[0][0]
         self.assertNotIn("NOT IN", executed_query)
 
     def test_run_filter_query_with_exclusions(self):
-        self.mock_dict_cursor.fetchall.return_value = [
-            {"Symbol": "MSFT", "Price": 300.0}
-        ]
+        self.mock_cursor.description = (("Symbol",), ("Price",))
+        self.mock_cursor.fetchall.return_value = [("MSFT", 300.0)]
 
         result = self.db.run_filter_query(
             min_streak_years=10, yield_range_min=0.0, yield_range_max=10.0,
@@ -135,22 +285,85 @@ class TestMysqlConnection(unittest.TestCase):
         )
 
         self.assertEqual(len(result), 1)
-        self.assertIn("MSFT", result)
-        executed_query = self.mock_dict_cursor.execute.call_args[0][0]
-        self.assertIn("`Symbol` NOT IN", executed_query)
-        self.assertIn("'AAPL'", executed_query)
-        self.assertIn("`Sector` NOT IN", executed_query)
-        self.assertIn("'Technology'", executed_query)
-        self.assertIn("`Industry` NOT IN", executed_query)
-        self.assertIn("'Software'", executed_query)
+        self.assertEqual(result.as_dict(), {"MSFT": {"Symbol": "MSFT", "Price": 300.0}})
+        executed_query, params = self.mock_cursor.execute.call_args[0]
+        self.assertIn("`Symbol` NOT IN (%s)", executed_query)
+        self.assertIn("`Sector` NOT IN (%s)", executed_query)
+        self.assertIn("`Industry` NOT IN (%s)", executed_query)
+        self.assertEqual(params[-3:], ["AAPL", "Technology", "Software"])
+        self.assertNotIn("AAPL", executed_query)
+
+    def test_run_filter_query_sort_and_page(self):
+        self.mock_cursor.fetchall.return_value = []
+        self.db.run_filter_query(
+            10, 0.0, 10.0, 0.0, 0, 1.0, 500.0, 25, 0.0, 0.0, 0.0, 0.0, 0.0, 50.0, 100.0, 1.0, 100.0, [], [], [],
+            sort_by="Price", descending=True, limit=25, offset=50
+        )
+        executed_query, params = self.mock_cursor.execute.call_args[0]
+        self.assertTrue(executed_query.endswith(
+            "ORDER BY `Price` IS NULL, `Price` DESC, `Symbol` LIMIT %s OFFSET %s;"
+        ))
+        self.assertEqual(params[-2:], [25, 50])
+
+    def test_run_filter_query_default_order_has_no_limit(self):
+        self.mock_cursor.fetchall.return_value = []
+        self.db.run_filter_query(10, 0.0, 10.0, 0.0, 0, 1.0, 500.0, 25, 0.0, 0.0, 0.0, 0.0, 0.0, 50.0, 100.0, 1.0,
+                                 100.0, [], [], [])
+        executed_query = self.mock_cursor.execute.call_args[0][0]
+        self.assertTrue(executed_query.endswith("ORDER BY `Symbol`;"))
+
+    def test_run_filter_query_unknown_sort_column(self):
+        with self.assertRaises(ValueError):
+            self.db.run_filter_query(10, 0.0, 10.0, 0.0, 0, 1.0, 500.0, 25, 0.0, 0.0, 0.0, 0.0, 0.0, 50.0, 100.0,
+                                     1.0, 100.0, [], [], [], sort_by="Price`; DROP TABLE x")
+
+    def test_run_filter_query_selects_columns(self):
+        self.mock_cursor.description = (("Symbol",), ("Price",))
+        self.mock_cursor.fetchall.return_value = [("AAPL", 150.0)]
+        result = self.db.run_filter_query(10, 0.0, 10.0, 0.0, 0, 1.0, 500.0, 25, 0.0, 0.0, 0.0, 0.0, 0.0, 50.0, 100.0,
+                                          1.0, 100.0, [], [], [], columns=("Symbol", "Price"))
+        self.assertEqual(result.as_dict(), {"AAPL": {"Symbol": "AAPL", "Price": 150.0}})
+        executed_query = self.mock_cursor.execute.call_args[0][0]
+        self.assertTrue(executed_query.startswith("SELECT `Symbol`, `Price` FROM dividend_data_table"))
+
+    def test_run_filter_query_unknown_column(self):
+        with self.assertRaises(ValueError):
+            self.db.run_filter_query(10, 0.0, 10.0, 0.0, 0, 1.0, 500.0, 25, 0.0, 0.0, 0.0, 0.0, 0.0, 50.0, 100.0,
+                                     1.0, 100.0, [], [], [], columns=("Symbol", "Price` FROM x; --"))
+
+    def test_run_filter_query_quotes_are_bound_not_interpolated(self):
+        self.mock_cursor.fetchall.return_value = []
+        self.db.run_filter_query(10, 0.0, 10.0, 0.0, 0, 1.0, 500.0, 25, 0.0, 0.0, 0.0, 0.0, 0.0, 50.0, 100.0, 1.0,
+                                 100.0, ["X') OR 1=1 -- "], [], [])
+        executed_query, params = self.mock_cursor.execute.call_args[0]
+        self.assertNotIn("OR 1=1", executed_query)
+        self.assertEqual(params[-1], "X') OR 1=1 -- ")
+
+    def test_run_filter_query_statement_shape_is_stable(self):
+        self.mock_cursor.fetchall.return_value = []
+        self.db.run_filter_query(10, 0.0, 10.0, 0.0, 0, 1.0, 500.0, 25, 0.0, 0.0, 0.0, 0.0, 0.0, 50.0, 100.0, 1.0,
+                                 100.0, ["AAPL"], [], [])
+        first_query = self.mock_cursor.execute.call_args[0][0]
+        self.db.run_filter_query(3, 1.5, 7.5, 2.0, 8, 5.0, 250.0, 10, 1.0, 2.0, 0.5, 3.0, 5.0, 30.0, 20.0, 0.6,
+                                 75.0, ["MSFT"], [], [])
+        self.assertEqual(self.mock_cursor.execute.call_args[0][0], first_query)
+
+    def test_count_filter_query(self):
+        self.mock_cursor.fetchall.return_value = [(42,)]
+        count = self.db.count_filter_query(10, 0.0, 10.0, 0.0, 0, 1.0, 500.0, 25, 0.0, 0.0, 0.0, 0.0, 0.0, 50.0,
+                                           100.0, 1.0, 100.0, ["AAPL"], [], [])
+        self.assertEqual(count, 42)
+        executed_query, params = self.mock_cursor.execute.call_args[0]
+        self.assertTrue(executed_query.startswith("SELECT COUNT(*) FROM dividend_data_table WHERE"))
+        self.assertIn("`Symbol` NOT IN (%s)", executed_query)
+        self.assertEqual(params[-1], "AAPL")
 
     def test_run_sql_query_default_mode(self):
         self.mock_cursor.fetchall.return_value = [("row1",)]
 
         result = self.db.run_sql_query("SELECT 1")
 
-        self.mock_pool.connection.assert_called()
-        self.mock_dict_pool.connection.assert_not_called()
+        self.mock_conn.cursor.assert_called_once_with(pymysql.cursors.Cursor)
         self.assertEqual(result, [("row1",)])
 
     def test_run_sql_query_empty_result(self):
@@ -165,7 +378,7 @@ class TestMysqlConnection(unittest.TestCase):
 
         result = self.db.check_db_update_dates()
 
-        self.assertEqual(result, {})
+        self.assertEqual(len(result), 0)
 
     def test_check_db_update_dates_single_row(self):
         self.mock_cursor.fetchall.return_value = [("radar_file", "2024-01-01")]
@@ -212,7 +425,7 @@ class TestMysqlConnection(unittest.TestCase):
         self.assertEqual(result, ["AAPL"])
 
     def test_run_filter_query_empty_result(self):
-        self.mock_dict_cursor.fetchall.return_value = []
+        self.mock_cursor.fetchall.return_value = []
 
         result = self.db.run_filter_query(
             min_streak_years=10, yield_range_min=0.0, yield_range_max=10.0,
@@ -224,10 +437,10 @@ class TestMysqlConnection(unittest.TestCase):
             excluded_symbols=[], excluded_sectors=[], excluded_industries=[]
         )
 
-        self.assertEqual(result, {})
+        self.assertEqual(len(result), 0)
 
     def test_run_filter_query_partial_exclusions_symbols_only(self):
-        self.mock_dict_cursor.fetchall.return_value = []
+        self.mock_cursor.fetchall.return_value = []
 
         self.db.run_filter_query(
             min_streak_years=5, yield_range_min=0.0, yield_range_max=10.0,
@@ -239,13 +452,13 @@ class TestMysqlConnection(unittest.TestCase):
             excluded_symbols=["AAPL"], excluded_sectors=[], excluded_industries=[]
         )
 
-        executed_query = self.mock_dict_cursor.execute.call_args[0][0]
+        executed_query = self.mock_cursor.execute.call_args[0][0]
         self.assertIn("`Symbol` NOT IN", executed_query)
         self.assertNotIn("`Sector` NOT IN", executed_query)
         self.assertNotIn("`Industry` NOT IN", executed_query)
 
     def test_run_filter_query_partial_exclusions_sectors_only(self):
-        self.mock_dict_cursor.fetchall.return_value = []
+        self.mock_cursor.fetchall.return_value = []
 
         self.db.run_filter_query(
             min_streak_years=5, yield_range_min=0.0, yield_range_max=10.0,
@@ -257,13 +470,13 @@ class TestMysqlConnection(unittest.TestCase):
             excluded_symbols=[], excluded_sectors=["Energy"], excluded_industries=[]
         )
 
-        executed_query = self.mock_dict_cursor.execute.call_args[0][0]
+        executed_query = self.mock_cursor.execute.call_args[0][0]
         self.assertNotIn("`Symbol` NOT IN", executed_query)
         self.assertIn("`Sector` NOT IN", executed_query)
         self.assertNotIn("`Industry` NOT IN", executed_query)
 
     def test_run_filter_query_partial_exclusions_industries_only(self):
-        self.mock_dict_cursor.fetchall.return_value = []
+        self.mock_cursor.fetchall.return_value = []
 
         self.db.run_filter_query(
             min_streak_years=5, yield_range_min=0.0, yield_range_max=10.0,
@@ -275,13 +488,13 @@ class TestMysqlConnection(unittest.TestCase):
             excluded_symbols=[], excluded_sectors=[], excluded_industries=["Banking"]
         )
 
-        executed_query = self.mock_dict_cursor.execute.call_args[0][0]
+        executed_query = self.mock_cursor.execute.call_args[0][0]
         self.assertNotIn("`Symbol` NOT IN", executed_query)
         self.assertNotIn("`Sector` NOT IN", executed_query)
         self.assertIn("`Industry` NOT IN", executed_query)
 
     def test_run_filter_query_verifies_all_filter_columns(self):
-        self.mock_dict_cursor.fetchall.return_value = []
+        self.mock_cursor.fetchall.return_value = []
 
         self.db.run_filter_query(
             min_streak_years=5, yield_range_min=1.0, yield_range_max=8.0,
@@ -293,19 +506,21 @@ class TestMysqlConnection(unittest.TestCase):
             excluded_symbols=[], excluded_sectors=[], excluded_industries=[]
         )
 
-        executed_query = self.mock_dict_cursor.execute.call_args[0][0]
+        executed_query = self.mock_cursor.execute.call_args[0][0]
         for col in ["`No Years`", "`Div Yield`", "`5Y Avg Yield`", "`DGR 1Y`", "`DGR 3Y`",
                     "`DGR 5Y`", "`DGR 10Y`", "`Chowder Number`", "`Price`", "`FV %`",
                     "`Revenue 1Y`", "`NPM`", "`CF/Share`", "`ROE`", "`P/E`", "`P/BV`",
                     "`Debt/Capital`", "`Payout Ratio`"]:
             self.assertIn(col, executed_query)
-        # Verify specific filter values appear in query
-        self.assertIn("5", executed_query)   # min_streak_years
-        self.assertIn("10", executed_query)  # chowder_number
-        self.assertIn("15", executed_query)  # fair_value
+        # Verify specific filter values are bound to the query
+        params = self.mock_cursor.execute.call_args[0][1]
+        self.assertEqual(params[0], 5)    # min_streak_years
+        self.assertIn(10, params)         # chowder_number
+        self.assertIn(15, params)         # fair_value
 
-    def test_run_filter_query_uses_dict_pool(self):
-        self.mock_dict_cursor.fetchall.return_value = [{"Symbol": "AAPL", "Price": 150.0}]
+    def test_run_filter_query_uses_tuple_cursor(self):
+        self.mock_cursor.description = (("Symbol",), ("Price",))
+        self.mock_cursor.fetchall.return_value = [("AAPL", 150.0)]
 
         self.db.run_filter_query(
             min_streak_years=5, yield_range_min=0.0, yield_range_max=10.0,
@@ -317,11 +532,11 @@ class TestMysqlConnection(unittest.TestCase):
             excluded_symbols=[], excluded_sectors=[], excluded_industries=[]
         )
 
-        self.mock_dict_pool.connection.assert_called()
-        self.mock_pool.connection.assert_not_called()
+        self.mock_pool.connection.assert_called_once()
+        self.mock_conn.cursor.assert_called_once_with()
 
     def test_run_filter_query_multiple_exclusion_values(self):
-        self.mock_dict_cursor.fetchall.return_value = []
+        self.mock_cursor.fetchall.return_value = []
 
         self.db.run_filter_query(
             min_streak_years=5, yield_range_min=0.0, yield_range_max=10.0,
@@ -334,10 +549,9 @@ class TestMysqlConnection(unittest.TestCase):
             excluded_industries=[]
         )
 
-        executed_query = self.mock_dict_cursor.execute.call_args[0][0]
-        self.assertIn("'AAPL'", executed_query)
-        self.assertIn("'MSFT'", executed_query)
-        self.assertIn("'GOOG'", executed_query)
+        executed_query, params = self.mock_cursor.execute.call_args[0]
+        self.assertIn("`Symbol` NOT IN (%s, %s, %s)", executed_query)
+        self.assertEqual(params[-3:], ["AAPL", "MSFT", "GOOG"])
 
     def test_run_sql_query_returns_connection_to_pool(self):
         self.mock_cursor.fetchall.return_value = [("row1",)]
@@ -0,0 +1,127 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+from dividend_stocks_filterer.db_pool import ConnectionPool, PoolTimeout
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.created = []
+
+        def creator():
+            connection = MagicMock(name="connection{}".format(len(self.created)))
+            self.created.append(connection)
+            return connection
+        self.pool = ConnectionPool(creator, size=2, ping_interval=30, checkout_timeout=0.05, idle_timeout=300)
+
+    def test_reuses_returned_connection(self):
+        first = self.pool.connection()
+        first.close()
+        second = self.pool.connection()
+        self.assertEqual(len(self.created), 1)
+        second.cursor()
+        self.created[0].cursor.assert_called_once()
+
+    @patch('dividend_stocks_filterer.db_pool.record')
+    def test_checkout_time_is_recorded(self, mock_record):
+        self.pool.connection()
+        mock_record.assert_called_once()
+        name, seconds = mock_record.call_args[0]
+        self.assertEqual(name, "db_pool")
+        self.assertGreaterEqual(seconds, 0)
+
+    def test_cursor_args_are_passed_through(self):
+        connection = self.pool.connection()
+        connection.cursor("DictCursor")
+        self.created[0].cursor.assert_called_once_with("DictCursor")
+
+    def test_check_in_rolls_back(self):
+        self.pool.connection().close()
+        self.created[0].rollback.assert_called_once()
+
+    def test_close_twice_returns_once(self):
+        connection = self.pool.connection()
+        connection.close()
+        connection.close()
+        self.assertEqual(self.pool.stats()["idle"], 1)
+        self.assertEqual(self.pool.stats()["active"], 0)
+
+    def test_failed_rollback_discards_connection(self):
+        connection = self.pool.connection()
+        self.created[0].rollback.side_effect = Exception("gone away")
+        connection.close()
+        self.created[0].close.assert_called_once()
+        self.assertEqual(self.pool.stats()["idle"], 0)
+        self.pool.connection()
+        self.assertEqual(len(self.created), 2)
+
+    def test_checkout_timeout(self):
+        self.pool.connection()
+        self.pool.connection()
+        with self.assertRaises(PoolTimeout):
+            self.pool.connection()
+        stats = self.pool.stats()
+        self.assertEqual(stats["checkout_failures"], 1)
+        self.assertEqual(stats["active"], 2)
+        self.assertEqual(stats["checkouts"], 2)
+
+    def test_waits_for_returned_connection(self):
+        first = self.pool.connection()
+        self.pool.connection()
+        self.pool.checkout_timeout = 5
+        threading.Timer(0.05, first.close).start()
+        self.pool.connection()
+        stats = self.pool.stats()
+        self.assertEqual(stats["checkouts"], 3)
+        self.assertGreater(stats["wait_seconds_max"], 0)
+        self.assertEqual(len(self.created), 2)
+
+    def test_creator_failure_frees_the_slot(self):
+        pool = ConnectionPool(MagicMock(side_effect=Exception("refused")), size=1, checkout_timeout=0.05)
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                pool.connection()
+        self.assertEqual(pool.stats()["checkout_failures"], 2)
+        self.assertEqual(pool.stats()["active"], 0)
+
+    def test_pings_only_after_ping_interval(self):
+        self.pool.connection().close()
+        self.pool.connection().close()
+        self.created[0].ping.assert_not_called()
+        connection, checked_in = self.pool._idle[0]
+        self.pool._idle[0] = (connection, checked_in - 40)
+        self.pool.connection()
+        self.created[0].ping.assert_called_once_with(reconnect=True)
+
+    def test_ping_every_checkout(self):
+        self.pool.ping_interval = 0
+        self.pool.connection().close()
+        self.pool.connection()
+        self.created[0].ping.assert_called_once()
+
+    def test_failed_ping_opens_new_connection(self):
+        self.pool.ping_interval = 0
+        self.pool.connection().close()
+        self.created[0].ping.side_effect = Exception("gone away")
+        self.pool.connection()
+        self.assertEqual(len(self.created), 2)
+        self.created[0].close.assert_called_once()
+
+    def test_idle_timeout_recycles_connection(self):
+        self.pool.idle_timeout = 0
+        self.pool.connection().close()
+        self.pool.connection()
+        self.assertEqual(len(self.created), 2)
+        self.created[0].close.assert_called_once()
+
+    def test_stats(self):
+        connection = self.pool.connection()
+        self.pool.connection().close()
+        self.assertEqual(self.pool.stats(), {
+            "size": 2, "active": 1, "idle": 1, "checkouts": 2, "checkout_failures": 0,
+            "wait_seconds_total": self.pool.stats()["wait_seconds_total"],
+            "wait_seconds_max": self.pool.stats()["wait_seconds_max"],
+        })
+        connection.close()
+        self.assertEqual(self.pool.stats()["idle"], 2)
@@ -0,0 +1,169 @@
+import unittest
+from dividend_stocks_filterer.filters import *
+
+FILTER_ARGS = (5, 0.0, 10.0, 0.5, 0, 1.0, 500.0, 0, 0.0, 0.0, 0.0, 0.0, -50.0, 100.0, 10.0, 1.0, 100.0,
+               ["MSFT", "AAPL"], [], ["Banking"])
+
+
+class TestFilters(unittest.TestCase):
+
+    def test_filter_predicates_values(self):
+        predicates = filter_predicates(FILTER_ARGS)
+        self.assertEqual(len(predicates), len(FILTER_PREDICATES))
+        self.assertIn(("No Years", ">=", 5), predicates)
+        self.assertIn(("DGR 10Y", ">=", 0.5), predicates)
+        self.assertIn(("Payout Ratio", "<=", 100.0), predicates)
+
+    def test_filter_exclusions_skips_empty_lists(self):
+        self.assertEqual(filter_exclusions(FILTER_ARGS), [("Symbol", ["MSFT", "AAPL"]), ("Industry", ["Banking"])])
+
+    def test_filter_columns_are_unique(self):
+        self.assertEqual(len(FILTER_COLUMNS), len(set(FILTER_COLUMNS)))
+        self.assertIn("5Y Avg Yield", FILTER_COLUMNS)
+
+    def test_canonical_filter_args_sorts_exclusions(self):
+        canonical = canonical_filter_args(FILTER_ARGS)
+        self.assertEqual(canonical[17], ("AAPL", "MSFT"))
+        self.assertEqual(canonical[18], ())
+
+    def test_canonical_filter_args_equal_for_equivalent_requests(self):
+        other = list(FILTER_ARGS)
+        other[1] = 0.000001
+        other[17] = ["AAPL", "MSFT", "AAPL"]
+        self.assertEqual(canonical_filter_args(FILTER_ARGS), canonical_filter_args(tuple(other)))
+        self.assertEqual(hash(canonical_filter_args(FILTER_ARGS)), hash(canonical_filter_args(tuple(other))))
+
+    def test_canonical_filter_args_keeps_ints(self):
+        self.assertIsInstance(canonical_filter_args(FILTER_ARGS)[0], int)
+
+    def test_page_request_defaults(self):
+        self.assertEqual(page_request("", "", 1, 0, 100), PageRequest("Symbol", False, 1, 100))
+
+    def test_page_request_keeps_valid_values(self):
+        self.assertEqual(page_request("Price", "desc", 3, 25, 100), PageRequest("Price", True, 3, 25))
+
+    def test_page_request_rejects_invalid_values(self):
+        self.assertEqual(page_request("Price; DROP", "sideways", -2, 7, 50), PageRequest("Symbol", False, 1, 50))
+
+    def test_page_request_offset_and_page_count(self):
+        request = PageRequest(page=3, page_size=25)
+        self.assertEqual(request.offset, 50)
+        self.assertEqual(request.page_count(0), 1)
+        self.assertEqual(request.page_count(51), 3)
+
+    def test_page_request_clamp(self):
+        self.assertEqual(PageRequest(page=9, page_size=25).clamp(30).page, 2)
+        self.assertEqual(PageRequest(page=2, page_size=25).clamp(0).page, 1)
+
+    def test_table_columns_cover_filter_columns(self):
+        self.assertTrue(set(FILTER_COLUMNS) <= set(TABLE_COLUMNS))
+
+    def test_projection_is_canonical(self):
+        self.assertEqual(projection(["Price", "Company"]), ("Symbol", "Company", "Price"))
+        self.assertEqual(projection(["Company", "Price", "Price"]), projection(["Price", "Company"]))
+
+    def test_projection_drops_unknown_columns(self):
+        self.assertEqual(projection(["Price", "`Price`; DROP TABLE x"]), ("Symbol", "Price"))
+
+    def test_projection_falls_back_to_default(self):
+        self.assertEqual(projection([]), DEFAULT_DISPLAY_COLUMNS)
+        self.assertEqual(projection(["Bogus"], ("Price",)), ("Symbol", "Price"))
+
+    def test_default_display_columns_are_canonical(self):
+        self.assertEqual(projection(DEFAULT_DISPLAY_COLUMNS), DEFAULT_DISPLAY_COLUMNS)
+
+    def test_column_list(self):
+        self.assertEqual(column_list("Price, Company,,"), ["Price", "Company"])
+        self.assertEqual(column_list(["Price"]), ["Price"])
+        self.assertEqual(column_list(""), [])
+        self.assertEqual(column_list(None), [])
+
+    def test_filter_predicates_skips_pruned_values(self):
+        pruned = (None,) + FILTER_ARGS[1:]
+        self.assertNotIn("No Years", [column for column, _, _ in filter_predicates(pruned)])
+        self.assertEqual(len(filter_predicates(pruned)), len(FILTER_PREDICATES) - 1)
+
+    def test_prune_filter_args_drops_values_outside_the_data(self):
+        bounds = {"No Years": (1.0, 60.0), "Price": (2.0, 400.0)}
+        pruned = prune_filter_args(FILTER_ARGS, bounds)
+        self.assertIsNone(pruned[FILTER_ARGUMENT_NAMES.index("price_range_max")])
+        self.assertIsNone(pruned[FILTER_ARGUMENT_NAMES.index("price_range_min")])
+        self.assertEqual(pruned[FILTER_ARGUMENT_NAMES.index("min_streak_years")], 5)
+
+    def test_prune_filter_args_keeps_unknown_columns(self):
+        self.assertEqual(prune_filter_args(FILTER_ARGS, {}), FILTER_ARGS)
+
+    def test_prune_filter_args_needs_every_column_of_an_argument(self):
+        bounds = {"DGR 1Y": (1.0, 9.0), "DGR 3Y": (1.0, 9.0), "DGR 5Y": (1.0, 9.0), "DGR 10Y": (0.0, 9.0)}
+        pruned = prune_filter_args(FILTER_ARGS, bounds)
+        self.assertEqual(pruned[FILTER_ARGUMENT_NAMES.index("min_dgr")], 0.5)
+        bounds["DGR 10Y"] = (0.5, 9.0)
+        pruned = prune_filter_args(FILTER_ARGS, bounds)
+        self.assertIsNone(pruned[FILTER_ARGUMENT_NAMES.index("min_dgr")])
+
+    def test_prune_filter_args_drops_exclusions_outside_the_data(self):
+        canonical = canonical_filter_args(FILTER_ARGS)
+        pruned = prune_filter_args(canonical, {}, {"Symbol": frozenset({"MSFT", "KO"}), "Industry": frozenset({"Oil"})})
+        self.assertEqual(pruned[17], ("MSFT",))
+        self.assertEqual(pruned[19], ())
+
+    def test_prune_filter_args_keeps_exclusions_of_unknown_columns(self):
+        canonical = canonical_filter_args(FILTER_ARGS)
+        self.assertEqual(prune_filter_args(canonical, {}, {"Symbol": frozenset({"MSFT"})})[19], ("Banking",))
+
+    def test_prune_filter_args_keeps_one_exclusion_of_a_column_with_nulls(self):
+        canonical = canonical_filter_args(FILTER_ARGS)
+        pruned = prune_filter_args(canonical, {}, {"Industry": frozenset({"Oil", None})})
+        self.assertEqual(pruned[19], ("Banking",))
+
+    def test_narrows_tighter_bounds(self):
+        canonical = canonical_filter_args(FILTER_ARGS)
+        tighter = list(canonical)
+        tighter[FILTER_ARGUMENT_NAMES.index("min_streak_years")] = 10
+        tighter[FILTER_ARGUMENT_NAMES.index("price_range_max")] = 400.0
+        tighter[FILTER_ARGUMENT_NAMES.index("excluded_sectors")] = ("Energy",)
+        self.assertTrue(narrows(tuple(tighter), canonical))
+        self.assertFalse(narrows(canonical, tuple(tighter)))
+        self.assertTrue(narrows(canonical, canonical))
+
+    def test_narrows_looser_bound(self):
+        canonical = canonical_filter_args(FILTER_ARGS)
+        looser = list(canonical)
+        looser[FILTER_ARGUMENT_NAMES.index("min_streak_years")] = 10
+        looser[FILTER_ARGUMENT_NAMES.index("yield_range_min")] = -1.0
+        self.assertFalse(narrows(tuple(looser), canonical))
+
+    def test_narrows_dropped_exclusion(self):
+        canonical = canonical_filter_args(FILTER_ARGS)
+        fewer = list(canonical)
+        fewer[FILTER_ARGUMENT_NAMES.index("excluded_symbols")] = ("AAPL",)
+        self.assertFalse(narrows(tuple(fewer), canonical))
+
+    def test_narrows_pruned_values(self):
+        canonical = canonical_filter_args(FILTER_ARGS)
+        pruned = list(canonical)
+        pruned[FILTER_ARGUMENT_NAMES.index("price_range_max")] = None
+        self.assertTrue(narrows(canonical, tuple(pruned)))
+        self.assertFalse(narrows(tuple(pruned), canonical))
+
+    def test_prune_filter_args_null_only_column(self):
+        pruned = prune_filter_args(FILTER_ARGS, {"Payout Ratio": (None, None)})
+        self.assertIsNone(pruned[FILTER_ARGUMENT_NAMES.index("max_payout_ratio")])
+
+    def test_result_rows_from_dict_fills_missing_columns(self):
+        rows = ResultRows.from_dict({"KO": {"Price": 60.0, "Symbol": "KO"}, "AAPL": {"Sector": "Technology"}})
+        self.assertEqual(rows.columns, ("Symbol", "Price", "Sector"))
+        self.assertEqual(rows.rows, [("KO", 60.0, None), ("AAPL", None, "Technology")])
+        self.assertEqual(len(rows), 2)
+
+    def test_result_rows_as_dict_round_trips(self):
+        rows = ResultRows(("Price", "Symbol"), [(60.0, "KO"), (150.0, "AAPL")])
+        as_dict = rows.as_dict()
+        self.assertEqual(list(as_dict), ["KO", "AAPL"])
+        self.assertEqual(as_dict["AAPL"], {"Price": 150.0, "Symbol": "AAPL"})
+        self.assertEqual(ResultRows.from_dict(as_dict).as_dict(), as_dict)
+
+    def test_result_rows_equality(self):
+        self.assertEqual(ResultRows(["Symbol"], [("KO",)]), ResultRows(("Symbol",), [("KO",)]))
+        self.assertNotEqual(ResultRows(("Symbol",), [("KO",)]), ResultRows(("Symbol",), [("PEP",)]))
+        self.assertNotEqual(ResultRows(("Symbol",), []), {})
@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import MagicMock
+from dividend_stocks_filterer.filters import FILTER_ARGUMENT_NAMES, FILTER_COLUMNS
+from dividend_stocks_filterer.index_advisor import *
+
+
+def make_db(indexes: list, access_type: str = "range") -> MagicMock:
+    db = MagicMock()
+
+    def run_sql_query(query, tuple_or_dict="tuple", params=None):
+        if query.startswith("SELECT INDEX_NAME"):
+            return indexes
+        if query.startswith("EXPLAIN"):
+            return [{"type": "range" if "UNION ALL" in query else access_type}]
+        return []
+    db.run_sql_query.side_effect = run_sql_query
+    db.column_bounds.return_value = {column: (0.0, 10.0) for column in FILTER_COLUMNS}
+    return db
+
+
+class TestIndexAdvisor(unittest.TestCase):
+
+    def test_index_name(self):
+        self.assertEqual(index_name("Div Yield"), "ix_div_yield")
+        self.assertEqual(index_name("FV %"), "ix_fv")
+        self.assertEqual(index_name("CF/Share"), "ix_cf_share")
+
+    def test_index_names_are_unique(self):
+        self.assertEqual(len({index_name(column) for column in FILTER_COLUMNS}), len(FILTER_COLUMNS))
+
+    def test_existing_indexes(self):
+        db = make_db([("PRIMARY", "Symbol"), ("ix_pe", "P/E"), ("ix_pe", "Price")])
+        self.assertEqual(existing_indexes(db), {"PRIMARY": ["Symbol"], "ix_pe": ["P/E", "Price"]})
+        self.assertEqual(db.run_sql_query.call_args[0][2], ["dividend_data_table"])
+
+    def test_missing_indexes_only_counts_leading_columns(self):
+        missing = missing_indexes({"PRIMARY": ["Symbol"], "ix_pe": ["P/E", "Price"]})
+        self.assertNotIn("P/E", missing)
+        self.assertIn("Price", missing)
+        self.assertEqual(len(missing), len(FILTER_COLUMNS) - 1)
+
+    def test_create_index_statement(self):
+        self.assertEqual(create_index_statement("Div Yield"),
+                         "CREATE INDEX `ix_div_yield` ON dividend_data_table (`Div Yield`);")
+        with self.assertRaises(ValueError):
+            create_index_statement("Price`); DROP TABLE x; --")
+
+    def test_filter_shapes_move_a_single_slider(self):
+        shapes = dict(filter_shapes({"Price": (10.0, 30.0), "P/E": (None, None)}))
+        self.assertEqual(set(shapes), {"price_range_min", "price_range_max"})
+        filter_args = shapes["price_range_min"]
+        self.assertEqual(filter_args[FILTER_ARGUMENT_NAMES.index("price_range_min")], 20.0)
+        self.assertIsNone(filter_args[FILTER_ARGUMENT_NAMES.index("price_range_max")])
+        self.assertEqual(filter_args[-1], ())
+
+    def test_union_rewrite(self):
+        filter_args = [None] * len(FILTER_ARGUMENT_NAMES)
+        filter_args[FILTER_ARGUMENT_NAMES.index("min_roe")] = 5.0
+        filter_args[FILTER_ARGUMENT_NAMES.index("max_payout_ratio")] = 60.0
+        filter_args[FILTER_ARGUMENT_NAMES.index("excluded_symbols")] = ("AAPL",)
+        query, params = union_rewrite(tuple(filter_args))
+        self.assertEqual(query, "SELECT * FROM dividend_data_table WHERE `ROE` >= %s AND "
+                                "(`Payout Ratio` <= %s OR `Payout Ratio` IS NULL) AND `Symbol` NOT IN (%s) "
+                                "UNION ALL SELECT * FROM dividend_data_table WHERE `ROE` IS NULL AND "
+                                "(`Payout Ratio` <= %s OR `Payout Ratio` IS NULL) AND `Symbol` NOT IN (%s)")
+        self.assertEqual(params, [5.0, 60.0, "AAPL", 60.0, "AAPL"])
+
+    def test_union_rewrite_needs_a_predicate(self):
+        with self.assertRaises(ValueError):
+            union_rewrite(tuple([None] * 17 + [(), (), ()]))
+
+    def test_advise_reports_without_creating(self):
+        db = make_db([("PRIMARY", "Symbol")])
+        report = advise(db)
+        self.assertEqual(report[0], "dividend_data_table has 1 index(es): PRIMARY")
+        self.assertIn("missing: CREATE INDEX `ix_price` ON dividend_data_table (`Price`);", report)
+        self.assertIn("price_range_min: range", report)
+        executed = [call[0][0] for call in db.run_sql_query.call_args_list]
+        self.assertFalse(any(query.startswith("CREATE") for query in executed))
+
+    def test_advise_creates_on_opt_in(self):
+        db = make_db([("PRIMARY", "Symbol")])
+        report = advise(db, create=True)
+        self.assertIn("created: CREATE INDEX `ix_price` ON dividend_data_table (`Price`);", report)
+        executed = [call[0][0] for call in db.run_sql_query.call_args_list]
+        self.assertEqual(len([query for query in executed if query.startswith("CREATE")]), len(FILTER_COLUMNS))
+
+    def test_advise_explains_union_form_of_full_scans(self):
+        db = make_db([("PRIMARY", "Symbol")], access_type="ALL")
+        report = advise(db)
+        self.assertIn("min_roe: ALL (full scan, UNION ALL form: range)", report)
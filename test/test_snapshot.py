@@ -0,0 +1,358 @@
+import datetime
+import json
+import os
+import struct
+import tempfile
+import unittest
+from decimal import Decimal
+import numpy as np
+from dividend_stocks_filterer.filters import FILTER_COLUMNS, PageRequest, filter_predicates
+from dividend_stocks_filterer.snapshot import TableSnapshot, read_update_dates
+
+COLUMNS = ["Symbol", "Company", "Sector", "Industry"] + list(FILTER_COLUMNS)
+
+TYPED_COLUMNS = ["Symbol", "Company", "Sector", "No Years", "Price", "Div Yield", "Ex-Date", "Pay-Date", "FV"]
+TYPED_ROWS = [
+    ("NSRGY", "Nestlé S.A.", "Consumer Staples", 28, Decimal("98.10"), 3.05,
+     datetime.datetime(2024, 4, 18, 9, 30), datetime.date(2024, 4, 24), None),
+    ("KO", "Coca-Cola", None, 61, Decimal("-0.00"), None, None, datetime.date(2024, 7, 1), None),
+    ("AAPL", "", "Information Technology", None, None, 0.1, datetime.datetime(1969, 12, 31), None, None),
+]
+
+
+def make_row(symbol: str, sector: str = "Technology", industry: str = "Software", **values) -> tuple:
+    row = dict.fromkeys(COLUMNS)
+    row.update({"Symbol": symbol, "Company": symbol + " Inc.", "Sector": sector, "Industry": industry})
+    row.update({key.replace("_", " "): value for key, value in values.items()})
+    return tuple(row[column] for column in COLUMNS)
+
+
+def filter_args(min_streak_years=0, yield_range_min=0.0, yield_range_max=100.0, min_dgr=-100.0,
+                chowder_number=-100, price_range_min=0.0, price_range_max=10000.0, fair_value=100,
+                min_revenue=-100.0, min_npm=-100.0, min_cf_per_share=-100.0, min_roe=-1000.0,
+                pe_range_min=-1000.0, pe_range_max=1000.0, max_price_per_book_value=1000.0,
+                max_debt_per_capital_value=100.0, max_payout_ratio=1000.0,
+                excluded_symbols=(), excluded_sectors=(), excluded_industries=()) -> tuple:
+    return (min_streak_years, yield_range_min, yield_range_max, min_dgr, chowder_number, price_range_min,
+            price_range_max, fair_value, min_revenue, min_npm, min_cf_per_share, min_roe, pe_range_min,
+            pe_range_max, max_price_per_book_value, max_debt_per_capital_value, max_payout_ratio,
+            list(excluded_symbols), list(excluded_sectors), list(excluded_industries))
+
+
+class TestTableSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.snapshot = TableSnapshot(COLUMNS, [
+            make_row("AAPL", No_Years=11, Price=Decimal("150.00"), **{"Div_Yield": 0.6}),
+            make_row("KO", sector="Consumer Staples", industry="Beverages", No_Years=61, Price=60.0,
+                     **{"Div_Yield": 3.1}),
+            make_row("NEW", sector=None, industry=None),
+        ], {"radar_file": "2024-01-01"})
+
+    def test_keeps_update_dates(self):
+        self.assertEqual(self.snapshot.update_dates, {"radar_file": "2024-01-01"})
+        self.assertEqual(self.snapshot.row_count, 3)
+
+    def test_filter_everything_passes(self):
+        result = self.snapshot.filter(*filter_args()).as_dict()
+        self.assertEqual(list(result), ["AAPL", "KO", "NEW"])
+
+    def test_filter_returns_rows_like_run_filter_query(self):
+        result = self.snapshot.filter(*filter_args()).as_dict()
+        self.assertEqual(result["KO"]["Sector"], "Consumer Staples")
+        self.assertEqual(result["AAPL"]["Price"], Decimal("150.00"))
+        self.assertEqual(set(result["AAPL"]), set(COLUMNS))
+
+    def test_filter_min_value_keeps_nulls(self):
+        result = self.snapshot.filter(*filter_args(min_streak_years=20)).as_dict()
+        self.assertEqual(list(result), ["KO", "NEW"])
+
+    def test_filter_range_is_inclusive(self):
+        result = self.snapshot.filter(*filter_args(price_range_min=60.0, price_range_max=150.0)).as_dict()
+        self.assertEqual(list(result), ["AAPL", "KO", "NEW"])
+        result = self.snapshot.filter(*filter_args(price_range_min=60.5, price_range_max=149.5)).as_dict()
+        self.assertEqual(list(result), ["NEW"])
+
+    def test_filter_yield_applies_to_both_yield_columns(self):
+        result = self.snapshot.filter(*filter_args(yield_range_min=1.0)).as_dict()
+        self.assertEqual(list(result), ["KO", "NEW"])
+
+    def test_filter_excluded_symbols(self):
+        result = self.snapshot.filter(*filter_args(excluded_symbols=["AAPL", "MSFT"])).as_dict()
+        self.assertEqual(list(result), ["KO", "NEW"])
+
+    def test_filter_excluded_sectors_drops_null_sectors(self):
+        result = self.snapshot.filter(*filter_args(excluded_sectors=["Technology"])).as_dict()
+        self.assertEqual(list(result), ["KO"])
+
+    def test_filter_excluded_industries(self):
+        result = self.snapshot.filter(*filter_args(excluded_industries=["Beverages"])).as_dict()
+        self.assertEqual(list(result), ["AAPL"])
+
+    def test_filter_many_excluded_symbols(self):
+        excluded = ["X{}".format(position) for position in range(1000)] + ["KO"]
+        result = self.snapshot.filter(*filter_args(excluded_symbols=excluded)).as_dict()
+        self.assertEqual(list(result), ["AAPL", "NEW"])
+
+    def test_filter_excluded_values_of_several_rows(self):
+        snapshot = TableSnapshot(COLUMNS, [make_row("KO", industry="Beverages"), make_row("KO", industry="Beverages"),
+                                           make_row("PEP", industry="Beverages"), make_row("MSFT")])
+        self.assertEqual(snapshot.filter(*filter_args(excluded_symbols=["KO"])).as_dict().keys(), {"PEP", "MSFT"})
+        self.assertEqual(list(snapshot.filter(*filter_args(excluded_industries=["Beverages", "Mining"])).as_dict()),
+                         ["MSFT"])
+
+    def test_exclusion_bitmaps(self):
+        self.assertEqual(self.snapshot._bitmaps["Sector"].shape, (2, 1))
+        self.assertEqual(np.unpackbits(self.snapshot._bitmaps["Sector"], axis=1, count=3).tolist(),
+                         [[1, 0, 0], [0, 1, 0]])
+        self.assertNotIn("Symbol", self.snapshot._bitmaps)
+        self.snapshot.filter(*filter_args(excluded_symbols=["KO"], excluded_sectors=["Technology"]))
+        self.assertEqual(self.snapshot._exclusion_indexes, {"Symbol": {"AAPL": 0, "KO": 1, "NEW": 2},
+                                                            "Sector": {"Technology": 0, "Consumer Staples": 1}})
+
+    def test_filter_no_match(self):
+        result = self.snapshot.filter(*filter_args(excluded_symbols=["AAPL", "KO", "NEW"])).as_dict()
+        self.assertEqual(result, {})
+
+    def test_empty_table(self):
+        snapshot = TableSnapshot(COLUMNS, [])
+        self.assertEqual(snapshot.filter(*filter_args()).as_dict(), {})
+
+    def test_sorted_indices_defaults_to_symbol(self):
+        mask = self.snapshot.filter_mask(*filter_args())
+        self.assertEqual(list(self.snapshot.sorted_indices(mask)), [0, 1, 2])
+        self.assertEqual(list(self.snapshot.sorted_indices(mask, descending=True)), [2, 1, 0])
+
+    def test_sorted_indices_numbers_keep_nulls_last(self):
+        mask = self.snapshot.filter_mask(*filter_args())
+        self.assertEqual(list(self.snapshot.sorted_indices(mask, "Price")), [1, 0, 2])
+        self.assertEqual(list(self.snapshot.sorted_indices(mask, "Price", True)), [0, 1, 2])
+
+    def test_sorted_indices_text_keeps_nulls_last(self):
+        mask = self.snapshot.filter_mask(*filter_args())
+        self.assertEqual(list(self.snapshot.sorted_indices(mask, "Sector")), [1, 0, 2])
+        self.assertEqual(list(self.snapshot.sorted_indices(mask, "Sector", True)), [0, 1, 2])
+
+    def test_sorted_indices_text_ignores_case_and_accents(self):
+        companies = ["Zeta", "apple", "Äpfel AG", "abbvie", "Banana", "banana", "École"]
+        rows = [("S{}".format(position), company) for position, company in enumerate(companies)]
+        snapshot = TableSnapshot(["Symbol", "Company"], rows)
+        mask = np.ones(len(companies), dtype=bool)
+        # as ordered by MySQL's utf8mb4_0900_ai_ci, equal names ordered by Symbol whichever the direction
+        self.assertEqual([companies[index] for index in snapshot.sorted_indices(mask, "Company")],
+                         ["abbvie", "Äpfel AG", "apple", "Banana", "banana", "École", "Zeta"])
+        self.assertEqual([companies[index] for index in snapshot.sorted_indices(mask, "Company", True)],
+                         ["Zeta", "École", "Banana", "banana", "apple", "Äpfel AG", "abbvie"])
+
+    def test_filter_page(self):
+        page = self.snapshot.filter_page(PageRequest("No Years", True, 1, 2), *filter_args())
+        self.assertEqual(page.total, 3)
+        self.assertEqual(list(page.rows.as_dict()), ["KO", "AAPL"])
+        page = self.snapshot.filter_page(PageRequest("No Years", True, 2, 2), *filter_args())
+        self.assertEqual(list(page.rows.as_dict()), ["NEW"])
+
+    def test_filter_page_clamps_page(self):
+        page = self.snapshot.filter_page(PageRequest(page=5, page_size=25), *filter_args(min_streak_years=20))
+        self.assertEqual(page.page_request.page, 1)
+        self.assertEqual(list(page.rows.as_dict()), ["KO", "NEW"])
+
+    def test_filter_page_projects_columns(self):
+        page = self.snapshot.filter_page(PageRequest(), *filter_args(), columns=("Symbol", "Price"))
+        self.assertEqual(page.rows.as_dict()["AAPL"], {"Symbol": "AAPL", "Price": Decimal("150.00")})
+        self.assertEqual(list(page.rows.as_dict()), ["AAPL", "KO", "NEW"])
+
+    def test_column_bounds(self):
+        bounds = self.snapshot.column_bounds()
+        self.assertEqual(bounds["No Years"], (11.0, 61.0))
+        self.assertEqual(bounds["Price"], (60.0, 150.0))
+        self.assertEqual(bounds["P/E"], (None, None))
+        self.assertEqual(set(bounds), set(FILTER_COLUMNS))
+
+    def test_filter_skips_pruned_predicates(self):
+        args = list(filter_args(price_range_min=100.0))
+        args[0] = None
+        self.assertEqual(list(self.snapshot.filter(*args).as_dict()), ["AAPL", "NEW"])
+
+    def test_min_max_all_values(self):
+        snapshot = TableSnapshot(COLUMNS, [
+            make_row("AAA", Div_Yield=2.0, Price=Decimal("10.5"), ROE=-3.0),
+            make_row("BBB", Div_Yield=4.0, Price=30.0),
+            make_row("CCC", Price=999.0),
+        ])
+        values = snapshot.min_max_all_values()
+        self.assertEqual(values["yield_max_raw"], 4.0)
+        self.assertEqual(values["price_max_raw"], 30.0)
+        self.assertEqual(values["roe_min"], -3.0)
+        self.assertIsNone(values["npm_min"])
+
+    def test_distinct_values(self):
+        snapshot = TableSnapshot(COLUMNS, [
+            make_row("AAA", sector="Energy"), make_row("BBB"), make_row("CCC", sector="Energy"),
+            make_row("DDD", sector=None),
+        ])
+        self.assertEqual(snapshot.distinct_values("Sector"), ["Energy", "Technology", None])
+        self.assertEqual(snapshot.distinct_values("Symbol"), ["AAA", "BBB", "CCC", "DDD"])
+
+    def test_range_indices_matches_full_scan(self):
+        random = np.random.default_rng(7)
+        rows = []
+        for position in range(300):
+            values = {column.replace(" ", "_"): None if random.random() < 0.2 else float(random.integers(-20, 20))
+                      for column in ("Div Yield", "Price", "ROE", "No Years")}
+            rows.append(make_row("S{}".format(position), **values))
+        snapshot = TableSnapshot(COLUMNS, rows)
+        for _ in range(50):
+            low, high = sorted(random.integers(-25, 25, size=2).tolist())
+            args = filter_args(min_streak_years=int(random.integers(-25, 25)), yield_range_min=low,
+                               yield_range_max=high, price_range_min=float(random.integers(-25, 25)),
+                               min_roe=float(random.integers(-25, 25)))
+            expected = np.ones(snapshot.row_count, dtype=bool)
+            for column, operator, value in filter_predicates(args):
+                numbers = snapshot._numbers[column]
+                expected &= (numbers >= value if operator == ">=" else numbers <= value) | snapshot._nulls[column]
+            self.assertEqual(sorted(snapshot.range_indices(filter_predicates(args)).tolist()),
+                             np.flatnonzero(expected).tolist())
+
+    def test_filter_mask_within_previous_results(self):
+        previous = np.flatnonzero(self.snapshot.filter_mask(*filter_args(min_streak_years=10)))
+        narrowed = self.snapshot.filter_mask(*filter_args(min_streak_years=20), within=previous)
+        self.assertEqual(narrowed.tolist(), self.snapshot.filter_mask(*filter_args(min_streak_years=20)).tolist())
+        self.assertEqual(np.flatnonzero(narrowed).tolist(), [1, 2])
+
+    def test_filter_mask_within_only_checks_given_rows(self):
+        mask = self.snapshot.filter_mask(*filter_args(), within=np.array([0]))
+        self.assertEqual(np.flatnonzero(mask).tolist(), [0])
+
+    def test_range_indices_without_predicates(self):
+        self.assertEqual(self.snapshot.range_indices([]).tolist(), [0, 1, 2])
+
+    def test_range_indices_empty_range(self):
+        self.assertEqual(self.snapshot.range_indices([("Price", ">=", 100.0), ("Price", "<=", 50.0)]).tolist(), [2])
+
+
+class TestSnapshotFile(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "snapshot")
+        self.snapshot = TableSnapshot(COLUMNS, [
+            make_row("KO", sector="Consumer Staples", No_Years=61, Price=60.0, **{"Div_Yield": 3.1}),
+            make_row("AAPL", No_Years=11, Price=Decimal("150.00"), **{"Div_Yield": 0.6}),
+            make_row("NEW", sector=None, industry=None),
+        ], {"radar_file": "2024-01-01"})
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        self.snapshot.save(self.path)
+        loaded = TableSnapshot.load(self.path)
+        self.assertEqual(loaded.columns, self.snapshot.columns)
+        self.assertEqual(loaded.update_dates, {"radar_file": "2024-01-01"})
+        self.assertEqual(loaded.row_count, 3)
+        self.assertEqual(loaded.column_bounds(), self.snapshot.column_bounds())
+        request = PageRequest("Price", True, 1, 2)
+        self.assertEqual(loaded.filter_page(request, *filter_args(excluded_symbols=["NEW"])),
+                         self.snapshot.filter_page(request, *filter_args(excluded_symbols=["NEW"])))
+
+    def test_load_keeps_value_types(self):
+        self.snapshot.save(self.path)
+        rows = TableSnapshot.load(self.path).filter(*filter_args()).as_dict()
+        self.assertIsInstance(rows["AAPL"]["Price"], Decimal)
+        self.assertIsNone(rows["NEW"]["Sector"])
+
+    def test_load_maps_arrays_read_only(self):
+        self.snapshot.save(self.path)
+        loaded = TableSnapshot.load(self.path)
+        self.assertFalse(loaded._numbers["Price"].flags.writeable)
+        self.assertFalse(loaded._nulls["Sector"].flags.writeable)
+        self.assertFalse(loaded._sorted["Price"].flags.writeable)
+        self.assertFalse(loaded._text_data["Company"].flags.writeable)
+        self.assertEqual(loaded._sorted["Price"].tolist(), self.snapshot._sorted["Price"].tolist())
+        self.assertFalse(loaded._bitmaps["Industry"].flags.writeable)
+        self.assertEqual(loaded._bitmaps["Industry"].tolist(), self.snapshot._bitmaps["Industry"].tolist())
+        for excluded in (["Consumer Staples"], ["Energy"], ["Technology", "Consumer Staples"]):
+            self.assertEqual(loaded.filter(*filter_args(excluded_sectors=excluded)),
+                             self.snapshot.filter(*filter_args(excluded_sectors=excluded)))
+
+    def test_typed_columns_are_rebuilt_exactly(self):
+        snapshot = TableSnapshot(TYPED_COLUMNS, TYPED_ROWS)
+        snapshot.save(self.path)
+        loaded = TableSnapshot.load(self.path)
+        for table in (snapshot, loaded):
+            with self.subTest(loaded=table is loaded):
+                self.assertEqual(table._values, {})
+                rows = table.rows_at(np.arange(3)).rows
+                self.assertEqual(rows, TYPED_ROWS)
+                self.assertEqual([[type(cell) for cell in row] for row in rows],
+                                 [[type(cell) for cell in row] for row in TYPED_ROWS])
+                self.assertEqual(str(rows[1][4]), "-0.00")
+                self.assertEqual(table.distinct_values("Company"), ["Nestlé S.A.", "Coca-Cola", ""])
+                self.assertEqual(table.sorted_indices(np.ones(3, dtype=bool), "Ex-Date").tolist(), [2, 0, 1])
+
+    def test_columns_of_mixed_types_are_tagged(self):
+        self.assertEqual(self.snapshot._cell_types["Price"], ("tagged",))
+        # Decimals of different scales have no single exponent to round them back to
+        rows = [("BIG", Decimal("1.5"), b"\x00\xff", datetime.datetime(2024, 1, 2, tzinfo=datetime.timezone.utc)),
+                ("HUGE", Decimal("2.25"), "text", 2 ** 60),
+                ("NONE", None, 0.1, datetime.date(2024, 1, 2))]
+        snapshot = TableSnapshot(["Symbol", "Price", "Notes", "Added"], rows)
+        snapshot.save(self.path)
+        loaded = TableSnapshot.load(self.path)
+        for table in (snapshot, loaded):
+            with self.subTest(loaded=table is loaded):
+                self.assertEqual(table._values, {})
+                self.assertEqual(table._cell_types, {"Symbol": ("text",), "Price": ("tagged",),
+                                                     "Notes": ("tagged",), "Added": ("tagged",)})
+                self.assertEqual(table.rows_at(np.arange(3)).rows, rows)
+                self.assertEqual([[type(cell) for cell in row] for row in table.rows_at(np.arange(3)).rows],
+                                 [[type(cell) for cell in row] for row in rows])
+
+    def test_header_and_body_are_json(self):
+        update_dates = {"radar_file": datetime.datetime(2024, 1, 1, 6, 30), "yahoo_finance": None}
+        TableSnapshot(TYPED_COLUMNS, TYPED_ROWS, update_dates).save(self.path)
+        self.assertEqual(read_update_dates(self.path), update_dates)
+        with open(self.path, "rb") as file:
+            header_length, body_length = struct.unpack_from("<QQ", file.read(24), 8)
+            header = json.loads(file.read(header_length))
+            body = json.loads(file.read(body_length))
+        self.assertEqual(header["update_dates"]["radar_file"], [4, "2024-01-01T06:30:00"])
+        self.assertEqual(body["columns"], TYPED_COLUMNS)
+
+    def test_values_of_unknown_types_are_not_saved(self):
+        snapshot = TableSnapshot(["Symbol", "Flags"], [("KO", {"a", "b"}), ("AAPL", None)])
+        self.assertEqual(snapshot.rows_at(np.arange(2)).rows, [("KO", {"a", "b"}), ("AAPL", None)])
+        with self.assertRaises(ValueError):
+            snapshot.save(self.path)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_load_rejects_object_arrays(self):
+        self.snapshot.save(self.path)
+        with open(self.path, "r+b") as file:
+            contents = file.read().replace(b'"<f8"', b'"|O8"', 1)
+            file.seek(0)
+            file.write(contents)
+        with self.assertRaises(ValueError):
+            TableSnapshot.load(self.path)
+
+    def test_save_replaces_file(self):
+        self.snapshot.save(self.path)
+        TableSnapshot(COLUMNS, [], {"radar_file": "2024-02-01"}).save(self.path)
+        self.assertEqual(read_update_dates(self.path), {"radar_file": "2024-02-01"})
+        self.assertEqual(TableSnapshot.load(self.path).row_count, 0)
+        self.assertEqual(os.listdir(self.directory.name), ["snapshot"])
+
+    def test_load_rejects_other_files(self):
+        with open(self.path, "wb") as file:
+            file.write(b"not a snapshot file at all")
+        with self.assertRaises(ValueError):
+            TableSnapshot.load(self.path)
+        with self.assertRaises(ValueError):
+            read_update_dates(self.path)
+
+    def test_load_rejects_truncated_file(self):
+        self.snapshot.save(self.path)
+        with open(self.path, "r+b") as file:
+            file.truncate(os.path.getsize(self.path) - 8)
+        with self.assertRaises(ValueError):
+            TableSnapshot.load(self.path)
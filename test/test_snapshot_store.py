@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from dividend_stocks_filterer.snapshot import TableSnapshot
+from dividend_stocks_filterer.snapshot_store import SnapshotStore
+
+COLUMNS = ["Symbol", "Price"]
+
+
+def make_snapshot(update_dates: dict) -> TableSnapshot:
+    return TableSnapshot(COLUMNS, [("KO", 60.0), ("AAPL", 150.0)], update_dates)
+
+
+class TestSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore(os.path.join(self.directory.name, "snapshot"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_load_missing_file(self):
+        self.assertIsNone(self.store.load({"radar_file": "2024-01-01"}))
+
+    def test_load_other_version(self):
+        make_snapshot({"radar_file": "2024-01-01"}).save(self.store.path)
+        self.assertIsNone(self.store.load({"radar_file": "2024-02-01"}))
+
+    def test_load_unreadable_file(self):
+        with open(self.store.path, "wb") as file:
+            file.write(b"garbage")
+        self.assertIsNone(self.store.load({"radar_file": "2024-01-01"}))
+
+    def test_load_or_build_builds_once_per_version(self):
+        build = MagicMock(side_effect=lambda: make_snapshot({"radar_file": "2024-01-01"}))
+        first = self.store.load_or_build({"radar_file": "2024-01-01"}, build)
+        second = SnapshotStore(self.store.path).load_or_build({"radar_file": "2024-01-01"}, build)
+        build.assert_called_once()
+        self.assertEqual(first.column_bounds(), second.column_bounds())
+        self.assertEqual(second.update_dates, {"radar_file": "2024-01-01"})
+
+    def test_load_or_build_rebuilds_new_version(self):
+        make_snapshot({"radar_file": "2024-01-01"}).save(self.store.path)
+        build = MagicMock(return_value=make_snapshot({"radar_file": "2024-02-01"}))
+        snapshot = self.store.load_or_build({"radar_file": "2024-02-01"}, build)
+        build.assert_called_once()
+        self.assertEqual(snapshot.update_dates, {"radar_file": "2024-02-01"})
+        self.assertIsNotNone(self.store.load({"radar_file": "2024-02-01"}))
+
+    def test_load_or_build_without_directory_still_builds(self):
+        store = SnapshotStore(os.path.join(self.directory.name, "missing", "snapshot"))
+        built = make_snapshot({"radar_file": "2024-01-01"})
+        self.assertIs(store.load_or_build({"radar_file": "2024-01-01"}, lambda: built), built)
+
+    def test_load_or_build_keeps_unshareable_snapshot(self):
+        built = TableSnapshot(["Symbol", "Flags"], [("KO", {"a"})], {"radar_file": "2024-01-01"})
+        self.assertIs(self.store.load_or_build({"radar_file": "2024-01-01"}, lambda: built), built)
+        self.assertFalse(os.path.exists(self.store.path))
+
+    def test_latest_update_dates_empty_store(self):
+        self.assertIsNone(self.store.latest_update_dates())
+
+    def test_latest_update_dates_any_version(self):
+        make_snapshot({"radar_file": "2023-12-01"}).save(self.store.path)
+        self.assertEqual(self.store.latest_update_dates(), {"radar_file": "2023-12-01"})
+
+    def test_load_or_build_saves_persistent_copy(self):
+        persistent_path = os.path.join(self.directory.name, "persistent")
+        store = SnapshotStore(self.store.path, persistent_path)
+        store.load_or_build({"radar_file": "2024-01-01"}, lambda: make_snapshot({"radar_file": "2024-01-01"}))
+        self.assertEqual(SnapshotStore(persistent_path).latest_update_dates(), {"radar_file": "2024-01-01"})
+
+    def test_latest_update_dates_restores_persistent_copy(self):
+        persistent_path = os.path.join(self.directory.name, "persistent")
+        make_snapshot({"radar_file": "2023-12-01"}).save(persistent_path)
+        store = SnapshotStore(self.store.path, persistent_path)
+        self.assertEqual(store.latest_update_dates(), {"radar_file": "2023-12-01"})
+        self.assertTrue(os.path.exists(self.store.path))
+        build = MagicMock()
+        self.assertEqual(store.load_or_build({"radar_file": "2023-12-01"}, build).row_count, 2)
+        build.assert_not_called()
+
+    def test_persistent_path_same_as_path_keeps_no_copy(self):
+        self.assertIsNone(SnapshotStore(self.store.path, self.store.path).persistent_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import datetime
+import unittest
+from decimal import Decimal
+from dividend_stocks_filterer.filters import ResultRows
+from dividend_stocks_filterer.helper_functions import radar_dict_to_table
+from dividend_stocks_filterer.table_renderer import render_batches, render_table, column_formatter, type_formatter
+from test.test_helper_functions import test_radar_dict
+
+
+def pandas_table(results: dict) -> str:
+    return radar_dict_to_table(results).to_html(classes="table table-striped table-hover table-sm", border=0, index=True)
+
+
+class TestRenderTable(unittest.TestCase):
+
+    def test_matches_pandas_markup(self):
+        self.assertEqual("".join(render_table(ResultRows.from_dict(test_radar_dict))), pandas_table(test_radar_dict))
+
+    def test_matches_pandas_markup_mixed_types(self):
+        results = {
+            "A": {"Symbol": "A", "Price": 1.5, "Years": 3, "Growth": None, "Name": "a < b & c",
+                  "Ex-Date": datetime.datetime(2022, 1, 1), "Payout": Decimal("0.60"), "Tiny": 1e-08},
+            "B": {"Symbol": "B", "Price": 20.25, "Years": 4, "Growth": 7, "Name": None,
+                  "Ex-Date": None, "Payout": None, "Tiny": 2.0},
+        }
+        self.assertEqual("".join(render_table(ResultRows.from_dict(results))), pandas_table(results))
+
+    def test_yields_in_chunks(self):
+        results = {str(i): {"Symbol": str(i), "Price": float(i)} for i in range(1000)}
+        chunks = list(render_table(ResultRows.from_dict(results)))
+        self.assertGreater(len(chunks), 2)
+        self.assertEqual("".join(chunks), pandas_table(results))
+
+    def test_symbol_column_anywhere_in_header(self):
+        results = ResultRows(("Price", "Symbol", "Years"), [(1.5, "A", 3), (20.25, "B", 4)])
+        self.assertEqual("".join(render_table(results)), pandas_table(results.as_dict()))
+
+    def test_empty_results(self):
+        self.assertEqual("".join(render_table(ResultRows.from_dict({}))), pandas_table({}))
+
+    def test_batches_render_one_table(self):
+        columns = ("Symbol", "Years")
+        results = ResultRows(columns, [(str(i), i) for i in range(10)])
+        batches = [ResultRows(columns, results.rows[:4]), ResultRows(columns, results.rows[4:])]
+        self.assertEqual("".join(render_batches(batches)), "".join(render_table(results)))
+
+    def test_typed_batches_share_formats(self):
+        columns = ("Symbol", "Payout", "Years")
+        types = (("text", None), ("decimal", 2), ("int", None))
+        html = "".join(render_batches([ResultRows(columns, [("A", Decimal("1.5"), 3)], types),
+                                       ResultRows(columns, [("B", Decimal("2.25"), None)], types)]))
+        self.assertIn("<td>1.50</td>\n      <td>3</td>", html)
+        self.assertIn("<td>2.25</td>\n      <td>NaN</td>", html)
+
+    def test_typed_and_untyped_markup_side_by_side(self):
+        columns = ("Symbol", "Price", "Years", "Ex-Date")
+        types = (("text", None), ("float", None), ("int", None), ("datetime", None))
+        rows = [("A", 1.5, 5, datetime.datetime(2022, 1, 1)), ("B", 2.25, None, datetime.datetime(2022, 1, 2, 9, 30))]
+        table = ('<table class="dataframe table table-striped table-hover table-sm">\n  <thead>\n'
+                 '    <tr style="text-align: right;">\n      <th></th>\n      <th>Price</th>\n      <th>Years</th>\n'
+                 '      <th>Ex-Date</th>\n    </tr>\n  </thead>\n  <tbody>\n'
+                 '    <tr>\n      <th>A</th>\n      <td>{}</td>\n      <td>{}</td>\n      <td>{}</td>\n    </tr>\n'
+                 '    <tr>\n      <th>B</th>\n      <td>{}</td>\n      <td>NaN</td>\n      <td>2022-01-02 09:30:00</td>\n'
+                 '    </tr>\n  </tbody>\n</table>')
+        buffered = "".join(render_table(ResultRows(columns, rows)))
+        streamed = "".join(render_batches([ResultRows(columns, rows[:1], types), ResultRows(columns, rows[1:], types)]))
+        # untyped rows get formats shared by the whole column, like pandas
+        self.assertEqual(buffered, table.format("1.50", "5.0", "2022-01-01 00:00:00", "2.25"))
+        self.assertEqual(buffered, pandas_table(ResultRows(columns, rows).as_dict()))
+        # typed batches get formats that don't depend on rows of later batches
+        self.assertEqual(streamed, table.format("1.5", "5", "2022-01-01", "2.25"))
+
+    def test_batches_read_lazily(self):
+        def batches():
+            yield ResultRows(("Symbol",), [("A",)])
+            raise AssertionError("read past the first batch")
+        self.assertTrue(next(render_batches(batches())).startswith("<table"))
+
+
+class TestColumnFormatter(unittest.TestCase):
+
+    def test_floats_share_decimals(self):
+        formatter = column_formatter([0.9, 0.92, None])
+        self.assertEqual([formatter(0.9), formatter(0.92), formatter(None)], ["0.90", "0.92", "NaN"])
+
+    def test_ints_with_missing_values_become_floats(self):
+        formatter = column_formatter([13, None])
+        self.assertEqual(formatter(13), "13.0")
+
+    def test_ints(self):
+        self.assertEqual(column_formatter([13, 4])(13), "13")
+
+    def test_datetimes_without_time(self):
+        formatter = column_formatter([datetime.datetime(2022, 12, 30), None])
+        self.assertEqual([formatter(datetime.datetime(2022, 12, 30)), formatter(None)], ["2022-12-30", "NaT"])
+
+    def test_all_missing(self):
+        self.assertEqual(column_formatter([None, None])(None), "None")
+
+
+class TestTypeFormatter(unittest.TestCase):
+
+    def test_fixed_scale(self):
+        formatter = type_formatter("float", 2)
+        self.assertEqual([formatter(0.9), formatter(Decimal("1.5")), formatter(None)], ["0.90", "1.50", "NaN"])
+
+    def test_floats_without_scale_are_formatted_one_by_one(self):
+        formatter = type_formatter("float")
+        self.assertEqual([formatter(value) for value in (3.0, 0.92, 1 / 3, 1e-08, 1234567.5, None)],
+                         ["3.0", "0.92", "0.333333", "1.000000e-08", "1234567.5", "NaN"])
+
+    def test_ints(self):
+        formatter = type_formatter("int")
+        self.assertEqual([formatter(13), formatter(None)], ["13", "NaN"])
+
+    def test_datetimes(self):
+        formatter = type_formatter("datetime")
+        self.assertEqual([formatter(datetime.datetime(2022, 12, 30)), formatter(datetime.datetime(2022, 12, 30, 9)),
+                          formatter(None)], ["2022-12-30", "2022-12-30 09:00:00", "NaT"])
+        self.assertEqual(type_formatter("date")(datetime.date(2022, 12, 30)), "2022-12-30")
+
+    def test_text_and_other(self):
+        self.assertEqual([type_formatter("text")("a"), type_formatter("text")(None)], ["a", "NaN"])
+        self.assertEqual(type_formatter(None)(None), "None")
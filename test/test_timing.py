@@ -0,0 +1,146 @@
+import asyncio
+import json
+import time
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from dividend_stocks_filterer.timing import RequestTiming, ServerTimingMiddleware, current_timing, record, span, timed
+
+
+async def streaming_app(scope, receive, send):
+    record("db_pool", 0.002)
+    with span("db_query"):
+        pass
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/html")]})
+    for chunk in timed("render", iter([b"<table>", b"</table>"])):
+        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def call(app, path="/filter") -> list:
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app({"type": "http", "method": "POST", "path": path, "headers": []}, receive, send))
+    return messages
+
+
+class TestRequestTiming(unittest.TestCase):
+
+    def test_spans_add_up_by_name(self):
+        timing = RequestTiming()
+        timing.add("db_query", 0.001)
+        timing.add("render", 0.0025)
+        timing.add("db_query", 0.002)
+        self.assertEqual(timing.header(), "db_query;dur=3.000, render;dur=2.500")
+        self.assertEqual(timing.milliseconds(), {"db_query": 3.0, "render": 2.5})
+
+    def test_empty_header(self):
+        self.assertEqual(RequestTiming().header(), "")
+
+
+class TestSpans(unittest.TestCase):
+
+    def test_off_outside_a_request(self):
+        self.assertIsNone(current_timing())
+        with span("db_query"):
+            pass
+        record("db_pool", 1.0)
+        iterable = [1, 2]
+        self.assertIs(timed("render", iterable), iterable)
+
+    def test_timed_closes_the_iterator_when_stopped_early(self):
+        closed = []
+
+        def chunks():
+            try:
+                yield "a"
+                yield "b"
+            finally:
+                closed.append(True)
+
+        async def app(scope, receive, send):
+            iterator = timed("render", chunks())
+            self.assertEqual(next(iterator), "a")
+            iterator.close()
+            self.assertEqual(closed, [True])
+            self.assertIn("render", current_timing().spans)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+        call(ServerTimingMiddleware(app))
+
+    def test_nested_spans_do_not_overlap(self):
+        def rows():
+            for row in ("<tr>", "<tr>"):
+                with span("db_query"):
+                    record("db_pool", 0.001)
+                    time.sleep(0.003)
+                yield row
+
+        def template(table_chunks):
+            yield "<div>"
+            yield from table_chunks
+            time.sleep(0.003)
+            yield "</div>"
+
+        async def app(scope, receive, send):
+            started = time.perf_counter()
+            self.assertEqual(list(timed("template", template(timed("render", rows())))),
+                             ["<div>", "<tr>", "<tr>", "</div>"])
+            elapsed = (time.perf_counter() - started) * 1000
+            spans = current_timing().milliseconds()
+            self.assertEqual(set(spans), {"template", "render", "db_query", "db_pool"})
+            self.assertGreaterEqual(spans["template"], 3.0)
+            self.assertGreaterEqual(spans["db_query"], 4.0)
+            self.assertLess(spans["render"], 2.0)
+            self.assertAlmostEqual(sum(spans.values()), elapsed, delta=1.0)
+            await send({"type": "http.response.start", "status": 204, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+        call(ServerTimingMiddleware(app))
+
+
+class TestServerTimingMiddleware(unittest.TestCase):
+
+    def test_header_has_the_spans_before_the_response_started(self):
+        messages = call(ServerTimingMiddleware(streaming_app))
+        headers = dict(messages[0]["headers"])
+        self.assertEqual(headers[b"content-type"], b"text/html")
+        names = [metric.split(b";")[0] for metric in headers[b"server-timing"].split(b", ")]
+        self.assertEqual(names, [b"db_pool", b"db_query", b"app"])
+        self.assertEqual(b"".join(message.get("body", b"") for message in messages[1:]), b"<table></table>")
+        self.assertIsNone(current_timing())
+
+    def test_log_line_has_every_span(self):
+        output = StringIO()
+        with redirect_stdout(output):
+            messages = call(ServerTimingMiddleware(streaming_app, header=False, log=True))
+        self.assertNotIn(b"server-timing", dict(messages[0]["headers"]))
+        line = json.loads(output.getvalue())["timing"]
+        self.assertEqual((line["method"], line["path"], line["status"]), ("POST", "/filter", 200))
+        self.assertEqual(set(line["spans_ms"]), {"db_pool", "db_query", "app", "render", "total"})
+        self.assertGreaterEqual(line["spans_ms"]["db_pool"], 2.0)
+
+    def test_requests_are_timed_apart(self):
+        timings = []
+
+        async def app(scope, receive, send):
+            timings.append(current_timing())
+            await send({"type": "http.response.start", "status": 204, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+        middleware = ServerTimingMiddleware(app)
+        call(middleware)
+        call(middleware)
+        self.assertIsNot(timings[0], timings[1])
+
+    def test_skips_non_http_scopes(self):
+        scopes = []
+
+        async def app(scope, receive, send):
+            scopes.append(current_timing())
+        asyncio.run(ServerTimingMiddleware(app)({"type": "lifespan"}, None, None))
+        self.assertEqual(scopes, [None])